@@ -1,12 +1,33 @@
 import os
 import uuid
 import json
+import asyncio
+import queue
+import threading
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
-from fastapi.responses import FileResponse, StreamingResponse
+from collections import deque
+from typing import List
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Header, Request, Query
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+
+from core.uploads import ChunkedUploadWriter, is_upload_in_progress  # Bounded-memory upload to disk
+from core.jobs import JobQueue, QUEUED, RUNNING, SUSPENDED, TERMINAL_STATES, ANALYSIS, PROXY  # Persistent queue of analysis jobs
+from core.worker import WorkerPool, result_prefix  # Processes running the jobs
+from core.scheduler import plan_threads  # CPU budget per worker
+from core.results import ResultFollower  # Reads results while they are written
+from core.renderer import AnnotatedRenderer  # Server-side overlay for playback
+from core.session import MatchSession  # Result files and events of one match
+from core.profiling import PROFILE_EXTENSIONS, profile_output_path  # On-demand profiles
+from core.pipeline import PROFILES, DEFAULT_PROFILE  # Per-session stage sets
+from core.proxy import proxy_path  # Analysis proxies of uploads
+from utils.logging_utils import configure_logging, get_logger
 
-from core.stream import LiveProcessor  # Main processing pipeline for live video frames
+# Queue-backed structured logging; levels from VAR_LOG_LEVEL / VAR_LOG_LEVELS
+configure_logging()
+logger = get_logger(__name__)
 
 # Initialize FastAPI application
 app = FastAPI()
@@ -14,6 +35,8 @@ app = FastAPI()
 # Directory to store uploaded video files
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Upload bytes held in memory at once per request
+UPLOAD_CHUNK_BYTES = 1024 * 1024
 
 # Serve uploaded videos under /uploads URL path
 app.mount(
@@ -24,9 +47,134 @@ app.mount(
     "/static", StaticFiles(directory="static"), name="static"
 )
 
-# Global state to track the last uploaded video and its processor
-last_video = None
-processor = None
+# Analysis runs as jobs in worker processes; results are appended here
+JOBS_DB = os.environ.get("VAR_JOBS_DB", "jobs.db")
+RESULTS_DIR = "results"
+os.makedirs(RESULTS_DIR, exist_ok=True)
+# Worker processes started with the API (0 = run `python -m core.worker` separately)
+WORKER_PROCESSES = int(os.environ.get("VAR_WORKERS", "1"))
+# Sessions each worker runs at once, and the frame rate each must keep for
+# the worker to take another (unset: only the session count is limited)
+SESSIONS_PER_WORKER = int(os.environ.get("VAR_SESSIONS_PER_WORKER", "1"))
+MIN_SESSION_FPS = float(os.environ.get("VAR_MIN_SESSION_FPS", "0")) or None
+# Delay between checks for new results while a job is still running
+STREAM_POLL_SECONDS = 0.2
+# Frames read from the result files per poll, bounding memory per client
+STREAM_BATCH_FRAMES = 100
+# Frames streams may run ahead of the playback position a client reports
+STREAM_MAX_LEAD_FRAMES = int(os.environ.get("VAR_STREAM_MAX_LEAD_FRAMES", "150"))
+# Annotated video output: JPEG quality and maximum width
+VIDEO_JPEG_QUALITY = 75
+VIDEO_MAX_WIDTH = 1280
+# Longest wait for a rendered frame before checking the client is still there
+VIDEO_GET_TIMEOUT_SECONDS = 0.5
+
+# Transcode uploads to a detector-sized, all-keyframe proxy for analysis
+ANALYSIS_PROXY = os.environ.get("VAR_ANALYSIS_PROXY", "1") != "0"
+
+# Sessions whose event timelines are cached in memory
+MAX_SESSIONS = 16
+
+jobs = JobQueue(JOBS_DB)
+worker_pool = WorkerPool(JOBS_DB, RESULTS_DIR, workers=WORKER_PROCESSES,
+                         threads_per_worker=plan_threads(WORKER_PROCESSES),
+                         sessions_per_worker=SESSIONS_PER_WORKER, min_fps=MIN_SESSION_FPS)
+
+# Cache of sessions by job id (session ids are job ids), least recently used first
+sessions = {}
+sessions_lock = threading.Lock()
+
+@app.on_event("startup")
+def start_workers():
+    jobs.requeue_orphans()
+    worker_pool.start()
+
+@app.on_event("shutdown")
+def stop_workers():
+    # Running jobs go back to the queue and resume on the next start
+    worker_pool.stop()
+
+def get_job(session_id=None):
+    """
+    Look up a job by ID, defaulting to the most recent upload.
+    """
+    job = jobs.get(session_id) if session_id else jobs.latest()
+    if job is None:
+        if session_id is None:
+            raise HTTPException(status_code=400, detail="No video uploaded yet.")
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+    return job
+
+def get_session(session_id=None):
+    """
+    Look up a session by ID, defaulting to the most recent upload.
+    """
+    job = get_job(session_id)
+    with sessions_lock:
+        session = sessions.pop(job["id"], None)
+        if session is None:
+            session = MatchSession(job["id"], job["video_path"], result_prefix(RESULTS_DIR, job["id"]))
+        sessions[job["id"]] = session
+        # Forget the least recently used sessions beyond the cache limit;
+        # streams still reading a session keep it, and with it the playback
+        # positions their clients report
+        idle = [sid for sid, s in sessions.items() if not s.live_streams and sid != job["id"]]
+        for sid in idle[:len(sessions) - MAX_SESSIONS]:
+            del sessions[sid]
+    return session
+
+def job_status(job):
+    """
+    Public view of a job row.
+    """
+    return {
+        "session_id": job["id"],
+        "kind": job["params"].get("kind", ANALYSIS),
+        "video_path": job["video_path"],
+        "status": job["status"],
+        "progress_frame": job["progress_frame"],
+        "total_frames": job["total_frames"],
+        "progress": round(job["progress_frame"] / job["total_frames"], 4) if job["total_frames"] else None,
+        "error": job["error"]
+    }
+
+def parse_last_event_id(last_event_id):
+    """
+    Convert a Last-Event-ID header into the next id to send, or None.
+    """
+    if not last_event_id:
+        return None
+    try:
+        return int(last_event_id) + 1
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID.")
+
+def format_sse(payload):
+    """
+    Encode a processor payload as a Server-Sent Events message.
+    """
+    # Build a minimal event dict for client
+    evt = {
+        "frame_id": payload.get("frame_id"),
+        "tracks": payload.get("tracks"),
+        "event": payload.get("event"),
+        "event_text": payload.get("event_text")
+    }
+    if "cameras" in payload:
+        # Multi-camera sessions also send every angle and the deciding one
+        evt["cameras"] = payload["cameras"]
+        evt["decision_camera"] = payload.get("decision_camera")
+    # SSE: id: <frame_id>\ndata: <json>\n\n (id lets clients resume)
+    return f"id: {evt['frame_id']}\ndata: {json.dumps(evt)}\n\n"
+
+# Sent once the run is complete so clients stop auto-reconnecting
+SSE_END_MESSAGE = "event: end\ndata: {}\n\n"
+
+def format_event_sse(event):
+    """
+    Encode a timeline event as an SSE message whose id is its sequence number.
+    """
+    return f"id: {event['seq']}\ndata: {json.dumps(event)}\n\n"
 
 @app.get("/")
 async def index():
@@ -35,61 +183,235 @@ async def index():
     """
     return FileResponse("static/index.html")
 
+def check_pipeline(pipeline):
+    if pipeline not in PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown pipeline. Choose from: {', '.join(PROFILES)}")
+
+def start_session(save_path, direction, cameras=None, pipeline=DEFAULT_PROFILE, proxy=False):
+    """
+    Queue an analysis job for an uploaded match; it becomes the default
+    session. If `cameras` is given, the job processes every angle together.
+    `pipeline` names the stage set the job runs (see core.pipeline).
+    With `proxy`, the analysis starts on the upload and moves onto a
+    detector-sized proxy once that is transcoded (see queue_proxy).
+    Returns the new session.
+    """
+    check_pipeline(pipeline)
+    params = {"direction": direction, "pipeline": pipeline}
+    if cameras:
+        params["cameras"] = cameras
+    elif proxy:
+        params["proxy"] = proxy_path(save_path)
+    job_id = jobs.submit(save_path, params)
+    if proxy and not cameras and not is_upload_in_progress(save_path):
+        queue_proxy(save_path)
+    return get_session(job_id)
+
+def queue_proxy(save_path):
+    """
+    Queue the transcode of a complete upload into its analysis proxy.
+    """
+    return jobs.submit(save_path, {"kind": PROXY, "proxy": proxy_path(save_path)})
+
+async def save_upload(file):
+    """
+    Save an UploadFile in fixed-size chunks.
+    Returns (unique_name, save_path, sha256).
+    """
+    if not file.content_type.startswith("video/"):
+        raise HTTPException(status_code=400, detail="Uploaded file is not a video.")
+
+    unique_name = f"{uuid.uuid4().hex}_{os.path.basename(file.filename)}"
+    save_path = os.path.join(UPLOAD_DIR, unique_name)
+    writer = ChunkedUploadWriter(save_path)
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            await run_in_threadpool(writer.write, chunk)
+    except Exception:
+        writer.abort()
+        raise
+    sha256 = writer.finish()
+    logger.info("Uploaded and saved: %s (%d bytes)", save_path, writer.bytes_written)
+    return unique_name, save_path, sha256
+
 @app.post("/upload")
 async def upload(
     file: UploadFile = File(...),  # Video file upload field
-    direction: str = Form("right")  # Team 1 attacking direction
+    direction: str = Form("right"),  # Team 1 attacking direction
+    pipeline: str = Form(DEFAULT_PROFILE)  # Stage set: full, tracking or offside
 ):
     """
     Handle video uploads:
       • Validate file is a video
-      • Save with a unique filename
-      • Initialize the LiveProcessor pipeline
+      • Save with a unique filename, copying in fixed-size chunks
+      • Queue an analysis job for the worker processes
     """
-    global last_video, processor
+    # Save with a unique filename, copying in chunks and hashing as we go
+    check_pipeline(pipeline)
+    unique_name, save_path, sha256 = await save_upload(file)
 
-    # Reject non-video content types
-    if not file.content_type.startswith("video/"):
+    session = start_session(save_path, direction, pipeline=pipeline, proxy=ANALYSIS_PROXY)
+
+    # Return filename for client to construct video URL
+    return {"filename": unique_name, "sha256": sha256, "session_id": session.session_id}
+
+@app.post("/upload/multi")
+async def upload_multi(
+    files: List[UploadFile] = File(...),  # One video per camera angle
+    offsets: str = Form(""),  # Comma-separated offsets in seconds vs. the first file
+    direction: str = Form("right"),  # Team 1 attacking direction
+    pipeline: str = Form(DEFAULT_PROFILE)  # Stage set: full, tracking or offside
+):
+    """
+    Handle a multi-camera upload:
+      • Save every angle in fixed-size chunks
+      • Align angles by the given time offsets
+      • Process them together with a shared, batched detector
+    """
+    offset_values = [float(o) for o in offsets.split(",") if o.strip()] if offsets else []
+    if offset_values and len(offset_values) != len(files):
+        raise HTTPException(status_code=400, detail="Provide one offset per file.")
+    check_pipeline(pipeline)
+
+    saved = [await save_upload(f) for f in files]
+    cameras = [
+        {
+            "source": save_path,
+            "offset": offset_values[i] if offset_values else 0.0,
+            "attacking_dir": direction
+        }
+        for i, (_, save_path, _) in enumerate(saved)
+    ]
+    session = start_session(saved[0][1], direction, cameras=cameras, pipeline=pipeline)
+
+    return {
+        "filenames": [name for name, _, _ in saved],
+        "sha256": [digest for _, _, digest in saved],
+        "session_id": session.session_id
+    }
+
+@app.post("/upload/stream")
+async def upload_stream(
+    request: Request,  # Raw video bytes as the request body
+    filename: str,  # Original file name
+    direction: str = "right",  # Team 1 attacking direction
+    pipeline: str = DEFAULT_PROFILE  # Stage set: full, tracking or offside
+):
+    """
+    Handle raw (non-multipart) video uploads streamed in the request body:
+      • Bytes are written to disk as they arrive, hashing as we go
+      • For containers that can be read while growing (fragmented or
+        faststart MP4, Matroska/WebM, MPEG-TS) analysis starts as soon as
+        the header and a first margin of frames have arrived
+      • Other containers start analysis once the upload completes
+    """
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("video/"):
         raise HTTPException(status_code=400, detail="Uploaded file is not a video.")
+    check_pipeline(pipeline)
 
-    # Generate unique filename to avoid collisions
-    unique_name = f"{uuid.uuid4().hex}_{file.filename}"
+    unique_name = f"{uuid.uuid4().hex}_{os.path.basename(filename)}"
     save_path = os.path.join(UPLOAD_DIR, unique_name)
 
-    # Write uploaded file to disk
-    with open(save_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
-    print(f"*** Uploaded and saved: {save_path}")
+    writer = ChunkedUploadWriter(save_path)
+    session = None
+    pending = bytearray()
+    try:
+        async for data in request.stream():
+            # Re-chunk to a fixed size so each disk write is bounded
+            pending += data
+            while len(pending) >= UPLOAD_CHUNK_BYTES:
+                chunk = bytes(pending[:UPLOAD_CHUNK_BYTES])
+                del pending[:UPLOAD_CHUNK_BYTES]
+                await run_in_threadpool(writer.write, chunk)
 
-    # Store path and initialize processing pipeline
-    last_video = save_path
-    processor = LiveProcessor(source=last_video, attacking_dir=direction)
+            if session is None and writer.ready_for_analysis:
+                # Start processing on the part already received
+                session = start_session(save_path, direction, pipeline=pipeline, proxy=ANALYSIS_PROXY)
+                logger.info("Analysis started during upload: %s", save_path)
+        await run_in_threadpool(writer.write, bytes(pending))
+    except Exception:
+        writer.abort()
+        raise
+    sha256 = writer.finish()
+    logger.info("Uploaded and saved: %s (%d bytes)", save_path, writer.bytes_written)
 
-    # Return filename for client to construct video URL
-    return {"filename": unique_name}
+    started_early = session is not None
+    if not started_early:
+        session = start_session(save_path, direction, pipeline=pipeline, proxy=ANALYSIS_PROXY)
+    elif ANALYSIS_PROXY:
+        # A growing file cannot be transcoded; the running job picks the proxy up later
+        queue_proxy(save_path)
+
+    return {
+        "filename": unique_name,
+        "sha256": sha256,
+        "session_id": session.session_id,
+        "analysis_started_early": started_early
+    }
+
+def job_finished(session_id):
+    """
+    True once a job will write no more results.
+    """
+    return jobs.get(session_id)["status"] in TERMINAL_STATES
+
+def poll_results(follower, session_id):
+    """
+    Read newly written frames; also report whether the job has ended.
+    The status is checked first so no frame written before the end is missed.
+    """
+    return job_finished(session_id), follower.poll(STREAM_BATCH_FRAMES)
 
 @app.get("/stream")
-def stream():
+async def stream(
+    from_frame: int = None,  # Resume or scrub to this frame id
+    session_id: str = None,  # Defaults to the most recent upload
+    client_id: str = None,  # Paces the stream to this client's reported playback
+    last_event_id: str = Header(None)  # Sent by EventSource on reconnect
+):
     """
     Stream processed frame data via Server-Sent Events (SSE):
       • Each event contains JSON with frame_id, tracks, and events
+      • Each event id is its frame_id
+      • Frames are read from the job's result files as the worker writes
+        them; closing the stream does not affect processing
+      • Last-Event-ID or ?from_frame=N resumes from that frame; a frame
+        the job has not reached yet is sent once analysis gets there
+      • With ?client_id=, once that client reports its playback position
+        (POST /playback), frames are sent at most STREAM_MAX_LEAD_FRAMES
+        ahead of it
     """
-    if not processor:
-        raise HTTPException(status_code=400, detail="No video uploaded yet.")
-
-    def event_generator():
-        # Iterate over processor yields until video ends
-        for payload in processor:
-            # Build a minimal event dict for client
-            evt = {
-                "frame_id": payload.get("frame_id"),
-                "tracks": payload.get("tracks"),
-                "event": payload.get("event"),
-                "event_text": payload.get("event_text")
-            }
-            # SSE: data: <json>\n\n
-            yield f"data: {json.dumps(evt)}\n\n"
+    session = get_session(session_id)
+
+    # Browsers only send Last-Event-ID on automatic reconnects, which reuse
+    # the original URL, so the header is more recent than ?from_frame
+    resume_frame = parse_last_event_id(last_event_id)
+    if resume_frame is not None:
+        from_frame = resume_frame
+
+    follower = ResultFollower(session.results_prefix, from_frame=from_frame)
+
+    async def event_generator():
+        # Frames read but too far ahead of playback to send yet; the
+        # follower is only polled once these are sent
+        held = deque()
+        finished = False
+        with session.streaming():
+            while True:
+                if not held:
+                    finished, payloads = await run_in_threadpool(poll_results, follower, session.session_id)
+                    held.extend(payloads)
+                limit = session.send_limit(client_id, STREAM_MAX_LEAD_FRAMES)
+                sent = 0
+                while held and (limit is None or held[0]["frame_id"] <= limit):
+                    yield format_sse(held.popleft())
+                    sent += 1
+                if not sent:
+                    if finished and not held:
+                        yield SSE_END_MESSAGE
+                        return
+                    await asyncio.sleep(STREAM_POLL_SECONDS)
 
     # Return streaming response with text/event-stream MIME type
     return StreamingResponse(
@@ -97,15 +419,234 @@ def stream():
         media_type="text/event-stream"
     )
 
+# MJPEG part header; each part is one annotated JPEG frame
+MJPEG_BOUNDARY = "frame"
+
+@app.get("/video")
+async def annotated_video(
+    request: Request,
+    session_id: str = None,  # Defaults to the most recent upload
+    from_frame: int = 1  # Frame to start playback from
+):
+    """
+    Stream the match with tracks, teams, possession and event banners drawn
+    on the server, as MJPEG (multipart/x-mixed-replace) at the video's
+    frame rate. Clients display it directly and never seek.
+    """
+    session = get_session(session_id)
+    renderer = AnnotatedRenderer(
+        session.video_path,
+        session.results_prefix,
+        is_finished=lambda: job_finished(session.session_id),
+        from_frame=from_frame,
+        jpeg_quality=VIDEO_JPEG_QUALITY,
+        max_width=VIDEO_MAX_WIDTH
+    )
+    renderer.start()
+
+    async def parts():
+        try:
+            with session.streaming():
+                while not renderer.stopped:
+                    try:
+                        # Bounded wait, so a closed tab frees this threadpool thread
+                        item = await run_in_threadpool(renderer.get, VIDEO_GET_TIMEOUT_SECONDS)
+                    except queue.Empty:
+                        if await request.is_disconnected():
+                            return
+                        continue
+                    if item is None:
+                        return
+                    frame_id, jpeg = item
+                    yield (
+                        f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                        f"Content-Length: {len(jpeg)}\r\nX-Frame-Id: {frame_id}\r\n\r\n"
+                    ).encode() + jpeg + b"\r\n"
+        finally:
+            renderer.stop()
+
+    return StreamingResponse(
+        parts(),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}"
+    )
+
+@app.get("/events")
+def list_events(
+    session_id: str = None,  # Defaults to the most recent upload
+    start: float = None,  # Earliest timestamp in seconds
+    end: float = None,  # Latest timestamp in seconds
+    types: List[str] = Query(None, alias="type"),  # Event types, e.g. ?type=Offside
+    limit: int = None  # Maximum number of events returned
+):
+    """
+    List a session's detected events in time order, filtered by time
+    range and type, so clients can jump straight to decisions.
+    """
+    session = get_session(session_id)
+    session.refresh_events()
+    events = session.events.query(start=start, end=end, types=types, limit=limit)
+    return {
+        "session_id": session.session_id,
+        "types": session.events.types,
+        "events": events
+    }
+
+@app.get("/events/stream")
+async def stream_events(
+    session_id: str = None,  # Defaults to the most recent upload
+    client_id: str = None,  # Paces events to this client's reported playback
+    last_event_id: str = Header(None)  # Sent by EventSource on reconnect
+):
+    """
+    Stream only detected events via SSE (no per-frame payloads).
+    Each message id is the event's sequence number; on reconnect the
+    events missed since Last-Event-ID are sent first. Like /stream, events
+    are held back to STREAM_MAX_LEAD_FRAMES past the playback position
+    reported by `client_id`.
+    """
+    session = get_session(session_id)
+    next_seq = parse_last_event_id(last_event_id) or 0
+
+    def poll_events():
+        finished = job_finished(session.session_id)
+        session.refresh_events()
+        return finished, session.events.since(next_seq - 1)
+
+    async def event_generator():
+        nonlocal next_seq
+        with session.streaming():
+            while True:
+                finished, events = await run_in_threadpool(poll_events)
+                limit = session.send_limit(client_id, STREAM_MAX_LEAD_FRAMES)
+                sent = 0
+                for event in events:
+                    if limit is not None and event["frame_id"] > limit:
+                        # Events arrive in frame order: the rest wait too
+                        break
+                    yield format_event_sse(event)
+                    next_seq = event["seq"] + 1
+                    sent += 1
+                if not sent:
+                    if finished and not events:
+                        yield SSE_END_MESSAGE
+                        return
+                    await asyncio.sleep(STREAM_POLL_SECONDS)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream"
+    )
+
+@app.post("/playback")
+def report_playback(
+    client_id: str,  # Chosen by the client; also passed to its streams
+    frame_id: int = Query(..., ge=1),  # Frame on the client's screen
+    session_id: str = None  # Defaults to the most recent upload
+):
+    """
+    Record the frame a client is showing. That client's streams stay
+    within STREAM_MAX_LEAD_FRAMES of it, independently of other viewers;
+    clients send this every second or so while playing.
+    """
+    session = get_session(session_id)
+    frame_id = session.report_playback(client_id, frame_id)
+    return {"session_id": session.session_id, "client_id": client_id, "frame_id": frame_id}
+
 @app.post("/halftime")
-def halftime():
+def halftime(session_id: str = None):
     """
     Toggle halftime mode, flipping attacking directions.
-    Used by client to pause/resume detection at half-time.
+    Used by client to pause/resume detection at half-time. During
+    halftime frames are only grabbed, not retrieved: the video is still
+    decoded, but not converted, copied or analysed (an analysis proxy
+    skips decoding entirely).
     """
-    if processor:
-        processor.toggle_halftime()
-        return {"message": "Halftime toggled, directions switched."}
+    job = get_job(session_id)
+    # Only an analysis that will still read its commands can switch sides
+    if job["params"].get("kind", ANALYSIS) != ANALYSIS or job["status"] not in (QUEUED, RUNNING, SUSPENDED):
+        raise HTTPException(status_code=409, detail="Session is not being analysed.")
+    jobs.send_command(job["id"], "halftime")
+    return {"message": "Halftime toggled, directions switched."}
 
-    # No active processing session
-    raise HTTPException(status_code=400, detail="No active video session.")
+@app.get("/jobs")
+def list_jobs(status: str = None, limit: int = 50):
+    """
+    List analysis jobs, most recent first.
+    """
+    return {"jobs": [job_status(job) for job in jobs.list(status=status, limit=limit)]}
+
+@app.get("/jobs/{session_id}")
+def get_job_status(session_id: str):
+    """
+    Status and progress of one analysis job.
+    """
+    return job_status(get_job(session_id))
+
+@app.post("/jobs/{session_id}/cancel")
+def cancel_job(session_id: str):
+    """
+    Cancel a queued job, or ask the worker running it to stop.
+    Results written so far are kept.
+    """
+    job = get_job(session_id)
+    status = jobs.cancel(job["id"])
+    return {"session_id": job["id"], "status": status}
+
+@app.post("/jobs/{session_id}/suspend")
+def suspend_job(session_id: str):
+    """
+    Pause a job: its worker checkpoints the state and is freed for other
+    sessions until the job is resumed.
+    """
+    job = get_job(session_id)
+    status = jobs.suspend(job["id"])
+    return {"session_id": job["id"], "status": status}
+
+@app.post("/jobs/{session_id}/resume")
+def resume_job(session_id: str):
+    """
+    Queue a suspended job again; it continues from its checkpoint.
+    """
+    job = get_job(session_id)
+    status = jobs.resume(job["id"])
+    return {"session_id": job["id"], "status": status}
+
+@app.post("/admin/sessions/{session_id}/profile")
+def start_profile(
+    session_id: str,
+    frames: int = Query(100, ge=1, le=10000),  # Number of frames to profile
+    mode: str = "cprofile"  # cprofile, sample or tracemalloc
+):
+    """
+    Profile the next `frames` frames of a running session's pipeline:
+      • cprofile: pstats file (e.g. for snakeviz)
+      • sample: collapsed stacks for flamegraph tools
+      • tracemalloc: allocation growth between snapshots
+    Returns an id; fetch the result from the matching GET endpoint.
+    """
+    if mode not in PROFILE_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown mode: {mode}")
+    job = get_job(session_id)
+    if job["status"] != RUNNING:
+        raise HTTPException(status_code=409, detail="Session is not being processed.")
+    profile_id = uuid.uuid4().hex[:8]
+    jobs.send_command(job["id"], "profile", profile_id=profile_id, frames=frames, mode=mode)
+    return {
+        "profile_id": profile_id,
+        "url": f"/admin/sessions/{job['id']}/profile/{profile_id}?mode={mode}"
+    }
+
+@app.get("/admin/sessions/{session_id}/profile/{profile_id}")
+def get_profile(session_id: str, profile_id: str, mode: str = "cprofile"):
+    """
+    Download a finished profile; 202 while it is still being captured.
+    """
+    if mode not in PROFILE_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown mode: {mode}")
+    job = get_job(session_id)
+    path = profile_output_path(RESULTS_DIR, job["id"], os.path.basename(profile_id), mode)
+    if not os.path.exists(path):
+        if job["status"] in TERMINAL_STATES:
+            raise HTTPException(status_code=404, detail="Profile not found.")
+        return JSONResponse(status_code=202, content={"status": "pending"})
+    return FileResponse(path, filename=os.path.basename(path))
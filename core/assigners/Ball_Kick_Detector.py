@@ -1,47 +1,137 @@
-import numpy as np  # Numerical operations for distance calculation
+import numpy as np  # Trajectory ring and vector maths
+from utils.logging_utils import get_logger  # pipeline logging
+
+logger = get_logger(__name__)
 
 class BallKickDetector:
     """
-    Detects when the ball is kicked by monitoring exit from player bounding box.
-    It triggers once the ball leaves the proximity of a player after contact.
+    Detects kicks from the ball's recent trajectory.
+
+    Ball centres are kept in a fixed NumPy ring. Each new position is
+    compared with the velocity the ball had before the previous one: a
+    sudden change of speed or direction, with the ball leaving fast enough,
+    bends the trajectory at the previous position. If that bend lies within
+    `contact_distance` of a player's box, it is a kick, reported on the
+    next frame, with the bend's frame as the contact frame and the nearest
+    player as the kicker.
+
+    Distances and speeds are in full-resolution pixels; `pixel_scale`
+    (frame width / full width) converts them for smaller frames.
     """
-    def __init__(self, distance_threshold=5.0):
-        # Maximum pixel distance between ball and player box edges to consider "touching"
-        self.distance_threshold = float(distance_threshold)
-        # Flag indicating we are waiting for the ball to exit player bbox after touching
-        self.awaiting_exit = False
+    def __init__(self, history=16, contact_distance=12.0, min_speed=4.0, min_change=3.0,
+                 change_ratio=0.6, in_window=3, max_gap=3, refractory_frames=5, pixel_scale=1.0):
+        # Fixed-size ring of (frame, x, y) samples
+        self.frames = np.zeros(int(history), dtype=np.int64)
+        self.positions = np.zeros((int(history), 2), dtype=np.float64)
+        # Maximum pixel distance between the ball and a player box edge at contact
+        self.contact_distance = float(contact_distance) * pixel_scale
+        # Outgoing speed (px/frame) a kick must reach
+        self.min_speed = float(min_speed) * pixel_scale
+        # Velocity change needed: at least min_change px/frame and
+        # change_ratio of the incoming speed
+        self.min_change = float(min_change) * pixel_scale
+        self.change_ratio = float(change_ratio)
+        # Samples used for the incoming velocity
+        self.in_window = max(1, int(in_window))
+        # Larger frame gaps (ball lost) start a new trajectory
+        self.max_gap = int(max_gap)
+        # No second kick this soon after one
+        self.refractory_frames = int(refractory_frames)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.last_kick_frame = None
+        # Frame of the contact and id of the kicker for the last kick
+        self.contact_frame = None
+        self.kicker_id = None
 
-    def update(self, ball, player, current_frame):
+    def _sample(self, age):
+        # age 0 is the newest sample
+        i = (self.count - 1 - age) % len(self.frames)
+        return self.frames[i], self.positions[i]
+
+    def update(self, ball, players, current_frame):
         """
-        Determine if a kick event occurred based on ball and player bounding boxes.
-        Returns True if the ball was inside the player's box and then moved out.
+        Add the ball position for `current_frame` and return True if the
+        trajectory shows a kick at the previous frame; `contact_frame` and
+        `kicker_id` then describe it.
+
+        A ball the tracker just re-acquired carries `reacquired_path`, the
+        measured centres for the frames it coasted through; those replace the
+        predicted positions and are searched for the kick as well, so a kick
+        that threw the tracker off is reported late instead of never.
         """
-        # Validate inputs
-        if not isinstance(ball, dict) or not isinstance(player, dict):
-            return False
-        if 'bbox' not in ball or 'bbox' not in player:
+        if not isinstance(ball, dict) or 'bbox' not in ball:
             return False
+        bx1, by1, bx2, by2 = ball['bbox']
+        half_w, half_h = (bx2 - bx1) / 2, (by2 - by1) / 2
 
-        # Unpack bounding box coordinates
-        px1, py1, px2, py2 = player['bbox']  # player box
-        bx1, by1, bx2, by2 = ball['bbox']    # ball box
+        path = ball.get('reacquired_path') or []
+        first = current_frame - len(path)
+        while self.count and self._sample(0)[0] >= first:
+            # Drop the coasted positions
+            self.count -= 1
 
-        # Compute horizontal and vertical edge-to-edge distances
-        horizontal_dist = max(0, max(px1 - bx2, bx1 - px2))
-        vertical_dist   = max(0, max(py1 - by2, by1 - py2))
-        # Euclidean distance between nearest edges
-        dist = np.hypot(horizontal_dist, vertical_dist)
+        samples = [(first + i, centre) for i, centre in enumerate(path)]
+        samples.append((current_frame, ((bx1 + bx2) / 2, (by1 + by2) / 2)))
+        kicked = False
+        for frame_id, centre in samples:
+            self._add(frame_id, centre)
+            kicked = self._check(players, half_w, half_h) or kicked
+        return kicked
+
+    def _add(self, frame_id, centre):
+        if self.count and frame_id - self._sample(0)[0] > self.max_gap:
+            # Ball lost for a while: the old trajectory says nothing
+            self.count = 0
+        i = self.count % len(self.frames)
+        self.frames[i] = frame_id
+        self.positions[i] = centre
+        self.count += 1
+
+    def _check(self, players, half_w, half_h):
+        # Newest sample, the candidate contact, and at least one before it
+        available = min(self.count, len(self.frames))
+        if available < 3:
+            return False
+        f_now, p_now = self._sample(0)
+        f_contact, p_contact = self._sample(1)
+        f_before, p_before = self._sample(min(self.in_window, available - 2) + 1)
+        if f_now <= f_contact or f_contact <= f_before:
+            return False
+        if self.last_kick_frame is not None and f_contact - self.last_kick_frame < self.refractory_frames:
+            return False
+
+        v_out = (p_now - p_contact) / (f_now - f_contact)
+        v_in = (p_contact - p_before) / (f_contact - f_before)
+        speed_out = float(np.hypot(*v_out))
+        change = float(np.hypot(*(v_out - v_in)))
+        if speed_out < self.min_speed or change < max(self.min_change, self.change_ratio * float(np.hypot(*v_in))):
+            return False
 
-        # If ball is within threshold (i.e. "touching" the player), arm exit trigger
-        if dist <= self.distance_threshold:
-            self.awaiting_exit = True
+        kicker, dist = self._nearest_player(players, p_contact, half_w, half_h)
+        if kicker is None or dist > self.contact_distance:
             return False
 
-        # If previously touching and now outside threshold → kick detected
-        if self.awaiting_exit and dist > self.distance_threshold:
-            self.awaiting_exit = False
-            print(f"[KICK DETECTED] Frame {current_frame} – Ball exited player {player.get('id')} bbox")
-            return True
+        self.last_kick_frame = int(f_contact)
+        self.contact_frame = int(f_contact)
+        self.kicker_id = int(kicker['id']) if kicker.get('id') is not None else None
+        logger.debug("[KICK DETECTED] Contact at frame %s by player %s (%.1f px/frame out)",
+                     self.contact_frame, self.kicker_id, speed_out)
+        return True
 
-        # No kick detected
-        return False
+    def _nearest_player(self, players, centre, half_w, half_h):
+        # Edge-to-edge distance between the ball box at `centre` and each player box
+        best, best_dist = None, float('inf')
+        cx, cy = centre
+        for player in players or []:
+            if not isinstance(player, dict) or player.get('cls') not in ('1', '2') or 'bbox' not in player:
+                continue
+            px1, py1, px2, py2 = player['bbox']
+            horizontal_dist = max(0.0, px1 - (cx + half_w), (cx - half_w) - px2)
+            vertical_dist = max(0.0, py1 - (cy + half_h), (cy - half_h) - py2)
+            dist = float(np.hypot(horizontal_dist, vertical_dist))
+            if dist < best_dist:
+                best, best_dist = player, dist
+        return best, best_dist
@@ -9,9 +9,10 @@ class PlayerBallAssigner:
     Assigns the ball to the nearest player based on bounding box proximity.
     Uses the bottom corners of each player's box to approximate kicking contact.
     """
-    def __init__(self):
-        # Maximum allowed distance (in pixels) between ball and player for assignment
-        self.max_player_ball_distance = 70.0
+    def __init__(self, pixel_scale=1.0):
+        # Maximum allowed distance (in pixels) between ball and player for
+        # assignment, for full-resolution frames scaled by `pixel_scale`
+        self.max_player_ball_distance = 70.0 * float(pixel_scale)
 
     def assign_ball_to_player(self, players, ball_bbox):
         """
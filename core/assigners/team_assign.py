@@ -1,42 +1,86 @@
 import numpy as np  # array operations
 import cv2  # OpenCV for image processing
-from sklearn.cluster import KMeans  # clustering for team shirt colours
+from .team_colour_model import OnlineTeamModel  # incremental two-team colour model
+from utils.logging_utils import get_logger  # pipeline logging
+
+logger = get_logger(__name__)
 
 class TeamAssigner:
     """
-    Assigns each detected person track to a team based on shirt colour clustering.
+    Assigns each detected person track to a team based on shirt colour.
+    Keeps a per-track colour EMA with a confidence score and an online
+    two-team model:
+      • New, low-confidence or changed tracks are (re)classified every frame
+      • Confident tracks are re-sampled on a staggered schedule, so only a
+        small, steady fraction of tracks is touched per frame
+      • Team centroids are updated incrementally from confident samples
+      • Drift re-seeds the model from the track colour estimates
     Handles ball and referee with fixed colours.
     """
-    def __init__(self):
-        # Stored RGB centre colours for each team after initialization
-        self.team_colors = None
+    def __init__(self, colour_ema=0.3, min_confidence=0.15, refresh_every=10):
+        # Online colour model holding the two team centroids
+        self.model = OnlineTeamModel()
         # Mapping from track ID to assigned team ID
         self.id_to_team = {}
-        # Flag indicating if team colours have been initialized
-        self.initialised = False
+        # Track ID -> smoothed shirt colour and its classification confidence
+        self.track_colour = {}
+        self.track_confidence = {}
+        # Weight of a new sample in the per-track colour EMA
+        self.colour_ema = float(colour_ema)
+        # Tracks below this confidence are re-sampled every frame
+        self.min_confidence = float(min_confidence)
+        # Confident tracks are re-sampled once every `refresh_every` frames
+        self.refresh_every = max(1, int(refresh_every))
         # Colours for referee and ball overlays
         self.ref_color = (0, 255, 255)  # yellow for referees
         self.ball_color = (0, 255, 0)    # green for ball
-        # Frame counter to periodically re-evaluate assignments
+        # Frame counter used to stagger re-sampling
         self.frame_counter = 0
+        # Callable bbox -> shirt colour used when there are no pixels
+        # (runs replayed from recorded detections)
+        self.colour_lookup = None
+
+    @property
+    def initialised(self):
+        return self.model.seeded
+
+    @property
+    def team_colors(self):
+        # Team ID -> RGB centre colour, or None before seeding
+        return self.model.centroids
 
     def reset(self):
         """
         Force a re-initialization of team colours and assignments.
         Call this if tracking drifts or teams swap jerseys.
         """
-        print("[RESET] Forcing team reset")
-        self.team_colors = None
+        logger.info("[RESET] Forcing team reset")
+        self.model = OnlineTeamModel()
         self.id_to_team.clear()
-        self.initialised = False
+        self.track_colour.clear()
+        self.track_confidence.clear()
         self.frame_counter = 0
 
+    def on_track_event(self, tid, reason):
+        """
+        TrackStore listener: forget a track that was evicted or whose class
+        changed, so its team is dropped or re-evaluated.
+        """
+        self._forget(tid)
+
+    def _forget(self, tid):
+        self.id_to_team.pop(tid, None)
+        self.track_colour.pop(tid, None)
+        self.track_confidence.pop(tid, None)
+
     def extract_shirt_colour(self, frame, bbox):
         """
         Sample the top half of a player's bounding box, resize to a small patch,
         and average the pixel RGB values to estimate shirt colour.
         Returns a NumPy array [R, G, B], or [0,0,0] on failure.
         """
+        if frame is None:
+            return self.colour_lookup(bbox) if self.colour_lookup else np.zeros(3, dtype=float)
         h_frame, w_frame = frame.shape[:2]
         # Convert bbox to integer and clamp to frame boundaries
         x1, y1, x2, y2 = [int(max(0, min(val, lim)))
@@ -54,12 +98,12 @@ class TeamAssigner:
             patch = cv2.resize(shirt_region, (10, 10)).reshape(-1, 3)
             return np.mean(patch, axis=0)
         except Exception as e:
-            print(f"Shirt colour extraction failed: {e}")
+            logger.debug("Shirt colour extraction failed: %s", e)
             return np.zeros(3, dtype=float)
 
     def initialise_teams(self, frame, tracks):
         """
-        Cluster player shirt colours into two groups via KMeans.
+        Seed the two team colours from player shirt samples in one frame.
         Must be called when at least two valid shirt samples exist.
         Returns True on success, False otherwise.
         """
@@ -69,39 +113,76 @@ class TeamAssigner:
             if t.get('cls') in ['1', '2']:  # classes for keeper and player
                 colour = self.extract_shirt_colour(frame, t.get('bbox', []))
                 samples.append(colour)
+                # Reuse the sample as the track's first colour estimate
+                if t.get('id') is not None:
+                    self.track_colour[t['id']] = colour
 
         # Require at least two samples to cluster
         if len(samples) < 2:
-            print("⚠ Not enough shirts to initialize teams.")
+            logger.debug("Not enough shirts to initialize teams.")
             return False
 
-        # Perform 2-means clustering
-        try:
-            kmeans = KMeans(n_clusters=2, random_state=42)
-            kmeans.fit(samples)
-            centres = kmeans.cluster_centers_
-            # Assign each cluster centre to a team ID (1 and 2)
-            self.team_colors = {1: centres[0], 2: centres[1]}
-            self.initialised = True
-            print(f"[INIT] Team colours set: T1={centres[0]}, T2={centres[1]}")
-            return True
-        except Exception as e:
-            print(f"Team initialization error: {e}")
+        if not self.model.seed(samples):
+            logger.debug("Team initialization error: shirt colours could not be separated")
             return False
+        logger.info("[INIT] Team colours set: T1=%s, T2=%s", self.team_colors[1], self.team_colors[2])
+        return True
+
+    def _needs_sample(self, tid):
+        # New or changed tracks and uncertain ones are sampled every frame;
+        # confident ones on a schedule staggered by track ID
+        if tid not in self.id_to_team:
+            return True
+        if self.track_confidence.get(tid, 0.0) < self.min_confidence:
+            return True
+        return (tid + self.frame_counter) % self.refresh_every == 0
+
+    def _classify_track(self, frame, t):
+        tid = t.get('id')
+        shirt = self.extract_shirt_colour(frame, t.get('bbox', []))
+        if not shirt.any():
+            # Extraction failed; keep the previous estimate
+            return
+
+        # Smooth the track's colour and classify the smoothed value
+        previous = self.track_colour.get(tid)
+        colour = shirt if previous is None else previous + self.colour_ema * (shirt - previous)
+        self.track_colour[tid] = colour
+        self.model.observe(shirt)
+        team, confidence = self.model.classify(colour)
+
+        if self.id_to_team.get(tid) != team:
+            logger.debug("[ASSIGN] Track %s → Team %s", tid, team)
+        self.id_to_team[tid] = team
+        self.track_confidence[tid] = confidence
+        if confidence >= self.min_confidence:
+            # Only confident samples refine the team centroid
+            self.model.learn(team, shirt)
+
+    def _reseed(self):
+        # Re-fit the centroids from current per-track colours (no pixel work)
+        colours = list(self.track_colour.values())
+        if not self.model.seed(colours):
+            return
+        logger.info("[RESEED] Team colour drift detected, re-seeded: T1=%s, T2=%s", self.team_colors[1], self.team_colors[2])
+        for tid, colour in self.track_colour.items():
+            team, confidence = self.model.classify(colour)
+            self.id_to_team[tid] = team
+            self.track_confidence[tid] = confidence
 
     def assign(self, frame, full_tracks):
         """
         Assign team IDs and overlay colours to each track:
         - Ball cls '0' gets green
         - Referee cls '3' gets yellow
-        - Players cls '1' or '2' are assigned based on nearest shirt cluster
+        - Players cls '1' or '2' are assigned based on nearest shirt centroid
         Returns the same list with 'team' and 'color' keys added.
         """
         self.frame_counter += 1
         # Filter out only player/keeper tracks for potential clustering
         candidates = [t for t in full_tracks if t.get('cls') in ['1', '2']]
 
-        # Initialize team clusters on first call
+        # Seed team colours on first call
         if not self.initialised:
             success = self.initialise_teams(frame, candidates)
             if not success:
@@ -125,24 +206,13 @@ class TeamAssigner:
                 t['team'] = None
                 t['color'] = self.ref_color
                 # Remove any previous assignment for this ID
-                self.id_to_team.pop(tid, None)
+                self._forget(tid)
                 continue
 
             # Players and keepers
             if cls in ['1', '2']:
-                reassign = (tid not in self.id_to_team) or (self.frame_counter % 10 == 0)
-                # Optionally force reassign on flag
-                if reassign:
-                    shirt = self.extract_shirt_colour(frame, t.get('bbox', []))
-                    # Compute distances to each team centre
-                    dists = {
-                        team: np.linalg.norm(shirt - centre)
-                        for team, centre in self.team_colors.items()
-                    }
-                    # Assign to the nearest cluster
-                    assigned = min(dists, key=dists.get)
-                    self.id_to_team[tid] = assigned
-                    print(f"[ASSIGN] Track {tid} → Team {assigned}")
+                if self._needs_sample(tid):
+                    self._classify_track(frame, t)
                 # Set output team and color from the mapping
                 team_id = self.id_to_team.get(tid)
                 t['team'] = team_id
@@ -154,4 +224,8 @@ class TeamAssigner:
             t['team'] = None
             t['color'] = (128, 128, 128)
 
+        # Cheap drift check: re-seed from track colours if samples drift away
+        if self.model.drifted:
+            self._reseed()
+
         return full_tracks
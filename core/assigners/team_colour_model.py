@@ -0,0 +1,144 @@
+import numpy as np  # vector maths on colour samples
+
+class OnlineTeamModel:
+    """
+    Two-team shirt colour model that is updated incrementally.
+      • seed() runs a tiny 2-means over a handful of colours
+      • classify() returns the nearest team and a confidence margin
+      • observe() classifies a new sample and tracks the running residual
+      • learn() nudges a team centroid towards a confident sample
+      • The running residual detects drift (lighting change, wrong seed) so
+        the caller can re-seed from its per-track colour estimates; after a
+        failed re-seed, drift is not reported again for a while, backing off
+        exponentially while re-seeds keep failing
+    Team IDs are 1 and 2 and are kept stable across re-seeds.
+    """
+    def __init__(self, learning_rate=0.02, drift_ratio=2.0, residual_rate=0.05, warmup=50,
+                 retry_samples=50, max_retry_samples=3200):
+        # Team ID -> RGB centroid
+        self.centroids = None
+        # Step size for incremental centroid updates
+        self.learning_rate = float(learning_rate)
+        # Residual growth (vs. the post-seed baseline) that counts as drift
+        self.drift_ratio = float(drift_ratio)
+        # Smoothing of the running residual
+        self.residual_rate = float(residual_rate)
+        # Samples used to establish the baseline residual after a seed
+        self.warmup = int(warmup)
+
+        self.baseline_residual = None
+        self.residual = None
+        self._warmup_sum = 0.0
+        self._warmup_count = 0
+
+        # Samples to wait after a failed re-seed, doubling per failure
+        self.retry_samples = int(retry_samples)
+        self.max_retry_samples = int(max_retry_samples)
+        self._retry_wait = self.retry_samples
+        # Samples left before drift is reported again
+        self._hold = 0
+
+    @property
+    def seeded(self):
+        return self.centroids is not None
+
+    def seed(self, samples, iterations=10):
+        """
+        Fit two centroids to `samples` with a small 2-means.
+        Existing team labels are preserved by matching new centroids to old.
+        Returns True on success, False if the samples cannot be split.
+        """
+        samples = np.asarray(samples, dtype=float).reshape(-1, 3)
+        if len(samples) < 2:
+            return self._seed_failed()
+
+        # Farthest-point initialisation is deterministic and cheap
+        first = samples[np.argmax(np.linalg.norm(samples - samples.mean(axis=0), axis=1))]
+        second = samples[np.argmax(np.linalg.norm(samples - first, axis=1))]
+        if np.allclose(first, second):
+            return self._seed_failed()
+        centres = np.stack([first, second])
+
+        for _ in range(iterations):
+            dists = np.linalg.norm(samples[:, None, :] - centres[None, :, :], axis=2)
+            labels = np.argmin(dists, axis=1)
+            updated = centres.copy()
+            for k in range(2):
+                members = samples[labels == k]
+                if len(members):
+                    updated[k] = members.mean(axis=0)
+            if np.allclose(updated, centres):
+                break
+            centres = updated
+
+        if self.centroids is not None:
+            # Keep team 1 as the centre closest to the old team 1
+            old1, old2 = self.centroids[1], self.centroids[2]
+            keep = (np.linalg.norm(centres[0] - old1) + np.linalg.norm(centres[1] - old2)
+                    <= np.linalg.norm(centres[1] - old1) + np.linalg.norm(centres[0] - old2))
+            if not keep:
+                centres = centres[::-1]
+
+        self.centroids = {1: centres[0], 2: centres[1]}
+        # Restart drift tracking from the new fit
+        self.baseline_residual = None
+        self.residual = None
+        self._warmup_sum = 0.0
+        self._warmup_count = 0
+        self._retry_wait = self.retry_samples
+        self._hold = 0
+        return True
+
+    def _seed_failed(self):
+        # Keep the current fit and hold off the next drift report
+        self._hold = self._retry_wait
+        self._retry_wait = min(2 * self._retry_wait, self.max_retry_samples)
+        return False
+
+    def classify(self, colour):
+        """
+        Return (team_id, confidence) for a colour.
+        Confidence is the normalised margin between the two centroid
+        distances: 0 means equidistant, 1 means on a centroid.
+        """
+        d1 = float(np.linalg.norm(colour - self.centroids[1]))
+        d2 = float(np.linalg.norm(colour - self.centroids[2]))
+        team = 1 if d1 <= d2 else 2
+        confidence = abs(d2 - d1) / (d1 + d2 + 1e-6)
+        return team, confidence
+
+    def observe(self, colour):
+        """
+        Classify a fresh sample and fold its distance to the chosen centroid
+        into the drift residual. Returns (team_id, confidence).
+        """
+        team, confidence = self.classify(colour)
+        residual = float(np.linalg.norm(colour - self.centroids[team]))
+        if self._hold:
+            self._hold -= 1
+
+        if self.baseline_residual is None:
+            self._warmup_sum += residual
+            self._warmup_count += 1
+            if self._warmup_count >= self.warmup:
+                self.baseline_residual = max(self._warmup_sum / self._warmup_count, 1.0)
+                self.residual = self.baseline_residual
+        else:
+            self.residual += self.residual_rate * (residual - self.residual)
+        return team, confidence
+
+    def learn(self, team, colour):
+        """
+        Move `team`'s centroid a small step towards a confident sample.
+        """
+        centre = self.centroids[team]
+        self.centroids[team] = centre + self.learning_rate * (colour - centre)
+
+    @property
+    def drifted(self):
+        """
+        True when samples sit much further from their centroids than just
+        after seeding, unless a re-seed failed recently.
+        """
+        return (self.baseline_residual is not None and not self._hold
+                and self.residual > self.drift_ratio * self.baseline_residual)
@@ -0,0 +1,254 @@
+"""
+Headless batch processing of recorded matches.
+
+    python -m core.batch matches/ extra.mp4 -o results --workers 2 --threads-per-worker 4
+
+Each video is processed with LiveProcessor and written to compact result
+files (see core.results). Re-running the same command resumes partially
+processed videos and skips finished ones.
+"""
+import argparse  # command-line interface
+import json  # run summaries
+import os  # paths
+import queue  # progress messages from workers
+import sys  # progress output
+import time  # throughput
+import multiprocessing as mp  # worker pool
+from concurrent.futures import ProcessPoolExecutor
+
+from .results import ResultWriter, recover, SUMMARY_SUFFIX
+from .scheduler import apply_thread_budget, plan_threads
+from .pipeline import PROFILES, DEFAULT_PROFILE
+from utils.logging_utils import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+# Detection log written next to the results by --record-detections
+DETECTIONS_SUFFIX = ".dets.bin"
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".ts")
+
+# Send a progress update every this many frames
+PROGRESS_EVERY = 50
+
+
+def collect_videos(paths):
+    """
+    Expand files and directories into a sorted list of video paths.
+    """
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    videos.append(os.path.join(path, name))
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            logger.warning("Skipping missing input: %s", path)
+    return videos
+
+
+def result_prefix(output_dir, video_path):
+    name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(output_dir, name)
+
+
+# Progress queue shared with the parent; set by _init_worker
+_progress = None
+
+
+def _init_worker(threads, progress, log_level):
+    """
+    Pool initializer: apply the CPU budget before torch/cv2 do any work,
+    so each worker stays within it.
+    """
+    apply_thread_budget(threads)
+    configure_logging(level=log_level)
+    global _progress
+    _progress = progress
+
+
+def process_video(video_path, output_dir, direction="right", detect_every=1, resume=True,
+                  record_detections=False, replay_detections=False, pipeline=DEFAULT_PROFILE):
+    """
+    Process one video into <output_dir>/<name>.* result files.
+    With `record_detections` the detector output is also logged to
+    <name>.dets.bin; with `replay_detections` that log is used instead of
+    the video and the model.
+    Returns the run summary dict.
+    """
+    # Imported here so the parent process never loads the model stack
+    import cv2
+    from .stream import LiveProcessor
+
+    prefix = result_prefix(output_dir, video_path)
+    summary_path = prefix + SUMMARY_SUFFIX
+    if resume and os.path.exists(summary_path):
+        with open(summary_path) as f:
+            summary = json.load(f)
+        summary["skipped"] = True
+        return summary
+
+    if record_detections:
+        # The detection log must cover the whole video: no partial resume
+        resume = False
+    start_frame = recover(prefix) if resume else 0
+    if not resume:
+        for path in (prefix + ".tracks.bin", prefix + ".events.jsonl"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    processor = LiveProcessor(
+        source=video_path,
+        detect_every=detect_every,
+        attacking_dir=direction,
+        record_detections=prefix + DETECTIONS_SUFFIX if record_detections else None,
+        replay_detections=prefix + DETECTIONS_SUFFIX if replay_detections else None,
+        profile=pipeline
+    )
+    total = int(processor.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if start_frame:
+        logger.info("Resuming %s after frame %d", video_path, start_frame)
+        processor.seek(start_frame + 1)
+
+    writer = ResultWriter(prefix)
+    processor.event_store.add_listener(writer.write_event)
+    started = time.monotonic()
+    frames = 0
+    last_frame = start_frame
+    try:
+        for payload in processor:
+            writer.write_frame(payload["frame_id"], payload.get("tracks", []))
+            last_frame = payload["frame_id"]
+            frames += 1
+            if _progress is not None and frames % PROGRESS_EVERY == 0:
+                _progress.put((video_path, last_frame, total, frames, time.monotonic() - started))
+    finally:
+        writer.close()
+        processor.cap.release()
+
+    elapsed = time.monotonic() - started
+    summary = {
+        "video": video_path,
+        "frames": last_frame,
+        "processed_this_run": frames,
+        "resumed_from": start_frame,
+        "events": len(processor.event_store),
+        "elapsed_seconds": round(elapsed, 2),
+        "fps": round(frames / elapsed, 2) if elapsed > 0 else 0.0
+    }
+    # Written last: its presence marks the video as finished
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2)
+    if _progress is not None:
+        _progress.put((video_path, last_frame, total, frames, elapsed))
+    return summary
+
+
+def _print_progress(state, out=sys.stderr):
+    # One status line per video in flight: name frame/total (pct) fps
+    parts = []
+    for video, (frame, total, frames, elapsed) in state.items():
+        pct = f" {100.0 * frame / total:5.1f}%" if total else ""
+        rate = frames / elapsed if elapsed > 0 else 0.0
+        parts.append(f"{os.path.basename(video)} {frame}/{total or '?'}{pct} {rate:.1f} fps")
+    out.write("\r" + " | ".join(parts) + "\033[K")
+    out.flush()
+
+
+def run(videos, output_dir, workers=1, threads_per_worker=None, direction="right",
+        detect_every=1, resume=True, log_level="WARNING", record_detections=False,
+        replay_detections=False, pipeline=DEFAULT_PROFILE):
+    """
+    Process `videos` across a pool of worker processes.
+    Returns the list of per-video summaries.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(int(workers), len(videos) or 1))
+    if threads_per_worker is None:
+        threads_per_worker = plan_threads(workers)
+
+    # Spawned workers: no inherited model or thread state from the parent
+    ctx = mp.get_context("spawn")
+    manager = ctx.Manager()
+    progress = manager.Queue()
+    summaries, state, done = [], {}, set()
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(threads_per_worker, progress, log_level)) as pool:
+        futures = {pool.submit(process_video, v, output_dir, direction, detect_every, resume,
+                               record_detections, replay_detections, pipeline): v
+                   for v in videos}
+        pending = set(futures)
+        while pending:
+            try:
+                video, frame, total, frames, elapsed = progress.get(timeout=0.5)
+                if video not in done:
+                    state[video] = (frame, total, frames, elapsed)
+                    _print_progress(state)
+            except queue.Empty:
+                pass
+            for future in [f for f in pending if f.done()]:
+                pending.discard(future)
+                video = futures[future]
+                done.add(video)
+                state.pop(video, None)
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    logger.error("Failed to process %s: %s", video, e)
+                    sys.stderr.write(f"\r{video}: FAILED ({e})\033[K\n")
+                    continue
+                summaries.append(summary)
+                if summary.get("skipped"):
+                    sys.stderr.write(f"\r{video}: already processed\033[K\n")
+                else:
+                    sys.stderr.write(f"\r{video}: {summary['frames']} frames, "
+                                     f"{summary['events']} events, {summary['fps']} fps\033[K\n")
+    manager.shutdown()
+
+    elapsed = time.monotonic() - started
+    processed = sum(s.get("processed_this_run", 0) for s in summaries if not s.get("skipped"))
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    sys.stderr.write(f"Done: {len(summaries)}/{len(videos)} videos, {processed} frames "
+                     f"in {elapsed:.1f}s ({rate:.1f} fps overall)\n")
+    return summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process match videos to result files.")
+    parser.add_argument("inputs", nargs="+", help="video files or directories of videos")
+    parser.add_argument("-o", "--output-dir", default="results", help="directory for result files")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="parallel worker processes")
+    parser.add_argument("-t", "--threads-per-worker", type=int, default=None,
+                        help="CPU threads per worker (default: cores / workers)")
+    parser.add_argument("--direction", choices=("left", "right"), default="right",
+                        help="attacking direction of team 1 in the first half")
+    parser.add_argument("--detect-every", type=int, default=1, help="run the detector every N frames")
+    parser.add_argument("--no-resume", action="store_true", help="reprocess from scratch")
+    parser.add_argument("--record-detections", action="store_true",
+                        help="also log detector output to <name>.dets.bin")
+    parser.add_argument("--replay-detections", action="store_true",
+                        help="rerun downstream stages from <name>.dets.bin without the model")
+    parser.add_argument("--pipeline", choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help="stage set to run (see core.pipeline)")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+    if args.record_detections and args.replay_detections:
+        parser.error("--record-detections and --replay-detections are exclusive")
+
+    configure_logging(level=args.log_level)
+    videos = collect_videos(args.inputs)
+    if not videos:
+        parser.error("no videos found")
+    summaries = run(videos, args.output_dir, workers=args.workers,
+                    threads_per_worker=args.threads_per_worker, direction=args.direction,
+                    detect_every=args.detect_every, resume=not args.no_resume,
+                    log_level=args.log_level, record_detections=args.record_detections,
+                    replay_detections=args.replay_detections, pipeline=args.pipeline)
+    return 0 if len(summaries) == len(videos) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
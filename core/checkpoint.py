@@ -0,0 +1,179 @@
+"""
+Checkpoints of LiveProcessor state, so a restarted job resumes with its
+tracks, team colours and pending decisions instead of from a blank state.
+
+A checkpoint directory (<results prefix>.ckpt/) holds one pickle per
+pipeline component and a manifest naming the current pickle of each, the
+frame they belong to and the processor's flags:
+
+    manifest.json
+    player_tracker-000012.pkl
+    team_assigner-000003.pkl
+    ...
+
+Saving is incremental: a component whose pickled state has not changed
+since the previous checkpoint (team colours, mostly) keeps its old file.
+The manifest is replaced atomically after the new files are written, so a
+crash mid-save leaves the previous checkpoint intact.
+"""
+import hashlib  # change detection between checkpoints
+import json  # manifest
+import os  # files
+import pickle  # component state
+import shutil  # removing finished checkpoints
+import cv2  # capture position
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+CHECKPOINT_SUFFIX = ".ckpt"
+MANIFEST_NAME = "manifest.json"
+
+# Checkpointed components: name -> (path from the processor, attributes
+# not saved). Excluded attributes are rebuilt or shared: listeners and
+# lookups wired by the processor, rule graphs, the pitch boundary (rebuilt
+# from the next frame) and sub-components saved on their own.
+COMPONENTS = {
+    "player_tracker": ("player_tracker", ("store",)),
+    "track_store": ("player_tracker.store", ("listeners",)),
+    "ball_tracker": ("ball_tracker", ()),
+    "team_assigner": ("team_assigner", ("colour_lookup",)),
+    "kick_detector": ("kick_detector", ()),
+    "event_detector": ("event_detector", ("pitch_boundary", "offside", "throwin", "corner")),
+    "offside": ("event_detector.offside", ("kg",)),
+    "scene_gate": ("scene_gate", ()),
+}
+
+# Plain processor attributes stored in the manifest
+FLAGS = ("frame_count", "halftime_mode", "team_1_dir", "team_2_dir", "last_player_possession")
+
+
+def _resolve(processor, path):
+    obj = processor
+    for name in path.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+class Checkpointer:
+    """
+    Saves a processor's state every `every` frames and restores the latest
+    checkpoint into a new processor.
+    """
+    def __init__(self, directory, every=250):
+        self.directory = directory
+        self.every = max(1, int(every))
+        # name -> (digest, file) of the last saved state
+        self.saved = {}
+        self.seq = 0
+        self.last_frame = None
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def due(self, frame_id):
+        return self.last_frame is None or frame_id - self.last_frame >= self.every
+
+    def save(self, processor, frame_id):
+        """
+        Checkpoint the state after `frame_id` has been processed. Results up
+        to that frame must already be on disk.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.seq += 1
+        files, written = {}, 0
+        for name, (path, exclude) in COMPONENTS.items():
+            obj = _resolve(processor, path)
+            state = {k: v for k, v in vars(obj).items() if k not in exclude}
+            data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+            digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+            previous = self.saved.get(name)
+            if previous is not None and previous[0] == digest:
+                files[name] = previous[1]
+                continue
+            filename = f"{name}-{self.seq:06d}.pkl"
+            with open(os.path.join(self.directory, filename), "wb") as f:
+                f.write(data)
+            self.saved[name] = (digest, filename)
+            files[name] = filename
+            written += 1
+
+        manifest = {
+            "frame_id": int(frame_id),
+            "read_position": int(processor.read_position),
+            # Component state is in this file's pixels (e.g. a proxy's)
+            "source": processor.source,
+            "seq": self.seq,
+            "flags": {flag: getattr(processor, flag) for flag in FLAGS},
+            "components": files,
+        }
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+        self.last_frame = int(frame_id)
+        self._remove_unreferenced(set(files.values()))
+        logger.debug("Checkpoint at frame %d (%d of %d components written)",
+                     frame_id, written, len(COMPONENTS))
+
+    def _remove_unreferenced(self, keep):
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".pkl") and filename not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def restore(self, processor):
+        """
+        Load the latest checkpoint into a freshly built processor and
+        position its capture after the checkpointed frame.
+        Returns that frame id, or None if there is no usable checkpoint.
+        """
+        manifest = self.load_manifest()
+        if manifest is None:
+            return None
+        if manifest.get("source", processor.source) != processor.source:
+            logger.warning("Checkpoint in %s is for %s, not %s; not restored",
+                           self.directory, manifest["source"], processor.source)
+            return None
+        states = {}
+        try:
+            for name, filename in manifest["components"].items():
+                with open(os.path.join(self.directory, filename), "rb") as f:
+                    data = f.read()
+                states[name] = (pickle.loads(data), filename,
+                                hashlib.blake2b(data, digest_size=16).hexdigest())
+        except Exception as e:
+            logger.warning("Checkpoint in %s unusable: %s", self.directory, e)
+            return None
+
+        for name, (state, filename, digest) in states.items():
+            if name not in COMPONENTS:
+                continue
+            vars(_resolve(processor, COMPONENTS[name][0])).update(state)
+            self.saved[name] = (digest, filename)
+        for flag, value in manifest.get("flags", {}).items():
+            setattr(processor, flag, value)
+
+        # Continue straight after the checkpoint; seek() would reset the
+        # state just restored
+        processor.pending_seek = None
+        processor.cap.set(cv2.CAP_PROP_POS_FRAMES, manifest["read_position"])
+        processor.read_position = manifest["read_position"]
+        # The view may have changed; rebuild the boundary from the next frame
+        processor.pitch_boundary.invalidate()
+        self.seq = int(manifest.get("seq", 0))
+        self.last_frame = int(manifest["frame_id"])
+        return self.last_frame
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
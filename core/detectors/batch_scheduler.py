@@ -0,0 +1,91 @@
+import queue  # request hand-off between sessions and the model thread
+import threading  # single thread owning the model
+import time  # batching deadline
+from concurrent.futures import Future  # per-request result handle
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+class InferenceScheduler:
+    """
+    Shares one detector between several producers (cameras, sessions).
+      • Callers submit single frames and get a Future
+      • A model thread collects up to `max_batch` frames, waiting at most
+        `max_wait` seconds after the first, and runs one batched forward pass
+    With N synchronized cameras the natural batch is N frames, so the model
+    is loaded once and each tick costs one inference call.
+    """
+    def __init__(self, detector, max_batch=8, max_wait=0.005):
+        # Object exposing detect_batch(frames) -> list of detection lists
+        self.detector = detector
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = float(max_wait)
+        self.requests = queue.Queue()
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self.thread.start()
+
+    def submit(self, frame):
+        """
+        Queue a frame for detection; returns a Future of its detection list.
+        """
+        future = Future()
+        self.requests.put((frame, future))
+        return future
+
+    def stop(self):
+        self._stop.set()
+        # Wake the model thread if it is waiting for work
+        self.requests.put(None)
+
+    def _collect(self):
+        # Block for the first request, then gather more until the deadline
+        first = self.requests.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._stop.set()
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            frames = [frame for frame, _ in batch]
+            try:
+                outputs = self.detector.detect_batch(frames)
+            except Exception as e:
+                logger.warning("Batched detection failed: %s", e)
+                outputs = [[] for _ in frames]
+            for (_, future), output in zip(batch, outputs):
+                future.set_result(output)
+
+
+class ScheduledDetector:
+    """
+    Drop-in replacement for Detector that routes calls through a shared
+    InferenceScheduler, so several LiveProcessors can share one model.
+    """
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+
+    def __call__(self, frame):
+        return self.scheduler.submit(frame).result()
+
+    def detect_batch(self, frames):
+        # Submitted together so the scheduler can batch them with other callers
+        futures = [self.scheduler.submit(frame) for frame in frames]
+        return [future.result() for future in futures]
@@ -0,0 +1,184 @@
+import bisect  # frame-id lookups for seeking
+import mmap  # records are read in place, not loaded
+import struct  # fixed-size headers
+import cv2  # capture property ids
+import numpy as np  # packed detection records
+from utils.bbox_utils import get_centre
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# File header: magic, fps, frame width, frame height
+FILE_HEADER = struct.Struct("<8sfII")
+MAGIC = b"VARDETS1"
+# Per-frame header: frame_id, number of detections, flags
+FRAME_HEADER = struct.Struct("<IHB")
+
+# Frame flags
+DETECTED = 1  # the detector ran on this frame
+SCENE_CUT = 2  # the scene gate saw a hard cut
+IN_PLAY = 4  # the scene gate classified the view as play
+
+# One detection: box, class, confidence and the shirt colour sampled from
+# the frame as TeamAssigner.extract_shirt_colour returns it (zeros for
+# the ball and referees)
+DETECTION_DTYPE = np.dtype([
+    ("bbox", "<f4", (4,)),
+    ("cls", "u1"),
+    ("conf", "<f4"),
+    ("color", "u1", (3,)),
+])
+
+
+class DetectionRecorder:
+    """
+    Appends one record per processed frame: the detector output plus what
+    pixel-dependent stages need to run later without the video
+    (scene-gate flags, per-detection shirt colours).
+    """
+    def __init__(self, path, fps, width, height):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(FILE_HEADER.pack(MAGIC, float(fps), int(width), int(height)))
+
+    def write(self, frame_id, flags, detections=(), colours=None):
+        """
+        Args:
+          detections: [x1, y1, x2, y2, cls, conf] lists (Detector format)
+          colours: optional per-detection shirt colours
+        """
+        records = np.zeros(len(detections), dtype=DETECTION_DTYPE)
+        for i, (x1, y1, x2, y2, cls, conf) in enumerate(detections):
+            records[i]["bbox"] = (x1, y1, x2, y2)
+            records[i]["cls"] = int(cls)
+            records[i]["conf"] = conf
+            if colours is not None and colours[i] is not None:
+                records[i]["color"] = np.clip(colours[i], 0, 255)
+        self.file.write(FRAME_HEADER.pack(int(frame_id), len(records), int(flags)))
+        self.file.write(records.tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+class RecordedCapture:
+    """
+    Stand-in for cv2.VideoCapture over a detection log.
+    read() returns (True, None): there are no pixels, only the current
+    record, which ReplayDetector and shirt_colour() serve to the pipeline.
+    Supports the properties LiveProcessor uses and seeking by frame.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.fps, self.width, self.height = FILE_HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise RuntimeError(f"Not a detection log: {path}")
+
+        # Index every complete frame record once: ids and byte offsets
+        frame_ids, offsets = [], []
+        pos = FILE_HEADER.size
+        while pos + FRAME_HEADER.size <= len(self.data):
+            frame_id, count, _ = FRAME_HEADER.unpack_from(self.data, pos)
+            end = pos + FRAME_HEADER.size + count * DETECTION_DTYPE.itemsize
+            if end > len(self.data):
+                break
+            frame_ids.append(frame_id)
+            offsets.append(pos)
+            pos = end
+        self.frame_ids = frame_ids
+        self.offsets = offsets
+        # Index of the next record to read
+        self.index = 0
+        # (frame_id, flags, records) of the last read
+        self.current = None
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def release(self):
+        self.opened = False
+        self.current = None
+        self.data.close()
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            # Position after the current frame, as for a real capture
+            return self.current[0] if self.current else 0
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return self.frame_ids[-1] if self.frame_ids else 0
+        return 0
+
+    def set(self, prop, value):
+        if prop != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        # Next read returns the first recorded frame at or after value + 1
+        self.index = bisect.bisect_left(self.frame_ids, int(value) + 1)
+        return True
+
+    def grab(self):
+        if not self.opened or self.index >= len(self.offsets):
+            return False
+        pos = self.offsets[self.index]
+        frame_id, count, flags = FRAME_HEADER.unpack_from(self.data, pos)
+        records = np.frombuffer(self.data, dtype=DETECTION_DTYPE, count=count,
+                                offset=pos + FRAME_HEADER.size)
+        self.current = (frame_id, flags, records)
+        self.index += 1
+        return True
+
+    def read(self, image=None):
+        return self.grab(), None
+
+    @property
+    def flags(self):
+        return self.current[1] if self.current else 0
+
+    def detections(self):
+        """
+        The current frame's detections in Detector format.
+        """
+        if self.current is None:
+            return []
+        return [[*(float(v) for v in r["bbox"]), int(r["cls"]), float(r["conf"])]
+                for r in self.current[2]]
+
+    def shirt_colour(self, bbox):
+        """
+        Recorded shirt colour of the current frame's detection nearest to
+        `bbox` (tracks are smoothed, so boxes rarely match exactly).
+        """
+        if self.current is None:
+            return np.zeros(3, dtype=float)
+        records = self.current[2]
+        # Players and keepers only
+        records = records[(records["cls"] == 1) | (records["cls"] == 2)]
+        if not len(records):
+            return np.zeros(3, dtype=float)
+        cx, cy = get_centre(bbox)
+        centres = (records["bbox"][:, :2] + records["bbox"][:, 2:]) / 2
+        nearest = int(np.argmin(np.hypot(centres[:, 0] - cx, centres[:, 1] - cy)))
+        return records["color"][nearest].astype(float)
+
+
+class ReplayDetector:
+    """
+    Drop-in replacement for Detector that returns the recorded detections
+    of the frame a RecordedCapture has just read.
+    """
+    def __init__(self, capture):
+        self.capture = capture
+
+    def __call__(self, frame):
+        return self.capture.detections()
+
+    def detect_batch(self, frames):
+        return [self.capture.detections() for _ in frames]
@@ -0,0 +1,21 @@
+import os  # backend selection
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+def create_detector():
+    """
+    Build the detector backend named by VAR_DETECTOR:
+      • "yolo" (default): the trained YOLO model
+      • "stub": StubDetector, no model or GPU needed (load tests)
+    Backends are imported lazily so the stub works without ultralytics.
+    """
+    backend = os.environ.get("VAR_DETECTOR", "yolo").lower()
+    if backend == "stub":
+        from .stub_detector import StubDetector
+        logger.info("Using the stub detector backend")
+        return StubDetector()
+    if backend != "yolo":
+        raise RuntimeError(f"Unknown detector backend: {backend}")
+    from .object_detector import Detector
+    return Detector()
@@ -1,4 +1,7 @@
 from ultralytics import YOLO  # Ultralytics YOLO model for object detection
+from utils.logging_utils import get_logger  # pipeline logging
+
+logger = get_logger(__name__)
 
 class Detector:
     """
@@ -21,11 +24,27 @@ class Detector:
             results = self.model(frame)
         except Exception as e:
             # If model inference fails, log and return empty list
-            print(f"Detection inference error: {e}")
+            logger.warning("Detection inference error: %s", e)
+            return []
+        return self._format(results[0])
+
+    def detect_batch(self, frames):
+        """
+        Run the YOLO model once on a list of frames (one forward pass) and
+        return one detection list per frame, in the same format as __call__.
+        """
+        if not frames:
             return []
+        try:
+            results = self.model(list(frames))
+        except Exception as e:
+            logger.warning("Batch detection inference error: %s", e)
+            return [[] for _ in frames]
+        return [self._format(r) for r in results]
 
+    def _format(self, result):
         # Extract bounding boxes, confidences, and class IDs from the results
-        detections = results[0].boxes.data.cpu().numpy()
+        detections = result.boxes.data.cpu().numpy()
         output = []
         for x1, y1, x2, y2, conf, cls in detections:
             # Convert values to native Python types
@@ -48,7 +67,7 @@ class Detector:
             # Perform detection limiting by confidence
             results = self.model(frame, conf=conf_thresh)
         except Exception as e:
-            print(f"Ball-only detection error: {e}")
+            logger.warning("Ball-only detection error: %s", e)
             return []
 
         detections = results[0].boxes.data.cpu().numpy()
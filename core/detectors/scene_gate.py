@@ -0,0 +1,72 @@
+import cv2  # downscaling, colour conversion and histograms
+import numpy as np  # pitch-green ratio
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+class SceneGate:
+    """
+    Cheap front-of-pipeline classifier for broadcast footage, run on a
+    downscaled copy of each frame:
+      • Hard cuts: Bhattacharyya distance between consecutive hue/saturation
+        histograms above `cut_threshold`
+      • Play frames: share of pitch-green pixels of at least `min_green`
+        (replays' wide shots pass, close-ups and crowd shots do not)
+    The play/non-play state only changes after `confirm_frames` agreeing
+    frames, except on a cut where the new shot is classified immediately.
+    """
+    def __init__(self, width=160, cut_threshold=0.5, min_green=0.35, confirm_frames=3):
+        self.width = int(width)
+        self.cut_threshold = float(cut_threshold)
+        self.min_green = float(min_green)
+        self.confirm_frames = max(1, int(confirm_frames))
+        # Green range in OpenCV HSV (hue 0-180)
+        self.green_lower = np.array([35, 40, 40], dtype=np.uint8)
+        self.green_upper = np.array([85, 255, 255], dtype=np.uint8)
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the previous shot, e.g. after a seek.
+        """
+        self.prev_hist = None
+        self.in_play = True
+        self.disagreeing = 0
+        # Last measurements, for logging and tuning
+        self.green_ratio = 1.0
+        self.cut_distance = 0.0
+
+    def update(self, frame):
+        """
+        Classify a frame. Returns (is_cut, in_play).
+        """
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, h * self.width // w)), interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+
+        hist = cv2.calcHist([hsv], [0, 1], None, [16, 8], [0, 180, 0, 256])
+        cv2.normalize(hist, hist, 1.0, 0.0, cv2.NORM_L1)
+        is_cut = False
+        if self.prev_hist is not None:
+            self.cut_distance = cv2.compareHist(self.prev_hist, hist, cv2.HISTCMP_BHATTACHARYYA)
+            is_cut = self.cut_distance > self.cut_threshold
+        self.prev_hist = hist
+
+        green = cv2.inRange(hsv, self.green_lower, self.green_upper)
+        self.green_ratio = float(np.count_nonzero(green)) / green.size
+        looks_like_play = self.green_ratio >= self.min_green
+
+        if is_cut:
+            # New shot: trust the first frame
+            self.in_play = looks_like_play
+            self.disagreeing = 0
+            logger.debug("Scene cut (distance %.2f), play=%s", self.cut_distance, self.in_play)
+        elif looks_like_play != self.in_play:
+            self.disagreeing += 1
+            if self.disagreeing >= self.confirm_frames:
+                self.in_play = looks_like_play
+                self.disagreeing = 0
+                logger.debug("View changed, play=%s (green %.2f)", self.in_play, self.green_ratio)
+        else:
+            self.disagreeing = 0
+        return is_cut, self.in_play
@@ -0,0 +1,46 @@
+import os  # simulated inference time from the environment
+import time  # simulated inference time
+import cv2  # colour segmentation
+import numpy as np  # masks
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+class StubDetector:
+    """
+    Model-free stand-in for Detector, for load tests and offline runs.
+    Segments non-grass blobs on a green pitch: small bright blobs become
+    the ball (class 0), the rest players (class 2). Output format matches
+    Detector: [x1, y1, x2, y2, class_id, confidence].
+    An optional per-call delay (`latency_ms`, or VAR_STUB_DETECTOR_MS)
+    emulates model inference time.
+    """
+    def __init__(self, latency_ms=None, min_area=30, ball_max_area=400):
+        if latency_ms is None:
+            latency_ms = float(os.environ.get("VAR_STUB_DETECTOR_MS", "0"))
+        self.latency = float(latency_ms) / 1000.0
+        self.min_area = int(min_area)
+        self.ball_max_area = int(ball_max_area)
+        self.green_lower = np.array([35, 40, 40], dtype=np.uint8)
+        self.green_upper = np.array([85, 255, 255], dtype=np.uint8)
+
+    def __call__(self, frame):
+        if self.latency:
+            time.sleep(self.latency)
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        objects = cv2.bitwise_not(cv2.inRange(hsv, self.green_lower, self.green_upper))
+        count, _, stats, _ = cv2.connectedComponentsWithStats(objects, connectivity=8)
+        h, w = frame.shape[:2]
+        output = []
+        for x, y, bw, bh, area in stats[1:count]:
+            if area < self.min_area or bw * bh > 0.25 * w * h:
+                # Noise, or the background outside the pitch
+                continue
+            x, y, bw, bh = int(x), int(y), int(bw), int(bh)
+            patch = hsv[y:y + bh, x:x + bw, 2]
+            is_ball = area <= self.ball_max_area and float(patch.mean()) > 200
+            output.append([float(x), float(y), float(x + bw), float(y + bh), 0 if is_ball else 2, 0.9])
+        return output
+
+    def detect_batch(self, frames):
+        return [self(frame) for frame in frames]
@@ -0,0 +1,45 @@
+# CornerGoal_Detector.py: Detects corner or goal-kick situations based on ball position
+from .Rule_Knowledge_Graph import RuleKnowledgeGraph
+from .Pitch_Boundary import GOAL_LINE
+
+class CornerGoalDetector:
+    """
+    Determines if a ball out over a goal line is a corner or a goal kick,
+    using the team that last touched the ball and which end it went out at.
+    """
+    def __init__(self):
+        # Knowledge graph for soccer rules
+        self.kg = RuleKnowledgeGraph()
+        self.corner_conditions = self.kg.get_conditions("Corner")
+        self.goal_kick_conditions = self.kg.get_conditions("Goal Kick")
+
+    def check_corner_goal(self, exit_line, exit_end, last_team_touch, team_1_dir):
+        """
+        Decide whether a ball out event is a corner or goal-kick.
+
+        Args:
+          exit_line (str or None): PitchBoundary.classify() result for the ball.
+          exit_end (str): 'left' or 'right', the end of the pitch it went out at.
+          last_team_touch (int): Team ID (1 or 2) that last touched the ball.
+          team_1_dir (str): Direction team 1 attacks ('left' or 'right').
+
+        Returns:
+          str or None: "Corner", "Goal Kick", or None if neither.
+        """
+        if exit_line != GOAL_LINE or last_team_touch not in (1, 2) or exit_end not in ('left', 'right'):
+            return None
+        # The team attacking towards this end; the other one defends it
+        attacking_team = 1 if exit_end == team_1_dir else 2
+
+        results = {
+            "Ball crosses goal line": True,
+            # Goalposts are not detected; a goal is announced separately
+            "Ball not between goalposts": True,
+            "Last touched by attacking team": last_team_touch == attacking_team,
+            "Last touched by defending team": last_team_touch != attacking_team,
+        }
+        if all(results.get(c, False) for c in self.corner_conditions):
+            return "Corner"
+        if all(results.get(c, False) for c in self.goal_kick_conditions):
+            return "Goal Kick"
+        return None
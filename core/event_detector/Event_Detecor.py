@@ -1,19 +1,38 @@
 import numpy as np
+from collections import deque
 from .Offside_Detector import OffsideDetector
-# from .ThrowIn_Detector import ThrowInDetector
-# from .CornerGoal_Detector import CornerGoalDetector
-from utils.bbox_utils import get_centre
+from .ThrowIn_Detector import ThrowInDetector
+from .CornerGoal_Detector import CornerGoalDetector
+from utils.bbox_utils import get_centre, get_bbox_width
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
 
 class EventDetector:
-    def __init__(self, frame_width):
+    def __init__(self, frame_width, pitch_boundary=None, out_confirm_frames=2, candidate_history=8):
         self.offside = OffsideDetector()
-        # self.throwin = ThrowInDetector()
-        # self.corner  = CornerGoalDetector()
+        self.throwin = ThrowInDetector()
+        self.corner  = CornerGoalDetector()
         self.frame_width = frame_width
+        # Out-of-play lookup kept in step with the camera by the processor;
+        # without one, throw-ins and corners are not detected
+        self.pitch_boundary = pitch_boundary
+        # Consecutive out-of-play frames needed before a restart is called
+        self.out_confirm_frames = max(1, int(out_confirm_frames))
+        self.out_frames = 0
+        # The ball is out and its restart has been called
+        self.ball_out = False
+        self.last_team_touch = None
         self.last_event = None
         self.waiting_for_possession = False
         self.pending_offside_list = []
         self.last_kick_frame = -1
+        self.last_ball_holder = None
+        # Recent (frame_id, offside candidates), so a kick reported a frame
+        # or two late is judged on the positions at the contact frame
+        self.candidate_history = deque(maxlen=max(1, int(candidate_history)))
+        # Track IDs involved in the event returned by the last detect() call
+        self.involved_ids = []
 
     def detect(self, frame_id, tracks, ball, direction, last_player_possession):
         possessing_player = None
@@ -21,6 +40,8 @@ class EventDetector:
             possessing_player = next((p for p in tracks if p['id'] == ball['possessed_by']), None)
 
         possessing_team = possessing_player['team'] if possessing_player else None
+        if possessing_team in (1, 2):
+            self.last_team_touch = possessing_team
 
         attackers = [t for t in tracks if t['cls'] == '2' and t['team'] == possessing_team]
         defenders = [t for t in tracks if t['cls'] == '2' and t['team'] not in [None, 0, possessing_team]]
@@ -28,37 +49,78 @@ class EventDetector:
         ball_position = get_centre(ball['bbox']) if ball else None
         event = None
         event_text = None
+        self.involved_ids = []
 
         if ball_position:
             self.offside.update_candidates(attackers, defenders, ball_position, direction, self.frame_width)
-            print(f"Offside candidates: {self.offside.offside_candidates}")
+            logger.debug("Offside candidates: %s", self.offside.offside_candidates)
+            self.candidate_history.append((frame_id, self.offside.offside_candidates.copy()))
             # External kick detection sets this flag
             if ball.get('kicked', False):
-                self.pending_offside_list = self.offside.offside_candidates.copy()
+                kick_frame = ball.get('kick_frame', frame_id)
+                self.pending_offside_list = self._candidates_at(kick_frame)
                 self.waiting_for_possession = True
-                self.last_ball_holder = last_player_possession
+                self.last_kick_frame = kick_frame
+                self.last_ball_holder = ball.get('kicked_by', last_player_possession)
 
-            # If a new player gains possession, check for offside
+            # If a new player gains possession, check for offside; the
+            # passer keeping the ball near their feet does not end the pass
             if self.waiting_for_possession and 'possessed_by' in ball and ball['possessed_by'] != -1:
                 if ball['possessed_by'] != self.last_ball_holder:
                     for pid, _ in self.pending_offside_list:
                         if ball['possessed_by'] == pid:
                             event = 'Offside'
                             event_text = f"Offside by Player {pid}"
+                            # Offside player and the passer, when known
+                            self.involved_ids = [pid] + (
+                                [self.last_ball_holder] if self.last_ball_holder is not None else []
+                            )
                             break
-                self.waiting_for_possession = False
-
-            # Throw-In Detection (placeholder)
-            # elif self.throwin.check_throw_in(ball_position, self.frame_width):
-            #     event = 'Throw-In'
-            #     event_text = f"Ball out for a Throw-In"
+                    self.waiting_for_possession = False
 
-            # Corner or Goal Kick Detection (placeholder)
-            # else:
-            #     result = self.corner.check_corner_goal(ball_position, defenders, self.frame_width)
-            #     if result:
-            #         event = result
-            #         event_text = f"Ball out for a {result}"
+            if event is None:
+                event, event_text = self._check_out_of_play(ball, ball_position, direction)
 
         self.last_event = (event, event_text)
-        return event, event_text
\ No newline at end of file
+        return event, event_text
+
+    def _candidates_at(self, kick_frame):
+        # Candidates of the latest frame at or before the contact
+        for hist_frame, candidates in reversed(self.candidate_history):
+            if hist_frame <= kick_frame:
+                return candidates
+        return self.offside.offside_candidates.copy()
+
+    def reset_out_of_play(self):
+        # After a cut or seek the last touch and the ball state are unknown
+        self.out_frames = 0
+        self.ball_out = False
+        self.last_team_touch = None
+
+    def _check_out_of_play(self, ball, ball_position, direction):
+        """
+        Throw-in, corner or goal kick once the whole ball has stayed over a
+        line for `out_confirm_frames` frames; one call per time out.
+        """
+        if self.pitch_boundary is None:
+            return None, None
+        exit_line = self.pitch_boundary.classify(ball_position, radius=get_bbox_width(ball['bbox']) / 2)
+        if exit_line is None:
+            self.out_frames = 0
+            self.ball_out = False
+            return None, None
+        self.out_frames += 1
+        if self.ball_out or self.out_frames < self.out_confirm_frames:
+            return None, None
+        self.ball_out = True
+
+        team = self.throwin.check_throw_in(exit_line, self.last_team_touch)
+        if team is not None:
+            return 'Throw-In', f"Throw-In to Team {team}"
+
+        centre_x = self.pitch_boundary.centre_x
+        exit_end = None if centre_x is None else ('left' if ball_position[0] < centre_x else 'right')
+        result = self.corner.check_corner_goal(exit_line, exit_end, self.last_team_touch, direction)
+        if result:
+            return result, f"Ball out for a {result}"
+        return None, None
\ No newline at end of file
@@ -0,0 +1,159 @@
+import cv2  # green segmentation, hull and distance transforms
+import numpy as np  # lookup maps
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Exit kinds returned by PitchBoundary.classify
+TOUCHLINE = "touchline"
+GOAL_LINE = "goal_line"
+
+# Codes stored in the side map
+_IN_PLAY, _TOUCHLINE, _GOAL_LINE = 0, 1, 2
+
+
+class PitchBoundary:
+    """
+    Out-of-play lookup for the current camera view.
+
+    The visible pitch is segmented once (largest pitch-green region, convex
+    hull) and rasterized at `width` pixels into two cached maps:
+      • distance outside the pitch, in original-frame pixels
+      • which line a point outside the pitch has crossed: hull edges within
+        `touchline_angle` degrees of horizontal are touchlines, steeper ones
+        goal lines; edges lying on the frame border are not lines at all
+    classify() is then two array lookups per ball position.
+
+    The maps are only rebuilt when the camera moves: on a scene cut, or
+    when the pitch-green mask checked every `check_every` frames overlaps
+    the cached one by less than `min_overlap`.
+    """
+    def __init__(self, width=320, check_every=5, min_overlap=0.9, touchline_angle=30.0, min_area=0.1):
+        self.width = int(width)
+        self.check_every = max(1, int(check_every))
+        self.min_overlap = float(min_overlap)
+        self.touchline_slope = np.tan(np.radians(float(touchline_angle)))
+        # Smallest pitch region, as a share of the frame, worth building from
+        self.min_area = float(min_area)
+        # Green range in OpenCV HSV, as in SceneGate
+        self.green_lower = np.array([35, 40, 40], dtype=np.uint8)
+        self.green_upper = np.array([85, 255, 255], dtype=np.uint8)
+        self.close_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (9, 9))
+        # Map pixels per frame pixel, set from the first frame
+        self.scale = 1.0
+        self.frames = 0
+        self.rebuilds = 0
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Drop the cached maps, e.g. after a seek; the next frame rebuilds them.
+        """
+        self.green = None
+        self.outside = None
+        self.side = None
+        self.centre_x = None
+
+    @property
+    def ready(self):
+        return self.side is not None
+
+    def _green_mask(self, frame):
+        h, w = frame.shape[:2]
+        self.scale = self.width / float(w)
+        small = cv2.resize(frame, (self.width, max(1, int(round(h * self.scale)))), interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        green = cv2.inRange(hsv, self.green_lower, self.green_upper)
+        # Fill pitch markings and players inside the grass
+        return cv2.morphologyEx(green, cv2.MORPH_CLOSE, self.close_kernel)
+
+    def update(self, frame, is_cut=False):
+        """
+        Keep the maps in step with the camera. Cheap on frames where the
+        view has not changed.
+        """
+        if frame is None:
+            return
+        self.frames += 1
+        if not is_cut and self.green is not None and self.frames % self.check_every:
+            return
+        green = self._green_mask(frame)
+        if not is_cut and self.green is not None:
+            inter = np.count_nonzero(green & self.green)
+            union = np.count_nonzero(green | self.green)
+            if union and inter / union >= self.min_overlap:
+                return
+        self._build(green)
+
+    def _build(self, green):
+        self.invalidate()
+        self.green = green
+        h, w = green.shape
+        contours, _ = cv2.findContours(green, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return
+        largest = max(contours, key=cv2.contourArea)
+        if cv2.contourArea(largest) < self.min_area * h * w:
+            return
+        hull = cv2.convexHull(largest)
+
+        pitch = np.zeros((h, w), dtype=np.uint8)
+        cv2.fillConvexPoly(pitch, hull, 255)
+        # Distance of each outside pixel to the pitch, in frame pixels
+        self.outside = cv2.distanceTransform(cv2.bitwise_not(pitch), cv2.DIST_L2, 3) / self.scale
+
+        # Rasterize each real boundary edge into its line kind
+        touchlines = np.full((h, w), 255, dtype=np.uint8)
+        goal_lines = np.full((h, w), 255, dtype=np.uint8)
+        points = hull[:, 0, :]
+        for (x1, y1), (x2, y2) in zip(points, np.roll(points, -1, axis=0)):
+            if self._on_border(x1, y1, x2, y2, w, h):
+                continue
+            dx, dy = abs(int(x2) - int(x1)), abs(int(y2) - int(y1))
+            target = touchlines if dy <= dx * self.touchline_slope else goal_lines
+            cv2.line(target, (int(x1), int(y1)), (int(x2), int(y2)), 0, 1)
+
+        side = np.full((h, w), _IN_PLAY, dtype=np.uint8)
+        has_touch, has_goal = not touchlines.all(), not goal_lines.all()
+        if has_touch or has_goal:
+            # Outside points take the kind of the nearest boundary line
+            d_touch = cv2.distanceTransform(touchlines, cv2.DIST_L2, 3) if has_touch else None
+            d_goal = cv2.distanceTransform(goal_lines, cv2.DIST_L2, 3) if has_goal else None
+            if d_touch is None:
+                nearest = np.full((h, w), _GOAL_LINE, dtype=np.uint8)
+            elif d_goal is None:
+                nearest = np.full((h, w), _TOUCHLINE, dtype=np.uint8)
+            else:
+                nearest = np.where(d_touch <= d_goal, _TOUCHLINE, _GOAL_LINE).astype(np.uint8)
+            side = np.where(pitch == 0, nearest, side).astype(np.uint8)
+        self.side = side
+
+        moments = cv2.moments(pitch, binaryImage=True)
+        self.centre_x = moments["m10"] / moments["m00"] / self.scale if moments["m00"] else None
+        self.rebuilds += 1
+        logger.debug("Pitch boundary rebuilt (#%d, touchlines=%s, goal lines=%s)",
+                     self.rebuilds, has_touch, has_goal)
+
+    @staticmethod
+    def _on_border(x1, y1, x2, y2, w, h, margin=2):
+        # Hull edges along the frame edge are where the view ends, not a line
+        return ((x1 <= margin and x2 <= margin) or (y1 <= margin and y2 <= margin)
+                or (x1 >= w - 1 - margin and x2 >= w - 1 - margin)
+                or (y1 >= h - 1 - margin and y2 >= h - 1 - margin))
+
+    def classify(self, position, radius=0.0):
+        """
+        Which line a ball at `position` (frame pixels) has fully crossed:
+        TOUCHLINE, GOAL_LINE, or None while in play, near the line (within
+        `radius`, the ball's own size) or out of view.
+        """
+        if self.side is None or position is None:
+            return None
+        h, w = self.side.shape
+        ix, iy = int(position[0] * self.scale), int(position[1] * self.scale)
+        if not (0 <= ix < w and 0 <= iy < h):
+            return None
+        code = self.side[iy, ix]
+        if code == _IN_PLAY or self.outside[iy, ix] <= radius:
+            return None
+        return TOUCHLINE if code == _TOUCHLINE else GOAL_LINE
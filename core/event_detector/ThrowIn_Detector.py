@@ -0,0 +1,44 @@
+# ThrowIn_Detector.py: Detects which team is awarded a throw-in based on ball exiting pitch boundaries
+from .Rule_Knowledge_Graph import RuleKnowledgeGraph
+from .Pitch_Boundary import TOUCHLINE
+
+class ThrowInDetector:
+    """
+    Determines throw-in possession from the line the ball left the pitch
+    over, as classified by PitchBoundary.
+    """
+    def __init__(self):
+        # Knowledge graph for throw-in rules
+        self.kg = RuleKnowledgeGraph()
+        self.conditions = self.kg.get_conditions("Throw-In")
+
+    def check_throw_in(self, exit_line, last_team_touch):
+        """
+        Check if the ball went out over a touchline and assign the throw-in.
+
+        Args:
+          exit_line (str or None): PitchBoundary.classify() result for the
+            ball; set only once the whole ball is over the line.
+          last_team_touch (int): ID of team (1 or 2) that last touched the ball.
+
+        Returns:
+          int or None: Team number awarded the throw-in, None if no throw-in.
+        """
+        # The throw goes to the opponents of the team that touched it last
+        awarded = {1: 2, 2: 1}.get(last_team_touch)
+
+        condition_results = {}
+        for condition in self.conditions:
+            if condition == "Ball crosses touchline":
+                condition_results[condition] = exit_line == TOUCHLINE
+            elif condition == "Ball completely out of play":
+                # PitchBoundary only reports a line once the ball is past it
+                condition_results[condition] = exit_line is not None
+            elif condition == "Last touched by opponent":
+                # Who takes the throw is not observed, so this only needs a
+                # known last touch; unknown, no throw-in can be assigned
+                condition_results[condition] = awarded is not None
+
+        if all(condition_results.get(c, False) for c in self.conditions):
+            return awarded
+        return None
@@ -0,0 +1,100 @@
+import bisect  # sorted time indexes
+import threading  # appends come from the processing thread
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+class EventStore:
+    """
+    Per-session timeline of detected events (offside, throw-in, corner...).
+      • Events get a sequence number in arrival order
+      • A sorted (timestamp, seq) index, overall and per type, answers
+        time-range queries in O(log n + k)
+      • Listeners are called on every append (e.g. to feed an SSE channel)
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Events in arrival order; an event's seq is its index here
+        self.events = []
+        # Sorted (timestamp, seq) keys over all events and per event type
+        self._time_index = []
+        self._type_index = {}
+        # Callbacks invoked as callback(event) after each append
+        self.listeners = []
+
+    def __len__(self):
+        return len(self.events)
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def append(self, event_type, frame_id, timestamp, text=None, track_ids=None, positions=None):
+        """
+        Record an event and return its dict.
+
+        Args:
+          event_type (str): e.g. "Offside"
+          frame_id (int): frame the event was detected on
+          timestamp (float): seconds from the start of the video
+          text (str): human-readable description
+          track_ids (list[int]): tracks involved in the decision
+          positions (dict[int, list[float]]): track ID -> bbox snapshot
+        """
+        with self._lock:
+            seq = len(self.events)
+            event = {
+                "seq": seq,
+                "type": event_type,
+                "frame_id": int(frame_id),
+                "timestamp": float(timestamp),
+                "text": text,
+                "track_ids": [int(t) for t in (track_ids or [])],
+                "positions": positions or {}
+            }
+            self.events.append(event)
+            key = (event["timestamp"], seq)
+            # Events normally arrive in time order, so insort appends at the end
+            bisect.insort(self._time_index, key)
+            bisect.insort(self._type_index.setdefault(event_type, []), key)
+
+        for callback in list(self.listeners):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning("Event listener error: %s", e)
+        return event
+
+    @property
+    def types(self):
+        return sorted(self._type_index)
+
+    def query(self, start=None, end=None, types=None, limit=None):
+        """
+        Events with start <= timestamp <= end, optionally restricted to
+        the given types, in time order.
+        """
+        with self._lock:
+            indexes = [self._time_index] if not types else [
+                self._type_index.get(t, []) for t in types
+            ]
+            keys = []
+            for index in indexes:
+                lo = 0 if start is None else bisect.bisect_left(index, (float(start), -1))
+                hi = len(index) if end is None else bisect.bisect_right(index, (float(end), float("inf")))
+                keys.extend(index[lo:hi])
+            if len(indexes) > 1:
+                keys.sort()
+            if limit is not None:
+                keys = keys[:max(0, int(limit))]
+            return [self.events[seq] for _, seq in keys]
+
+    def since(self, seq):
+        """
+        Events appended after sequence number `seq`, in arrival order.
+        """
+        with self._lock:
+            return self.events[max(0, int(seq) + 1):]
@@ -0,0 +1,133 @@
+import threading  # buffers are released from several threads
+import numpy as np  # preallocated frame buffers
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+class PooledFrame:
+    """
+    A reusable frame buffer with a reference count.
+    Every holder (the current processing step, the replay history, a held
+    multi-camera frame) calls retain() and later release(); when the count
+    drops to zero the buffer goes back to its pool for the next decode.
+    """
+    def __init__(self, pool, array):
+        self.pool = pool
+        self.array = array
+        self.refs = 0
+
+    def retain(self):
+        with self.pool.lock:
+            self.refs += 1
+        return self
+
+    def release(self):
+        with self.pool.lock:
+            self.refs -= 1
+            if self.refs > 0:
+                return
+            if self.refs < 0:
+                raise RuntimeError("PooledFrame released more times than retained")
+        self.pool._recycle(self)
+
+
+class FramePool:
+    """
+    Pool of preallocated, reference-counted frame buffers for decoding.
+      • read(cap) decodes straight into a free buffer (no per-frame allocation)
+      • Buffers are recycled once every holder has released them
+      • The pool grows on demand up to `max_size`; beyond that a temporary
+        buffer is used so decoding never blocks
+    The frame shape is learned from the first decoded frame.
+    """
+    def __init__(self, max_size=64, dtype=np.uint8):
+        self.max_size = int(max_size)
+        self.dtype = dtype
+        self.shape = None
+        self.lock = threading.Lock()
+        self.free = []
+        # Buffers owned by the pool (free or in use)
+        self.allocated = 0
+
+    def _new_buffer(self):
+        return PooledFrame(self, np.empty(self.shape, dtype=self.dtype))
+
+    def acquire(self):
+        """
+        Take a free buffer (reference count 1), allocating if none is free.
+        """
+        with self.lock:
+            if self.free:
+                frame = self.free.pop()
+            elif self.allocated < self.max_size:
+                self.allocated += 1
+                frame = self._new_buffer()
+            else:
+                frame = None
+        if frame is None:
+            # Every buffer is held; fall back to an untracked one
+            logger.debug("Frame pool exhausted (%d buffers); allocating a temporary frame", self.max_size)
+            frame = PooledFrame(_UNPOOLED, np.empty(self.shape, dtype=self.dtype))
+        frame.refs = 1
+        return frame
+
+    def read(self, cap):
+        """
+        Decode the next frame from a cv2.VideoCapture into a pooled buffer.
+        Returns a PooledFrame (owned by the caller) or None at end of stream.
+        """
+        if self.shape is None:
+            # First frame: let OpenCV allocate, then adopt its buffer
+            ok, image = cap.read()
+            if not ok:
+                return None
+            with self.lock:
+                self.shape = image.shape
+                self.allocated += 1
+            frame = PooledFrame(self, image)
+            frame.refs = 1
+            return frame
+
+        frame = self.acquire()
+        ok, image = cap.read(frame.array)
+        if not ok:
+            frame.release()
+            return None
+        if image is not frame.array:
+            # Resolution changed mid-stream: adopt the new shape; the buffer
+            # taken for this read is stale and leaves the pool
+            self._reshape(image.shape)
+            frame.release()
+            frame = PooledFrame(self, image)
+            with self.lock:
+                self.allocated += 1
+            frame.refs = 1
+        return frame
+
+    def _reshape(self, shape):
+        with self.lock:
+            self.shape = shape
+            self.allocated -= len(self.free)
+            self.free.clear()
+
+    def _recycle(self, frame):
+        with self.lock:
+            if frame.array.shape != self.shape:
+                # Stale size after a reshape: let it be garbage-collected
+                self.allocated -= 1
+                return
+            self.free.append(frame)
+
+
+class _UnpooledOwner:
+    """
+    Stand-in pool for temporary buffers: release() simply drops them.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def _recycle(self, frame):
+        pass
+
+
+_UNPOOLED = _UnpooledOwner()
@@ -0,0 +1,308 @@
+import json  # job parameters and command arguments
+import os  # worker liveness checks
+import sqlite3  # local persistent queue
+import time  # timestamps
+import uuid  # job identifiers
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Job states; the last three are terminal
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+TERMINAL_STATES = (DONE, FAILED, CANCELLED)
+# Paused by the client: not claimed by workers until resumed
+SUSPENDED = "suspended"
+
+# Job kinds (params["kind"]); jobs without one are analysis jobs
+ANALYSIS, PROXY = "analysis", "proxy"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    video_path TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress_frame INTEGER NOT NULL DEFAULT 0,
+    total_frames INTEGER NOT NULL DEFAULT 0,
+    worker_pid INTEGER,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    command TEXT NOT NULL,
+    args TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    consumed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS commands_job ON commands (job_id, consumed);
+"""
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    Persistent queue of analysis jobs shared by the API and worker processes.
+      • The API submits jobs and reads status/progress
+      • Workers claim queued jobs atomically and report progress
+      • Control commands (halftime, cancel, suspend) are passed to the
+        worker running a job through the commands table
+    Every call opens its own connection, so one JobQueue may be used from
+    any thread or process.
+    """
+    def __init__(self, db_path="jobs.db"):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return _Connection(conn)
+
+    @staticmethod
+    def _to_dict(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def submit(self, video_path, params=None):
+        """
+        Queue a new job and return its id.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, video_path, params, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, video_path, json.dumps(params or {}), QUEUED, now, now)
+            )
+        logger.info("Job %s queued for %s", job_id, video_path)
+        return job_id
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            return self._to_dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def latest(self, kind=ANALYSIS):
+        """
+        The most recently submitted job of `kind` (by default the analysis
+        of the latest upload, not its proxy), or None.
+        """
+        with self._connect() as conn:
+            return self._to_dict(conn.execute(
+                "SELECT * FROM jobs WHERE IFNULL(json_extract(params, '$.kind'), ?) = ? "
+                "ORDER BY created_at DESC LIMIT 1", (ANALYSIS, kind)).fetchone())
+
+    def list(self, status=None, limit=50):
+        query, args = "SELECT * FROM jobs", []
+        if status:
+            query += " WHERE status = ?"
+            args.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        args.append(int(limit))
+        with self._connect() as conn:
+            return [self._to_dict(r) for r in conn.execute(query, args).fetchall()]
+
+    def claim(self, worker_pid, kind=None):
+        """
+        Atomically take a queued job for a worker; None if idle. Only jobs
+        of `kind` are taken if given; otherwise analysis jobs come before
+        proxy jobs, oldest first.
+        """
+        query, args = "SELECT * FROM jobs WHERE status = ?", [QUEUED]
+        job_kind = "IFNULL(json_extract(params, '$.kind'), ?)"
+        if kind is not None:
+            query += f" AND {job_kind} = ?"
+            args += [ANALYSIS, kind]
+        query += f" ORDER BY {job_kind} = ?, created_at LIMIT 1"
+        args += [ANALYSIS, PROXY]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(query, args).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, worker_pid = ?, updated_at = ? WHERE id = ?",
+                        (RUNNING, worker_pid, time.time(), row["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        job = self._to_dict(row)
+        if job is not None:
+            job["status"] = RUNNING
+        return job
+
+    def update_progress(self, job_id, frame, total=None):
+        with self._connect() as conn:
+            if total is None:
+                conn.execute("UPDATE jobs SET progress_frame = ?, updated_at = ? WHERE id = ?",
+                             (int(frame), time.time(), job_id))
+            else:
+                conn.execute("UPDATE jobs SET progress_frame = ?, total_frames = ?, updated_at = ? "
+                             "WHERE id = ?", (int(frame), int(total), time.time(), job_id))
+
+    def update_params(self, job_id, **changes):
+        """
+        Merge `changes` into a job's stored parameters (e.g. halftime state,
+        so a resumed job continues with the same sides).
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT params FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None:
+                params = json.loads(row["params"])
+                params.update(changes)
+                conn.execute("UPDATE jobs SET params = ?, updated_at = ? WHERE id = ?",
+                             (json.dumps(params), time.time(), job_id))
+            conn.execute("COMMIT")
+
+    def finish(self, job_id, status, error=None):
+        """
+        Move a job to a final state, back to the queue or to suspended.
+        """
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = ?, error = ?, worker_pid = NULL, updated_at = ? "
+                         "WHERE id = ?", (status, error, time.time(), job_id))
+
+    def cancel(self, job_id):
+        """
+        Cancel a job: queued jobs are cancelled at once, running ones are
+        asked to stop. Returns the job's status after the request.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            status = row["status"]
+            if status in (QUEUED, SUSPENDED):
+                conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                             (CANCELLED, time.time(), job_id))
+                status = CANCELLED
+            elif status == RUNNING:
+                conn.execute("INSERT INTO commands (job_id, command, args, created_at) VALUES (?, ?, ?, ?)",
+                             (job_id, "cancel", "{}", time.time()))
+            conn.execute("COMMIT")
+        return status
+
+    def suspend(self, job_id):
+        """
+        Suspend a job: queued jobs are suspended at once, running ones are
+        asked to checkpoint and release their worker. Returns the job's
+        status after the request.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            status = row["status"]
+            if status == QUEUED:
+                conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                             (SUSPENDED, time.time(), job_id))
+                status = SUSPENDED
+            elif status == RUNNING:
+                conn.execute("INSERT INTO commands (job_id, command, args, created_at) VALUES (?, ?, ?, ?)",
+                             (job_id, "suspend", "{}", time.time()))
+            conn.execute("COMMIT")
+        return status
+
+    def resume(self, job_id):
+        """
+        Queue a suspended job again, or withdraw a suspend request the
+        worker has not acted on yet. Returns the job's status after the request.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            status = row["status"]
+            if status == SUSPENDED:
+                conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                             (QUEUED, time.time(), job_id))
+                status = QUEUED
+            elif status == RUNNING:
+                conn.execute("UPDATE commands SET consumed = 1 WHERE job_id = ? AND command = ? AND consumed = 0",
+                             (job_id, "suspend"))
+            conn.execute("COMMIT")
+        return status
+
+    def send_command(self, job_id, command, **args):
+        with self._connect() as conn:
+            conn.execute("INSERT INTO commands (job_id, command, args, created_at) VALUES (?, ?, ?, ?)",
+                         (job_id, command, json.dumps(args), time.time()))
+
+    def take_commands(self, job_id):
+        """
+        Return and mark consumed the pending (command, args) pairs for a job.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, command, args FROM commands WHERE job_id = ? AND consumed = 0 ORDER BY id",
+                (job_id,)
+            ).fetchall()
+            if rows:
+                conn.execute(f"UPDATE commands SET consumed = 1 WHERE id IN ({','.join('?' * len(rows))})",
+                             [r["id"] for r in rows])
+            conn.execute("COMMIT")
+        return [(r["command"], json.loads(r["args"])) for r in rows]
+
+    def requeue_orphans(self):
+        """
+        Put back jobs left running by workers that no longer exist (e.g. after
+        a crash or server restart); they resume from their partial results.
+        """
+        requeued = 0
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("SELECT id, worker_pid FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            for row in rows:
+                if not _pid_alive(row["worker_pid"]):
+                    conn.execute("UPDATE jobs SET status = ?, worker_pid = NULL, updated_at = ? WHERE id = ?",
+                                 (QUEUED, time.time(), row["id"]))
+                    requeued += 1
+            conn.execute("COMMIT")
+        if requeued:
+            logger.info("Requeued %d orphaned job(s)", requeued)
+        return requeued
+
+
+class _Connection:
+    """
+    Context manager that closes the sqlite3 connection on exit
+    (sqlite3's own context manager only ends the transaction).
+    """
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc):
+        self.conn.close()
@@ -0,0 +1,249 @@
+import uuid  # default session identifiers
+from concurrent.futures import ThreadPoolExecutor  # per-camera decode + processing
+import cv2  # video decoding and line detection
+import numpy as np  # line angle statistics
+
+from .stream import LiveProcessor
+from .event_store import EventStore
+from .detectors.factory import create_detector
+from .detectors.batch_scheduler import InferenceScheduler, ScheduledDetector
+from .pipeline import DEFAULT_PROFILE
+from utils.logging_utils import get_logger, set_log_context
+
+logger = get_logger(__name__)
+
+
+def offside_view_score(frame, width=320):
+    """
+    Estimate how perpendicular a camera looks at the offside line.
+    The offside line is parallel to the goal line, so a well-placed camera
+    sees goal-line-parallel pitch markings (halfway line, box edges) as
+    near-vertical lines. Returns a score in [0, 1]: the length-weighted
+    mean |cos| of the angle between those markings and the image vertical.
+    """
+    h, w = frame.shape[:2]
+    scale = width / float(w)
+    small = cv2.resize(frame, (width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+    # White markings on green grass
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    grass = cv2.inRange(hsv, np.array([35, 40, 40]), np.array([85, 255, 255]))
+    grass = cv2.dilate(grass, np.ones((5, 5), np.uint8))
+    white = cv2.inRange(hsv, np.array([0, 0, 170]), np.array([180, 60, 255]))
+    lines_mask = cv2.bitwise_and(white, grass)
+
+    lines = cv2.HoughLinesP(lines_mask, 1, np.pi / 180, threshold=30,
+                            minLineLength=width // 8, maxLineGap=5)
+    if lines is None:
+        return 0.0
+
+    segments = lines[:, 0].astype(float)
+    dx = segments[:, 2] - segments[:, 0]
+    dy = segments[:, 3] - segments[:, 1]
+    length = np.hypot(dx, dy)
+    cos_vertical = np.abs(dy) / np.maximum(length, 1e-6)
+    # Keep transverse markings only (within 45 degrees of vertical)
+    transverse = cos_vertical > np.cos(np.pi / 4)
+    if not transverse.any():
+        return 0.0
+    return float(np.average(cos_vertical[transverse], weights=length[transverse]))
+
+
+class _CameraFeed:
+    """
+    One camera angle: its LiveProcessor plus the time offset that aligns it
+    with the reference camera.
+    """
+    def __init__(self, index, processor, offset):
+        self.index = index
+        self.processor = processor
+        # Seconds to add to the reference time to get this camera's time
+        self.offset = float(offset)
+        self.fps = processor.fps
+        self.finished = False
+        # Last processed (frame_id, payload, frame), reused if the target repeats
+        self.last = None
+        # Pooled buffer behind self.last, held until the next decode
+        self.held = None
+
+    def target_frame(self, timestamp):
+        # 1-based frame id showing the given reference time
+        return int(round((timestamp + self.offset) * self.fps)) + 1
+
+    def step(self, timestamp):
+        """
+        Decode and process the frame aligned with `timestamp`.
+        Returns (frame_id, payload, frame) or None if the camera has no
+        frame for that time.
+        """
+        if self.finished:
+            return None
+        target = self.target_frame(timestamp)
+        if target < 1:
+            # This angle starts later than the reference
+            return None
+        if self.last is not None and self.last[0] == target:
+            # Lower frame rate than the reference: hold the last frame
+            return self.last
+
+        cap = self.processor.cap
+        position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+        if target - 1 < position or target - 1 - position > self.fps:
+            # Behind us or far ahead: seek instead of decoding every frame
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target - 1)
+        else:
+            # Skip intermediate frames without converting them
+            for _ in range(target - 1 - position):
+                cap.grab()
+
+        # Free the previously held frame, then decode in place into the pool
+        if self.held is not None:
+            self.held.release()
+            self.held = None
+        pooled = self.processor.frame_pool.read(cap)
+        if pooled is None:
+            self.finished = True
+            return None
+        set_log_context(session_id=self.processor.session_id)
+        self.held = pooled
+        payload = self.processor.process(pooled.array)
+        self.last = (target, payload, pooled.array)
+        return self.last
+
+
+class MultiCameraProcessor:
+    """
+    Processes N synchronized camera angles of one match:
+      • Angles are aligned by a per-camera time offset (seconds)
+      • Each tick decodes and processes every angle concurrently
+      • All angles share one detector through a batching InferenceScheduler,
+        so each tick costs a single batched forward pass
+      • Offside decisions come from the best-placed camera: the engaged
+        angle whose view is most perpendicular to the offside line
+    Iterating yields one payload per reference-camera frame.
+    """
+    def __init__(self, cameras, detector=None, max_workers=None, session_id=None, profile=DEFAULT_PROFILE):
+        """
+        Args:
+          cameras (list[dict]): one dict per angle with "source" and optional
+            "offset" (seconds, relative to the first camera) and "attacking_dir"
+          detector: shared model exposing detect_batch(); created if None
+          max_workers (int): decode/processing threads (default: one per angle)
+          profile (str): pipeline profile of every angle (see core.pipeline)
+        """
+        if not cameras:
+            raise ValueError("At least one camera is required.")
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self.scheduler = InferenceScheduler(detector or create_detector(), max_batch=len(cameras))
+        shared = ScheduledDetector(self.scheduler)
+
+        self.feeds = []
+        for i, cam in enumerate(cameras):
+            processor = LiveProcessor(
+                source=cam["source"],
+                attacking_dir=cam.get("attacking_dir", "right"),
+                session_id=f"{self.session_id}-cam{i}",
+                detector=shared,
+                profile=profile
+            )
+            self.feeds.append(_CameraFeed(i, processor, cam.get("offset", 0.0)))
+
+        # The first camera defines the timeline
+        self.fps = self.feeds[0].fps
+        self.pool = ThreadPoolExecutor(max_workers=max_workers or len(self.feeds),
+                                       thread_name_prefix="camera")
+        self.tick = 0
+        self.pending_seek = None
+        # Timeline of decisions made across angles
+        self.event_store = EventStore()
+
+    def __iter__(self):
+        set_log_context(session_id=self.session_id)
+        try:
+            while True:
+                if self.pending_seek is not None:
+                    self.tick, self.pending_seek = self.pending_seek - 1, None
+                self.tick += 1
+                timestamp = (self.tick - 1) / self.fps
+
+                # Decode and process every angle for this instant in parallel
+                results = list(self.pool.map(lambda feed: feed.step(timestamp), self.feeds))
+                if all(feed.finished for feed in self.feeds):
+                    logger.info("All camera streams ended.")
+                    break
+                try:
+                    yield self._combine(timestamp, results)
+                except Exception as e:
+                    logger.warning("Multi-camera combine error at tick %d: %s", self.tick, e)
+        finally:
+            self.pool.shutdown(wait=False)
+            self.scheduler.stop()
+
+    def seek(self, frame_id):
+        """
+        Continue from the given reference frame id on every angle.
+        """
+        self.pending_seek = max(1, int(frame_id))
+
+    def toggle_halftime(self):
+        for feed in self.feeds:
+            feed.processor.toggle_halftime()
+
+    def _engaged(self, feed):
+        # An angle takes part in an offside decision if it saw the pass
+        detector = feed.processor.event_detector
+        return detector.waiting_for_possession or detector.last_event[0] == 'Offside'
+
+    def _combine(self, timestamp, results):
+        cameras = []
+        offside_votes = []
+        other_event = None
+        for feed, result in zip(self.feeds, results):
+            if result is None:
+                continue
+            frame_id, payload, frame = result
+            cameras.append({
+                "camera": feed.index,
+                "frame_id": frame_id,
+                "tracks": payload.get("tracks", [])
+            })
+            event = payload.get("event")
+            if self._engaged(feed) or event == 'Offside':
+                offside_votes.append((feed, payload, frame))
+            elif event and other_event is None:
+                other_event = (feed.index, payload)
+
+        event, event_text, decision_camera = None, None, None
+        decided = [v for v in offside_votes if v[1].get("event") == 'Offside']
+        if decided:
+            # Only score views when some angle actually called offside
+            best = max(offside_votes, key=lambda v: offside_view_score(v[2]))
+            decision_camera = best[0].index
+            if best[1].get("event") == 'Offside':
+                event, event_text = 'Offside', best[1].get("event_text")
+            else:
+                logger.info("Offside call overruled by better-placed camera %d", decision_camera)
+        elif other_event is not None:
+            decision_camera, payload = other_event
+            event, event_text = payload.get("event"), payload.get("event_text")
+
+        if event:
+            cam_tracks = next(c["tracks"] for c in cameras if c["camera"] == decision_camera)
+            self.event_store.append(
+                event,
+                frame_id=self.tick,
+                timestamp=timestamp,
+                text=event_text,
+                track_ids=self.feeds[decision_camera].processor.event_detector.involved_ids,
+                positions={t['id']: t['bbox'] for t in cam_tracks}
+            )
+
+        primary = next((c for c in cameras if c["camera"] == 0), None)
+        return {
+            "frame_id": self.tick,
+            "tracks": primary["tracks"] if primary else [],
+            "event": event,
+            "event_text": event_text,
+            "cameras": cameras,
+            "decision_camera": decision_camera
+        }
@@ -0,0 +1,101 @@
+"""
+Declarative stage graph for per-frame analysis.
+
+Each Stage names the values it reads and writes in a per-frame context.
+A StageGraph keeps only the stages some target output depends on, and
+per frame runs a stage only when
+  • every required input is present (not None), and
+  • at least one of its inputs was written this frame.
+So with no ball on screen, possession, kick and event detection are
+skipped, and a session that only wants tracks never runs team assignment.
+
+Profiles name common stage sets; sessions pick one by name.
+"""
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Profile name -> (target outputs, stages disabled even if a target could use them)
+PROFILES = {
+    # Tracks with teams and possession, and every event
+    "full": (("team_tracks", "event"), ()),
+    # Player and ball tracks only
+    "tracking": (("tracks",), ()),
+    # Offside calls: out-of-play detection is not needed
+    "offside": (("event",), ("pitch_boundary",)),
+}
+DEFAULT_PROFILE = "full"
+
+
+class Stage:
+    """
+    One pipeline step.
+
+    Args:
+      name (str): stage name, used to disable it
+      fn (callable): fn(ctx) -> dict of outputs written this frame
+        (empty or None when it produced nothing new)
+      inputs (tuple[str]): values that must be present for the stage to run
+      optional (tuple[str]): values used if present; they also trigger a run
+      outputs (tuple[str]): values the stage may write
+    """
+    def __init__(self, name, fn, inputs=(), outputs=(), optional=()):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.optional = tuple(optional)
+        self.outputs = tuple(outputs)
+
+
+class StageGraph:
+    """
+    Stages in declaration order (each stage after the producers of its
+    inputs), pruned to those the `targets` need.
+    """
+    def __init__(self, stages, targets, disabled=()):
+        disabled = set(disabled)
+        unknown = disabled - {s.name for s in stages}
+        if unknown:
+            raise ValueError(f"Unknown stages: {sorted(unknown)}")
+        needed = set(targets)
+        active = []
+        # Walk backwards so consumers mark their inputs before producers are seen
+        for stage in reversed(stages):
+            if stage.name in disabled or not needed.intersection(stage.outputs):
+                continue
+            active.append(stage)
+            needed.update(stage.inputs)
+            needed.update(stage.optional)
+        self.stages = list(reversed(active))
+        self.targets = tuple(targets)
+        self.skipped = [s.name for s in stages if s not in self.stages]
+        logger.debug("Pipeline stages: %s (skipped: %s)",
+                     [s.name for s in self.stages], self.skipped)
+
+    @classmethod
+    def from_profile(cls, stages, profile=DEFAULT_PROFILE):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown pipeline profile: {profile}")
+        targets, disabled = PROFILES[profile]
+        return cls(stages, targets, disabled)
+
+    @property
+    def names(self):
+        return [s.name for s in self.stages]
+
+    def run(self, ctx, changed):
+        """
+        Run the active stages for one frame. `ctx` holds the values known
+        before the frame, `changed` the keys written for this frame; both
+        are updated in place.
+        """
+        for stage in self.stages:
+            if any(ctx.get(key) is None for key in stage.inputs):
+                continue
+            if not changed.intersection(stage.inputs + stage.optional):
+                continue
+            outputs = stage.fn(ctx)
+            if outputs:
+                ctx.update(outputs)
+                changed.update(outputs)
+        return ctx
@@ -0,0 +1,154 @@
+import cProfile  # deterministic profiling
+import os  # atomic result files
+import pstats  # profile output
+import sys  # thread stacks for sampling
+import threading  # sampler thread
+import time  # sampling interval
+import tracemalloc  # allocation snapshots
+from collections import Counter  # collapsed stack counts
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Profiling modes and the file extension of their output
+PROFILE_EXTENSIONS = {
+    "cprofile": "pstats",
+    "sample": "collapsed",
+    "tracemalloc": "txt",
+}
+
+
+def profile_output_path(results_dir, session_id, profile_id, mode):
+    return os.path.join(results_dir, f"{session_id}.profile-{profile_id}.{PROFILE_EXTENSIONS[mode]}")
+
+
+class FrameProfiler:
+    """
+    Profiles the next `frames` calls of a processor's process() method.
+      • "cprofile": cProfile over those calls, saved as a pstats file
+      • "sample": stacks of the processing thread sampled every
+        `interval` seconds while process() runs, saved as collapsed stacks
+        (one "outer;...;inner count" line each, for flamegraph tools)
+      • "tracemalloc": snapshots at the first, middle and last frame,
+        saved as the top allocation growth between them
+    process() is only wrapped while a profile is armed, so there is no cost
+    when profiling is off. The output file appears once it is complete.
+    """
+    def __init__(self, processor, frames, mode, output_path, interval=0.005, top=40):
+        if mode not in PROFILE_EXTENSIONS:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.processor = processor
+        self.frames = max(1, int(frames))
+        self.mode = mode
+        self.output_path = output_path
+        self.interval = float(interval)
+        self.top = int(top)
+        self.count = 0
+        self.done = False
+        self._original = None
+
+        self._profile = None
+        self._stacks = Counter()
+        self._in_process = threading.Event()
+        self._thread_id = None
+        self._sampler = None
+        self._snapshots = []
+        self._started_tracing = False
+
+    def arm(self):
+        """
+        Start profiling from the processor's next frame.
+        """
+        self._original = self.processor.process
+        # Instance attribute shadows the method until disarmed
+        self.processor.process = self._wrapped
+        logger.info("Profiling %d frames (%s) -> %s", self.frames, self.mode, self.output_path)
+
+    def disarm(self):
+        self.processor.__dict__.pop("process", None)
+
+    def _wrapped(self, frame):
+        if self.count == 0:
+            self._start()
+        self.count += 1
+        try:
+            if self.mode == "cprofile":
+                self._profile.enable()
+                try:
+                    return self._original(frame)
+                finally:
+                    self._profile.disable()
+            if self.mode == "sample":
+                self._in_process.set()
+                try:
+                    return self._original(frame)
+                finally:
+                    self._in_process.clear()
+            result = self._original(frame)
+            if self.count == (self.frames + 1) // 2 and self.frames > 2:
+                self._snapshots.append(tracemalloc.take_snapshot())
+            return result
+        finally:
+            if self.count >= self.frames:
+                self._finish()
+
+    def _start(self):
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+        elif self.mode == "sample":
+            self._thread_id = threading.get_ident()
+            self._sampler = threading.Thread(target=self._sample, name="profiler-sampler", daemon=True)
+            self._sampler.start()
+        else:
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start(25)
+            self._snapshots.append(tracemalloc.take_snapshot())
+
+    def _sample(self):
+        while not self.done:
+            if self._in_process.wait(0.1):
+                frame = sys._current_frames().get(self._thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                # Discard a sample taken just after process() returned
+                if stack and self._in_process.is_set():
+                    self._stacks[";".join(reversed(stack))] += 1
+                time.sleep(self.interval)
+
+    def _finish(self):
+        self.done = True
+        self.disarm()
+        tmp_path = self.output_path + ".tmp"
+        try:
+            if self.mode == "cprofile":
+                pstats.Stats(self._profile).dump_stats(tmp_path)
+            elif self.mode == "sample":
+                self._sampler.join(timeout=1.0)
+                with open(tmp_path, "w") as f:
+                    for stack, count in self._stacks.most_common():
+                        f.write(f"{stack} {count}\n")
+            else:
+                self._snapshots.append(tracemalloc.take_snapshot())
+                if self._started_tracing:
+                    tracemalloc.stop()
+                self._write_tracemalloc(tmp_path)
+            os.replace(tmp_path, self.output_path)
+            logger.info("Profile written: %s", self.output_path)
+        except Exception as e:
+            logger.warning("Profile output failed: %s", e)
+
+    def _write_tracemalloc(self, path):
+        first, last = self._snapshots[0], self._snapshots[-1]
+        with open(path, "w") as f:
+            f.write(f"# Allocation growth over {self.frames} frames (first -> last)\n")
+            for stat in last.compare_to(first, "lineno")[:self.top]:
+                f.write(f"{stat}\n")
+            if len(self._snapshots) == 3:
+                # Growth that continues in the second half points at leaks
+                f.write("\n# Growth in the second half (middle -> last)\n")
+                for stat in last.compare_to(self._snapshots[1], "lineno")[:self.top]:
+                    f.write(f"{stat}\n")
@@ -0,0 +1,204 @@
+"""
+Analysis proxies: a detector-sized, intra-only copy of an uploaded video.
+
+    <name>.proxy.bin   file header, then per frame: JPEG length + JPEG bytes
+    <name>.proxy.idx   byte offset of every frame (uint64), once complete
+
+Every proxy frame is a keyframe, so seeking is one index lookup and
+decoding a frame is one small JPEG decode, whatever codec, resolution and
+GOP structure the upload had. ProxyCapture reads a proxy as a stand-in for
+cv2.VideoCapture and reports the source size, so results can be scaled
+back to the original video the client plays.
+"""
+import mmap  # frames are decoded in place
+import os  # files and markers
+import struct  # fixed-size headers
+import cv2  # decoding, resizing and JPEG coding
+import numpy as np  # frame index
+from .uploads import PARTIAL_SUFFIX, is_upload_in_progress
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+PROXY_SUFFIX = ".proxy.bin"
+INDEX_SUFFIX = ".proxy.idx"
+
+# File header: magic, fps, proxy width/height, source width/height
+FILE_HEADER = struct.Struct("<8sfIIII")
+MAGIC = b"VARPRXY1"
+# Per-frame header: JPEG byte length
+FRAME_HEADER = struct.Struct("<I")
+
+# Proxy width: the detector works at 640 px, so more pixels are only decode cost
+PROXY_MAX_WIDTH = 640
+PROXY_JPEG_QUALITY = 85
+
+
+def proxy_path(video_path):
+    return os.path.splitext(video_path)[0] + PROXY_SUFFIX
+
+
+def proxy_ready(path):
+    """
+    True once a proxy has been completely written.
+    """
+    return os.path.exists(path) and not is_upload_in_progress(path)
+
+
+def build_proxy(source, path, max_width=PROXY_MAX_WIDTH, quality=PROXY_JPEG_QUALITY,
+                progress=None, should_stop=None):
+    """
+    Transcode `source` into a proxy at `path`. <path>.partial exists
+    until the proxy is complete (see proxy_ready). `progress(frames, total)`
+    is called every 250 frames; a true `should_stop()` abandons the proxy.
+    Returns the number of frames written, or None if stopped.
+    """
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video source: {source}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    src_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    src_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    scale = min(1.0, max_width / float(src_w)) if src_w else 1.0
+    width, height = max(1, int(round(src_w * scale))), max(1, int(round(src_h * scale)))
+    params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+
+    marker = path + PARTIAL_SUFFIX
+    open(marker, "w").close()
+    offsets, complete = [], False
+    try:
+        with open(path, "wb") as f:
+            f.write(FILE_HEADER.pack(MAGIC, float(fps), width, height, src_w, src_h))
+            while True:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                if scale < 1.0:
+                    frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+                ok, jpeg = cv2.imencode(".jpg", frame, params)
+                if not ok:
+                    raise RuntimeError(f"JPEG encoding failed at frame {len(offsets) + 1}")
+                offsets.append(f.tell())
+                f.write(FRAME_HEADER.pack(len(jpeg)))
+                f.write(jpeg.tobytes())
+                if len(offsets) % 250 == 0:
+                    if progress is not None:
+                        progress(len(offsets), total)
+                    if should_stop is not None and should_stop():
+                        return None
+        np.asarray(offsets, dtype="<u8").tofile(path + INDEX_SUFFIX)
+        complete = True
+    finally:
+        cap.release()
+        if not complete:
+            # Never leave a partial proxy that looks usable
+            for leftover in (path, path + INDEX_SUFFIX):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+        os.remove(marker)
+    logger.info("Proxy written: %s (%d frames, %dx%d from %dx%d)",
+                path, len(offsets), width, height, src_w, src_h)
+    return len(offsets)
+
+
+class ProxyCapture:
+    """
+    Stand-in for cv2.VideoCapture over a complete proxy file. Frame
+    positions are the source's, so payload frame ids match the original
+    video.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.data = None
+        self.offsets = []
+        self.index = 0
+        self.opened = False
+        try:
+            with open(path, "rb") as f:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Missing or empty
+            return
+        if len(self.data) < FILE_HEADER.size:
+            return
+        magic, self.fps, self.width, self.height, self.source_width, self.source_height = \
+            FILE_HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise RuntimeError(f"Not a proxy file: {path}")
+        self.offsets = self._load_index()
+        self.opened = True
+
+    def _load_index(self):
+        index_path = self.path + INDEX_SUFFIX
+        if os.path.exists(index_path):
+            return np.fromfile(index_path, dtype="<u8").tolist()
+        # No index (e.g. deleted): walk the frame headers once
+        offsets, pos = [], FILE_HEADER.size
+        while pos + FRAME_HEADER.size <= len(self.data):
+            (length,) = FRAME_HEADER.unpack_from(self.data, pos)
+            end = pos + FRAME_HEADER.size + length
+            if end > len(self.data):
+                break
+            offsets.append(pos)
+            pos = end
+        return offsets
+
+    def isOpened(self):
+        return self.opened
+
+    def release(self):
+        self.opened = False
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.index
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.offsets)
+        return 0
+
+    def set(self, prop, value):
+        if prop != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        # Every frame is a keyframe: seeking is just moving the index
+        self.index = max(0, int(value))
+        return True
+
+    def grab(self):
+        if not self.opened or self.index >= len(self.offsets):
+            return False
+        self.index += 1
+        return True
+
+    def retrieve(self, image=None):
+        pos = self.offsets[self.index - 1]
+        (length,) = FRAME_HEADER.unpack_from(self.data, pos)
+        start = pos + FRAME_HEADER.size
+        buffer = np.frombuffer(self.data, dtype=np.uint8, count=length, offset=start)
+        frame = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        if image is not None and frame is not None and image.shape == frame.shape:
+            # Decode into the caller's buffer, as VideoCapture.read(image) does
+            image[...] = frame
+            return True, image
+        return frame is not None, frame
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    @property
+    def coordinate_scale(self):
+        """
+        (sx, sy) taking proxy pixel coordinates to source pixels.
+        """
+        return (self.source_width / float(self.width or 1), self.source_height / float(self.height or 1))
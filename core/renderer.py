@@ -0,0 +1,189 @@
+import queue  # hand-off of encoded frames to the HTTP response
+import threading  # rendering runs off the event loop
+import time  # playback pacing
+from collections import deque  # results read ahead of rendering
+import cv2  # decoding, drawing and JPEG encoding
+
+from .frame_pool import FramePool
+from .results import ResultFollower
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds an event banner stays on screen
+BANNER_SECONDS = 2.0
+# Frames of results read from disk at a time
+RESULT_BATCH_FRAMES = 50
+
+
+def draw_overlay(frame, tracks, banner=None):
+    """
+    Draw tracks, team labels, possession and an event banner onto `frame`
+    in place.
+    """
+    ball = next((t for t in tracks if t.get("cls") == "0" and "possessed_by" in t), None)
+    possessor = ball["possessed_by"] if ball else -1
+
+    for t in tracks:
+        x1, y1, x2, y2 = (int(v) for v in t["bbox"])
+        r, g, b = t.get("color") or (128, 128, 128)
+        colour = (int(b), int(g), int(r))
+        cv2.rectangle(frame, (x1, y1), (x2, y2), colour, 2)
+        cv2.putText(frame, f"ID:{t['id']} T{t.get('team')}", (x1, y2 + 15),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.45, colour, 1, cv2.LINE_AA)
+        if t["id"] == possessor and t.get("cls") == "2":
+            cv2.circle(frame, ((x1 + x2) // 2, y1 - 10), 8, (0, 0, 255), -1)
+
+    if banner:
+        h, w = frame.shape[:2]
+        (tw, th), _ = cv2.getTextSize(banner, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)
+        cv2.rectangle(frame, (0, 0), (w, th + 24), (0, 0, 0), -1)
+        cv2.putText(frame, banner, ((w - tw) // 2, th + 12),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2, cv2.LINE_AA)
+    return frame
+
+
+class AnnotatedRenderer:
+    """
+    Renders a session's results onto the original video for playback:
+      • A worker thread decodes the video into pooled buffers, draws the
+        overlay in place and JPEG-encodes each frame once
+      • Output is paced at the video's frame rate; when rendering falls
+        behind, frames are skipped with grab() instead of decoded
+      • Frames wait for their results while analysis is still running;
+        frames without a record (e.g. half-time) reuse the last tracks
+    get() returns (frame_id, jpeg_bytes), or None once the video ends.
+    """
+    def __init__(self, video_path, results_prefix, is_finished, from_frame=1,
+                 jpeg_quality=75, max_width=1280, poll_seconds=0.1, queue_frames=2):
+        self.video_path = video_path
+        # Callable returning True once no more results will be written
+        self.is_finished = is_finished
+        self.from_frame = max(1, int(from_frame))
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
+        self.max_width = int(max_width)
+        self.poll_seconds = float(poll_seconds)
+        self.follower = ResultFollower(results_prefix, from_frame=self.from_frame)
+        # Encoded frames waiting to be sent; small so memory stays flat
+        self.frames = queue.Queue(maxsize=max(1, int(queue_frames)))
+        self.skipped = 0
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="renderer", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        # Wake a blocked get(): drop queued frames and leave the end marker
+        while True:
+            try:
+                self.frames.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            self.frames.put_nowait(None)
+        except queue.Full:
+            # The render thread queued a frame in between; get() returns it
+            pass
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def get(self, timeout=None):
+        """
+        Next (frame_id, jpeg_bytes), None at the end or once stopped.
+        Raises queue.Empty if nothing arrives within `timeout` seconds.
+        """
+        return self.frames.get(timeout=timeout)
+
+    def _results_until(self, frame_id, pending):
+        """
+        Read results until `frame_id` is covered or the job has ended.
+        Returns False if the renderer was stopped while waiting.
+        """
+        while not self._stop.is_set():
+            if pending and pending[-1]["frame_id"] >= frame_id:
+                return True
+            finished = self.is_finished()
+            payloads = self.follower.poll(RESULT_BATCH_FRAMES)
+            if payloads:
+                pending.extend(payloads)
+            elif finished:
+                return True
+            else:
+                time.sleep(self.poll_seconds)
+        return False
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self.frames.put(item, timeout=self.poll_seconds)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        cap = cv2.VideoCapture(self.video_path)
+        try:
+            if not cap.isOpened():
+                logger.warning("Renderer cannot open %s", self.video_path)
+                return
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30
+            period = 1.0 / fps
+            if self.from_frame > 1:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, self.from_frame - 1)
+            # Two buffers: one being drawn and encoded, one being decoded
+            pool = FramePool(max_size=2)
+            pending = deque()
+            tracks, banner, banner_until = [], None, 0
+            frame_id = self.from_frame
+            due = time.monotonic()
+
+            while not self._stop.is_set():
+                waited_from = time.monotonic()
+                if not self._results_until(frame_id, pending):
+                    break
+                if time.monotonic() - waited_from > period:
+                    # Waiting on analysis is not falling behind: restart the clock
+                    due = time.monotonic()
+                # Behind schedule: drop this frame without decoding it
+                if time.monotonic() > due + period:
+                    if not cap.grab():
+                        break
+                    self.skipped += 1
+                else:
+                    pooled = pool.read(cap)
+                    if pooled is None:
+                        break
+                    try:
+                        while pending and pending[0]["frame_id"] <= frame_id:
+                            payload = pending.popleft()
+                            tracks = payload["tracks"]
+                            if payload.get("event_text"):
+                                banner = payload["event_text"]
+                                banner_until = payload["frame_id"] + int(BANNER_SECONDS * fps)
+                        if frame_id > banner_until:
+                            banner = None
+                        image = draw_overlay(pooled.array, tracks, banner)
+                        if image.shape[1] > self.max_width:
+                            scale = self.max_width / image.shape[1]
+                            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                        ok, jpeg = cv2.imencode(".jpg", image, self.encode_params)
+                    finally:
+                        pooled.release()
+                    if ok:
+                        delay = due - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                        self._put((frame_id, jpeg.tobytes()))
+                due += period
+                frame_id += 1
+        except Exception as e:
+            logger.exception("Renderer error: %s", e)
+        finally:
+            cap.release()
+            if self.skipped:
+                logger.info("Renderer skipped %d frames to keep pace", self.skipped)
+            self._put(None)
@@ -5,6 +5,8 @@ from collections import deque  # Efficient fixed-length buffer
 class ReplayBuffer:
     """
     Maintains a buffer of recent frames and saves clips around events.
+    Frames are held as PooledFrame references rather than copies; a frame
+    is released back to its pool when it falls out of the history.
     """
     def __init__(self, fps, clip_dir="clips", buffer_seconds=10):
         # Frames per second of input video stream
@@ -19,14 +21,17 @@ class ReplayBuffer:
 
     def add_frame(self, frame):
         """
-        Add a new frame to the buffer. Copies the frame to avoid aliasing.
+        Add a new PooledFrame to the buffer, retaining it instead of copying.
+        The oldest frame is released once the buffer is full.
         """
         if frame is None:
             # Broken: frame may be None if capture failed; skip adding
             print("[ReplayBuffer] ⚠ Tried to add None frame to buffer.")
             return
-        # Append a copy to preserve original
-        self.frames.append(frame.copy())
+        if len(self.frames) == self.frames.maxlen:
+            # Hand the evicted buffer back to the decode pool
+            self.frames.popleft().release()
+        self.frames.append(frame.retain())
 
     def save_event_clip(self, post_frames, event_type, index=1):
         """
@@ -41,7 +46,7 @@ class ReplayBuffer:
           str or None: path to saved clip, or None on failure
         """
         # Combine buffered frames with any post-event frames
-        all_frames = list(self.frames) + (post_frames or [])
+        all_frames = [f.array for f in self.frames] + (post_frames or [])
         if not all_frames:
             print("[ReplayBuffer] ⚠ No frames available to save.")
             return None
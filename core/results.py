@@ -0,0 +1,258 @@
+import json  # sparse event records
+import os  # file sizes and truncation
+import struct  # fixed-size frame headers
+import numpy as np  # packed per-track records
+
+# Per-frame header: frame_id (uint32), number of tracks (uint16)
+FRAME_HEADER = struct.Struct("<IH")
+
+# One packed track record (38 bytes)
+TRACK_DTYPE = np.dtype([
+    ("id", "<i4"),
+    ("cls", "u1"),
+    ("team", "i1"),            # -1 when unassigned
+    ("bbox", "<f4", (4,)),
+    ("velocity", "<f4", (2,)),
+    ("possessed_by", "<i4"),   # ball only, -1 otherwise
+    ("kicked", "u1"),          # ball only
+    ("color", "u1", (3,)),
+])
+
+TRACKS_SUFFIX = ".tracks.bin"
+EVENTS_SUFFIX = ".events.jsonl"
+SUMMARY_SUFFIX = ".summary.json"
+
+
+def pack_tracks(tracks):
+    """
+    Pack a list of track dicts into a TRACK_DTYPE array.
+    """
+    records = np.zeros(len(tracks), dtype=TRACK_DTYPE)
+    for i, t in enumerate(tracks):
+        records[i]["id"] = t.get("id", -1)
+        records[i]["cls"] = int(t.get("cls", 2))
+        team = t.get("team")
+        records[i]["team"] = -1 if team is None else team
+        records[i]["bbox"] = t.get("bbox", (0, 0, 0, 0))
+        records[i]["velocity"] = t.get("velocity", (0, 0))
+        records[i]["possessed_by"] = t.get("possessed_by", -1)
+        records[i]["kicked"] = bool(t.get("kicked", False))
+        records[i]["color"] = t.get("color", (128, 128, 128))
+    return records
+
+
+def unpack_tracks(records):
+    """
+    Convert a TRACK_DTYPE array back into the payload's track dicts.
+    """
+    tracks = []
+    for r in records:
+        t = {
+            "id": int(r["id"]),
+            "cls": str(int(r["cls"])),
+            "team": None if r["team"] < 0 else int(r["team"]),
+            "bbox": [float(x) for x in r["bbox"]],
+            "velocity": [float(v) for v in r["velocity"]],
+            "color": [int(c) for c in r["color"]],
+        }
+        if t["cls"] == "0":
+            t["possessed_by"] = int(r["possessed_by"])
+            t["kicked"] = bool(r["kicked"])
+        tracks.append(t)
+    return tracks
+
+
+class ResultWriter:
+    """
+    Appends per-frame tracks and events for one video to compact files:
+      • <prefix>.tracks.bin   frame header + packed track records
+      • <prefix>.events.jsonl one JSON event per line
+    Records are only ever appended, so a reader can follow the files while
+    they grow and an interrupted run can be resumed.
+    """
+    def __init__(self, prefix, flush_every=25):
+        self.prefix = prefix
+        self.flush_every = max(1, int(flush_every))
+        self.tracks_file = open(prefix + TRACKS_SUFFIX, "ab")
+        self.events_file = open(prefix + EVENTS_SUFFIX, "a")
+        self._pending = 0
+
+    def write_frame(self, frame_id, tracks):
+        records = pack_tracks(tracks)
+        self.tracks_file.write(FRAME_HEADER.pack(int(frame_id), len(records)))
+        self.tracks_file.write(records.tobytes())
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def write_event(self, event):
+        self.events_file.write(json.dumps(event) + "\n")
+        self.events_file.flush()
+
+    def flush(self):
+        self.tracks_file.flush()
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        self.tracks_file.close()
+        self.events_file.close()
+
+
+class ResultReader:
+    """
+    Reads a tracks file written by ResultWriter, optionally following it
+    as it grows. Only complete frame records are returned.
+    """
+    def __init__(self, prefix):
+        self.path = prefix + TRACKS_SUFFIX
+        self.events_path = prefix + EVENTS_SUFFIX
+        # Byte offsets of the next unread frame record / event line
+        self.offset = 0
+        self.events_offset = 0
+
+    def skip_to(self, frame_id):
+        """
+        Advance past complete frames with ids below `frame_id` by reading
+        headers only. Returns False if the file ends before that frame.
+        """
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            while self.offset + FRAME_HEADER.size <= size:
+                f.seek(self.offset)
+                fid, count = FRAME_HEADER.unpack(f.read(FRAME_HEADER.size))
+                if fid >= frame_id:
+                    return True
+                end = self.offset + FRAME_HEADER.size + count * TRACK_DTYPE.itemsize
+                if end > size:
+                    break
+                self.offset = end
+        return False
+
+    def read_new(self, limit=None):
+        """
+        Return [(frame_id, tracks), ...] for frames completed since the last
+        call, at most `limit` of them.
+        """
+        if not os.path.exists(self.path):
+            return []
+        frames = []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            while limit is None or len(frames) < limit:
+                header = f.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    break
+                frame_id, count = FRAME_HEADER.unpack(header)
+                body = f.read(count * TRACK_DTYPE.itemsize)
+                if len(body) < count * TRACK_DTYPE.itemsize:
+                    # Partially written record: wait for the rest
+                    break
+                frames.append((frame_id, unpack_tracks(np.frombuffer(body, dtype=TRACK_DTYPE))))
+                self.offset += FRAME_HEADER.size + len(body)
+        return frames
+
+    def read_new_events(self):
+        """
+        Return event records appended since the last call.
+        """
+        if not os.path.exists(self.events_path):
+            return []
+        events = []
+        with open(self.events_path, "rb") as f:
+            f.seek(self.events_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Partially written line: wait for the rest
+                    break
+                events.append(json.loads(line))
+                self.events_offset += len(line)
+        return events
+
+    def read_events(self):
+        """
+        Return every complete event record.
+        """
+        if not os.path.exists(self.events_path):
+            return []
+        events = []
+        with open(self.events_path) as f:
+            for line in f:
+                if line.endswith("\n"):
+                    events.append(json.loads(line))
+        return events
+
+
+def recover(prefix):
+    """
+    Prepare partial results for resuming: drop a trailing incomplete frame
+    record and any events after the last complete frame.
+    Returns the last complete frame id, or 0 if there is none.
+    """
+    path = prefix + TRACKS_SUFFIX
+    if not os.path.exists(path):
+        return 0
+    last_frame, valid = 0, 0
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        while valid + FRAME_HEADER.size <= size:
+            f.seek(valid)
+            frame_id, count = FRAME_HEADER.unpack(f.read(FRAME_HEADER.size))
+            end = valid + FRAME_HEADER.size + count * TRACK_DTYPE.itemsize
+            if end > size:
+                break
+            last_frame, valid = frame_id, end
+    if valid < size:
+        with open(path, "r+b") as f:
+            f.truncate(valid)
+
+    events_path = prefix + EVENTS_SUFFIX
+    if os.path.exists(events_path):
+        kept = [e for e in ResultReader(prefix).read_events() if e.get("frame_id", 0) <= last_frame]
+        with open(events_path, "w") as f:
+            for e in kept:
+                f.write(json.dumps(e) + "\n")
+    return last_frame
+
+
+class ResultFollower:
+    """
+    Rebuilds stream payloads ({frame_id, tracks, event, event_text}) from a
+    result set that may still be growing. Each call to poll() returns the
+    payloads completed since the previous call.
+    """
+    def __init__(self, prefix, from_frame=None):
+        self.reader = ResultReader(prefix)
+        self.from_frame = from_frame
+        # Events by frame id, waiting for their frame record
+        self.pending_events = {}
+
+    def poll(self, limit=None):
+        """
+        Payloads for frames written since the last call (at most `limit`).
+        """
+        if self.from_frame is not None:
+            # Jump over earlier frames by header; any not yet written are filtered below
+            self.reader.skip_to(self.from_frame)
+        # Events are flushed before the frame they belong to; those of
+        # skipped frames would never be collected
+        for event in self.reader.read_new_events():
+            if self.from_frame is not None and event["frame_id"] < self.from_frame:
+                continue
+            self.pending_events.setdefault(event["frame_id"], event)
+        payloads = []
+        for frame_id, tracks in self.reader.read_new(limit):
+            event = self.pending_events.pop(frame_id, None)
+            if self.from_frame is not None and frame_id < self.from_frame:
+                continue
+            payloads.append({
+                "frame_id": frame_id,
+                "tracks": tracks,
+                "event": event["type"] if event else None,
+                "event_text": event["text"] if event else None
+            })
+        if payloads:
+            self.from_frame = None
+        return payloads
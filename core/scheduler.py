@@ -0,0 +1,139 @@
+"""
+Node-level CPU scheduling for analysis sessions.
+
+    • apply_thread_budget: caps the torch, OpenCV and BLAS thread pools of
+      the current process
+    • plan_threads: splits the node's cores between worker processes
+    • AdmissionController: lets a worker start another session only while
+      the ones it runs keep their target frame rate
+
+Sessions of one worker share a single detector through an
+InferenceScheduler (see core.detectors.batch_scheduler), so the model is
+loaded once per worker and concurrent frames are batched.
+"""
+import os  # thread-count environment variables and CPU affinity
+import threading  # sessions report from their own threads
+import time  # frame rates
+from utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Thread pools sized from these variables when native libraries load
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def node_cpus():
+    """
+    Cores this process may run on (respects taskset/cgroup affinity).
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def plan_threads(workers, cpus=None):
+    """
+    Threads per worker process so `workers` processes share the node's
+    cores without oversubscribing them.
+    """
+    cpus = cpus or node_cpus()
+    return max(1, cpus // max(1, int(workers)))
+
+
+def apply_thread_budget(threads, interop_threads=1):
+    """
+    Cap native thread pools (OpenMP/BLAS, OpenCV, torch) for this process.
+    Call before the model stack is first used.
+    """
+    threads = max(1, int(threads))
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    # BLAS pools of libraries already loaded (numpy) ignore the variables
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        logger.warning("threadpoolctl is not installed; BLAS pools already loaded keep their thread count")
+    else:
+        threadpool_limits(threads)
+    import cv2
+    import torch
+    cv2.setNumThreads(threads)
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(max(1, int(interop_threads)))
+    except RuntimeError:
+        # Only allowed before torch runs any parallel work
+        logger.debug("torch inter-op threads already fixed")
+
+
+class AdmissionController:
+    """
+    Decides when a worker may start another session.
+
+    Each running session reports its processed frames; their rates are
+    smoothed over `window` seconds. A new session is admitted while fewer
+    than `max_sessions` run and every session past its `warmup` frames
+    processes at least `min_fps * headroom` frames per second, so adding
+    one more still leaves each at or above `min_fps`. Without `min_fps`
+    only the session count is limited.
+    """
+    def __init__(self, max_sessions=1, min_fps=None, headroom=1.25, window=5.0, warmup=50):
+        self.max_sessions = max(1, int(max_sessions))
+        self.min_fps = float(min_fps) if min_fps else None
+        self.headroom = float(headroom)
+        self.window = float(window)
+        self.warmup = int(warmup)
+        self._lock = threading.Lock()
+        # key -> [frames seen, smoothed fps, time of the last rate update, frames since]
+        self._sessions = {}
+
+    def register(self, key):
+        with self._lock:
+            self._sessions[key] = [0, None, time.monotonic(), 0]
+
+    def release(self, key):
+        with self._lock:
+            self._sessions.pop(key, None)
+
+    def record(self, key, frames=1):
+        """
+        Count processed frames for a session; cheap enough for every frame.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._sessions.get(key)
+            if state is None:
+                return
+            state[0] += frames
+            state[3] += frames
+            elapsed = now - state[2]
+            if elapsed >= 1.0:
+                rate = state[3] / elapsed
+                # Exponential smoothing over roughly `window` seconds
+                alpha = min(1.0, elapsed / self.window)
+                state[1] = rate if state[1] is None else state[1] + alpha * (rate - state[1])
+                state[2], state[3] = now, 0
+
+    def rates(self):
+        with self._lock:
+            return {key: state[1] for key, state in self._sessions.items()}
+
+    @property
+    def running(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def can_admit(self):
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                return False
+            if self.min_fps is None:
+                return True
+            for frames, fps, _, _ in self._sessions.values():
+                if frames < self.warmup or fps is None:
+                    # Too early to know what this session needs
+                    return False
+                if fps < self.min_fps * self.headroom:
+                    return False
+            return True
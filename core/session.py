@@ -0,0 +1,96 @@
+import threading  # refreshes may come from several request threads
+import time  # ageing out playback reports
+from contextlib import contextmanager
+from .event_store import EventStore
+from .results import ResultReader
+
+# Clients that have not reported their playback position for this long are forgotten
+PLAYBACK_TTL_SECONDS = 300.0
+
+
+class MatchSession:
+    """
+    The API's view of one analysis job:
+      • the video path and the prefix of its result files
+      • the event timeline, loaded incrementally from the job's events file
+      • the playback position each client reports, which bounds how far
+        ahead of that client's playback its streams send
+    Processing itself runs in a worker process (see core.worker).
+    """
+    def __init__(self, session_id, video_path, results_prefix):
+        self.session_id = session_id
+        self.video_path = video_path
+        self.results_prefix = results_prefix
+        self.events = EventStore()
+        self._reader = ResultReader(results_prefix)
+        self._lock = threading.Lock()
+        # Client id -> (frame on its screen, time of the report)
+        self.playback = {}
+        self._playback_lock = threading.Lock()
+        # Streams currently reading this session (see streaming())
+        self.live_streams = 0
+
+    @contextmanager
+    def streaming(self):
+        """
+        Count a stream as live while the block runs, so the API keeps the
+        session (and the playback its clients report to it) cached.
+        """
+        with self._playback_lock:
+            self.live_streams += 1
+        try:
+            yield self
+        finally:
+            with self._playback_lock:
+                self.live_streams -= 1
+
+    def report_playback(self, client_id, frame_id):
+        """
+        Record the frame a client is showing. Later reports win, so
+        scrubbing back lowers the position too.
+        """
+        now = time.monotonic()
+        with self._playback_lock:
+            stale = [c for c, (_, at) in self.playback.items() if now - at > PLAYBACK_TTL_SECONDS]
+            for c in stale:
+                del self.playback[c]
+            self.playback[client_id] = (max(1, int(frame_id)), now)
+        return self.playback_frame(client_id)
+
+    def playback_frame(self, client_id):
+        """
+        Frame the client last reported, or None if it has not reported
+        within PLAYBACK_TTL_SECONDS.
+        """
+        entry = self.playback.get(client_id) if client_id else None
+        if entry is None or time.monotonic() - entry[1] > PLAYBACK_TTL_SECONDS:
+            return None
+        return entry[0]
+
+    def send_limit(self, client_id, lead_frames):
+        """
+        Last frame id a client's stream may send, `lead_frames` past its
+        playback, or None (no limit) until that client reports a position.
+        """
+        frame_id = self.playback_frame(client_id)
+        if frame_id is None:
+            return None
+        return frame_id + int(lead_frames)
+
+    def refresh_events(self):
+        """
+        Append events written by the worker since the last refresh.
+        Blocking file I/O; returns the number of new events.
+        """
+        with self._lock:
+            new = self._reader.read_new_events()
+            for e in new:
+                self.events.append(
+                    e["type"],
+                    frame_id=e["frame_id"],
+                    timestamp=e["timestamp"],
+                    text=e.get("text"),
+                    track_ids=e.get("track_ids"),
+                    positions=e.get("positions")
+                )
+        return len(new)
@@ -1,58 +1,118 @@
+import time  # polling delay while an upload is still arriving
+import uuid  # default session identifiers
 import cv2  # OpenCV for video capture and processing
 import numpy as np  # Numerical operations
 
 
 # Custom modules for detection, tracking, and events
-from .detectors.object_detector import Detector
+from .detectors.factory import create_detector
+from .detectors.scene_gate import SceneGate
+from .detectors.detection_log import (DetectionRecorder, RecordedCapture, ReplayDetector,
+                                      DETECTED, SCENE_CUT, IN_PLAY)
 from .trackers.player_tracker import PlayerTracker
 from .trackers.ball_tracker import BallTracker
 from .assigners.team_assign import TeamAssigner
 from .assigners.player_ball_assign import PlayerBallAssigner
 from .event_detector.Event_Detecor import EventDetector
+from .event_detector.Pitch_Boundary import PitchBoundary
 from .assigners.Ball_Kick_Detector import BallKickDetector
 #from .replay_buffer_broken import ReplayBuffer
+from .uploads import is_upload_in_progress
+from .event_store import EventStore
+from .frame_pool import FramePool
+from .proxy import ProxyCapture, PROXY_SUFFIX
+from .pipeline import Stage, StageGraph, DEFAULT_PROFILE
 from utils.bbox_utils import get_centre
+from utils.logging_utils import get_logger, set_log_context
 from .event_detector.Rule_Knowledge_Graph import RuleKnowledgeGraph
 
+logger = get_logger(__name__)
+
 class LiveProcessor:
     """
     Handles live video processing:
-      • Captures frames
+      • Captures frames (or replays recorded detections without the video)
       • Detects objects (players, ball)
       • Tracks motion
       • Assigns teams and ball possession
       • Detects events (kicks, goals)
       • Buffers for replay
     """
-    def __init__(self, source=0, detect_every=1, attacking_dir='right'):
+    def __init__(self, source=0, detect_every=1, attacking_dir='right', growth_poll_seconds=0.5,
+                 session_id=None, detector=None, record_detections=None, replay_detections=None,
+                 profile=DEFAULT_PROFILE):
+        # Identifier attached to this session's log records
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        set_log_context(session_id=self.session_id)
+
         # Initialize video capture and validate source
-        self.cap = cv2.VideoCapture(source)
-        if not self.cap.isOpened():
-            raise RuntimeError(f"Cannot open video source: {source}")
+        self.source = source
+        # Replay runs the pipeline on a detection log instead of pixels
+        self.replaying = replay_detections is not None
+        if self.replaying:
+            self.cap = RecordedCapture(replay_detections)
+            detector = ReplayDetector(self.cap)
+        else:
+            self.cap = self._open_capture(source)
+        # Analysis runs in proxy pixels; output is scaled to the source video's
+        self.coord_scale = getattr(self.cap, "coordinate_scale", (1.0, 1.0))
+        # Frame pixels per full-resolution pixel, for pixel thresholds
+        self.pixel_scale = 1.0 / self.coord_scale[0]
 
         # Basic settings and state
         self.frame_count = 0
         self.detect_every = max(1, int(detect_every))
         self.fps = int(self.cap.get(cv2.CAP_PROP_FPS)) or 30
         width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
         self.rules_graph = RuleKnowledgeGraph()
         self.rules_graph.visualize("rules.png")  # saved in the working directory
 
         # Initialize processing modules
-        self.detector = Detector()  # object detector
+        # Cut and non-play-view gate in front of detection and tracking
+        self.scene_gate = SceneGate()
+        # Object detector; may be shared between processors (e.g. ScheduledDetector)
+        self.detector = detector if detector is not None else create_detector()
         self.player_tracker = PlayerTracker()
-        self.ball_tracker = BallTracker()
+        self.ball_tracker = BallTracker(pixel_scale=self.pixel_scale)
         self.team_assigner = TeamAssigner()
-        self.ball_assigner = PlayerBallAssigner()
-        self.event_detector = EventDetector(frame_width=width)
-        self.kick_detector = BallKickDetector()
+        self.ball_assigner = PlayerBallAssigner(pixel_scale=self.pixel_scale)
+        # Cached out-of-play lookup for throw-ins, corners and goal kicks
+        self.pitch_boundary = PitchBoundary()
+        self.event_detector = EventDetector(frame_width=width, pitch_boundary=self.pitch_boundary)
+        self.kick_detector = BallKickDetector(pixel_scale=self.pixel_scale)
+        if self.replaying:
+            # Shirt colours come from the log rather than the frame
+            self.team_assigner.colour_lookup = self.cap.shirt_colour
+        # Per-frame detection log for model-free reruns, if requested
+        self.detection_recorder = (DetectionRecorder(record_detections, self.fps, width, height)
+                                   if record_detections else None)
+        # Drop per-track team state when the tracker retires a track
+        self.player_tracker.store.add_listener(self.team_assigner.on_track_event)
+
+        # Timeline of detected events for listing and jump-to-event
+        self.event_store = EventStore()
+
+        # Stages this session runs, from its profile (see core.pipeline)
+        self.profile = profile
+        self.pipeline = StageGraph.from_profile(self._build_stages(), profile)
 
         # Replay buffer for saving clips, broken
         #self.replay_buffer = ReplayBuffer(fps=self.fps, buffer_seconds=8)
+        self.replay_buffer = None
+        # Reusable decode buffers; sized for the replay history plus in-flight frames
+        history = self.replay_buffer.buffer_size if self.replay_buffer else 0
+        self.frame_pool = FramePool(max_size=history + 4)
 
         # Flags and memory
         self.halftime_mode = False
+        # Frame id requested by seek(), applied on the processing thread
+        self.pending_seek = None
+        # Capture position after the last successful read (for reopening)
+        self.read_position = 0
+        # Delay between retries while the source file is still uploading
+        self.growth_poll_seconds = float(growth_poll_seconds)
         self.last_detections = []
         self.last_player_possession = None
 
@@ -62,16 +122,148 @@ class LiveProcessor:
 
     def __iter__(self):
         # Make the processor iterable over frames
-        while self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                print("Stream ended or cannot read frame.")
+        # Log records from this thread belong to this session
+        set_log_context(session_id=self.session_id)
+        try:
+            while self.cap.isOpened():
+                if self.pending_seek is not None:
+                    self._apply_seek()
+                if self.replaying:
+                    # Next recorded frame; there are no pixels to decode
+                    if not self.cap.grab():
+                        logger.info("Recorded detections ended.")
+                        break
+                    pooled = None
+                elif self.halftime_mode:
+                    # Nothing is analysed at half-time: grab() without retrieve()
+                    # saves the colour conversion and copy (a video still decodes;
+                    # a proxy frame is not decoded at all)
+                    if not self.cap.grab():
+                        if is_upload_in_progress(self.source):
+                            self._wait_for_source()
+                            continue
+                        logger.info("Stream ended or cannot read frame.")
+                        break
+                    pooled = None
+                else:
+                    # Decode in place into a recycled buffer
+                    pooled = self.frame_pool.read(self.cap)
+                    if pooled is None:
+                        if is_upload_in_progress(self.source):
+                            # Reached the end of the bytes received so far: wait for more
+                            self._wait_for_source()
+                            continue
+                        logger.info("Stream ended or cannot read frame.")
+                        break
+                self.read_position = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+                try:
+                    if pooled is None:
+                        payload = self.process(None)
+                    else:
+                        if self.replay_buffer is not None:
+                            # The history holds its own reference instead of a copy
+                            self.replay_buffer.add_frame(pooled)
+                        payload = self.process(pooled.array)
+                except Exception as e:
+                    logger.warning("Frame processing error #%d: %s", self.frame_count, e)
+                    continue
+                finally:
+                    # Payloads never reference pixels, so this step is done with the buffer
+                    if pooled is not None:
+                        pooled.release()
+                yield payload
+        finally:
+            if self.detection_recorder is not None:
+                self.detection_recorder.close()
+
+    @staticmethod
+    def _open_capture(source):
+        if isinstance(source, str) and source.endswith(PROXY_SUFFIX):
+            # Detector-sized analysis proxy of the uploaded video
+            cap = ProxyCapture(source)
+        else:
+            cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            raise RuntimeError(f"Cannot open video source: {source}")
+        return cap
+
+    def switch_source(self, source):
+        """
+        Continue after the last frame read on another file of the same
+        video, e.g. its analysis proxy once that is complete. Frame ids are
+        unchanged; motion and identity state is dropped as at a scene cut,
+        and the resolution-dependent components are rebuilt for the new
+        frame size. Call between frames, on the processing thread.
+        """
+        cap = self._open_capture(source)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, self.read_position)
+        self.cap.release()
+        self.cap, self.source = cap, source
+        self.coord_scale = getattr(cap, "coordinate_scale", (1.0, 1.0))
+        self.pixel_scale = 1.0 / self.coord_scale[0]
+        self.ball_tracker = BallTracker(pixel_scale=self.pixel_scale)
+        self.ball_assigner = PlayerBallAssigner(pixel_scale=self.pixel_scale)
+        self.kick_detector = BallKickDetector(pixel_scale=self.pixel_scale)
+        self.event_detector.frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        # Offside candidates were taken in the old pixels
+        self.event_detector.candidate_history.clear()
+        self.reset_tracking()
+        self.scene_gate.reset()
+        self.pitch_boundary.invalidate()
+        logger.info("Switched analysis source to %s", source)
+
+    def _wait_for_source(self):
+        # The decoder caches the file length, so reopen it once more data
+        # has arrived and continue from the last frame read
+        self.cap.release()
+        while True:
+            time.sleep(self.growth_poll_seconds)
+            self.cap = cv2.VideoCapture(self.source)
+            if self.cap.isOpened() or not is_upload_in_progress(self.source):
                 break
-            try:
-                yield self.process(frame)
-            except Exception as e:
-                print(f"Frame processing error #{self.frame_count}: {e}")
-                continue
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.read_position)
+
+    def seek(self, frame_id):
+        """
+        Request that processing continues from `frame_id` (1-based, matching
+        the payload frame_id). Applied before the next frame is read.
+        """
+        self.pending_seek = max(1, int(frame_id))
+
+    def _apply_seek(self):
+        # Jump the capture so the next read returns the requested frame
+        target, self.pending_seek = self.pending_seek, None
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, target - 1)
+        self.read_position = target - 1
+        self.reset_tracking()
+        self.scene_gate.reset()
+        self.pitch_boundary.invalidate()
+
+    def reset_tracking(self):
+        # Motion and identity history is meaningless across a jump or cut
+        self.player_tracker.reset()
+        self.ball_tracker.reset()
+        self.kick_detector.reset()
+        self.event_detector.reset_out_of_play()
+        self.last_detections = []
+        self.last_player_possession = None
+
+    def _record_detections(self, frame_id, frame, is_cut, in_play, detections=None):
+        """
+        Append this frame to the detection log, with the shirt colours a
+        replay needs in place of pixels.
+        """
+        if self.detection_recorder is None:
+            return
+        flags = (DETECTED if detections is not None else 0) | (SCENE_CUT if is_cut else 0) \
+            | (IN_PLAY if in_play else 0)
+        detections = detections or []
+        colours = [self.team_assigner.extract_shirt_colour(frame, det[:4]) if int(det[4]) in (1, 2) else None
+                   for det in detections]
+        try:
+            self.detection_recorder.write(frame_id, flags, detections, colours)
+        except Exception as e:
+            logger.warning("Detection log write error: %s", e)
 
     def toggle_halftime(self):
         # Switch sides at half-time
@@ -79,115 +271,188 @@ class LiveProcessor:
         self.team_1_dir = 'left' if self.team_1_dir == 'right' else 'right'
         self.team_2_dir = 'left' if self.team_2_dir == 'right' else 'right'
 
-    def process(self, frame):
+    def _build_stages(self):
         """
-        Process a single frame and return:
-          • frame_id
-          • tracked objects
-          • detected events
+        The per-frame analysis as a stage graph (see core.pipeline). Order
+        matters: each stage comes after the producers of its inputs.
         """
-        self.frame_count += 1
-        frame_id = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
-
-        
+        return [
+            Stage("detect", self._stage_detect, optional=("frame",), outputs=("detections",)),
+            Stage("player_tracker", self._stage_players, inputs=("detections",), optional=("frame",),
+                  outputs=("player_tracks",)),
+            Stage("ball_tracker", self._stage_ball, inputs=("detections",), optional=("frame",),
+                  outputs=("ball_tracks",)),
+            Stage("combine", self._stage_combine, inputs=("player_tracks",), optional=("ball_tracks",),
+                  outputs=("tracks",)),
+            Stage("team_assigner", self._stage_teams, inputs=("tracks",), outputs=("team_tracks",)),
+            Stage("possession", self._stage_possession, inputs=("team_tracks",), outputs=("ball",)),
+            Stage("kick_detector", self._stage_kick, inputs=("ball", "team_tracks"), outputs=("kick",)),
+            Stage("pitch_boundary", self._stage_pitch, inputs=("frame",), outputs=("pitch",)),
+            Stage("event_detector", self._stage_events, inputs=("ball", "team_tracks"),
+                  optional=("kick", "pitch"), outputs=("event",)),
+        ]
 
-        # Skip processing during half-time
-        if self.halftime_mode:
-            return {"frame_id": frame_id, "tracks": [], "event": None}
+    def _stage_detect(self, ctx):
+        # Perform detection at configured interval (replays follow the recording)
+        if self.replaying:
+            run_detection = bool(self.cap.flags & DETECTED)
+        else:
+            run_detection = self.frame_count % self.detect_every == 0
+        if not run_detection:
+            # Trackers keep using the last detections
+            return {}
+        try:
+            detections = self.detector(ctx["frame"])
+        except Exception as e:
+            logger.warning("Detection error at frame %d: %s", self.frame_count, e)
+            detections = []
+        ctx["raw_detections"] = detections
 
-        # Perform detection at configured interval
-        if self.frame_count % self.detect_every == 0:
+        # Format detections for trackers
+        self.last_detections = []
+        for det in detections:
             try:
-                detections = self.detector(frame)
-            except Exception as e:
-                print(f"Detection error at frame {self.frame_count}: {e}")
-                detections = []
-
-            # Format detections for trackers
-            self.last_detections = []
-            for det in detections:
-                try:
-                    x1, y1, x2, y2, cls, conf = det
-                    self.last_detections.append({
-                        "bbox": [x1, y1, x2, y2],
-                        "cls": str(int(cls)),
-                        "conf": float(conf),
-                        "id": None
-                    })
-                except Exception:
-                    # Skip malformed detection
-                    continue
+                x1, y1, x2, y2, cls, conf = det
+                self.last_detections.append({
+                    "bbox": [x1, y1, x2, y2],
+                    "cls": str(int(cls)),
+                    "conf": float(conf),
+                    "id": None
+                })
+            except Exception:
+                # Skip malformed detection
+                continue
+        return {"detections": self.last_detections}
 
-        # Update player and ball trackers
+    def _stage_players(self, ctx):
         try:
-            player_tracks = self.player_tracker.update(self.last_detections, frame)
+            return {"player_tracks": self.player_tracker.update(ctx["detections"], ctx["frame"])}
         except Exception as e:
-            print(f"Player tracking error: {e}")
-            player_tracks = []
+            logger.warning("Player tracking error: %s", e)
+            return {"player_tracks": []}
 
+    def _stage_ball(self, ctx):
         try:
-            ball_tracks = self.ball_tracker.update(frame, self.last_detections)
+            return {"ball_tracks": self.ball_tracker.update(ctx["frame"], ctx["detections"])}
         except Exception as e:
-            print(f"Ball tracking error: {e}")
-            ball_tracks = []
+            logger.warning("Ball tracking error: %s", e)
+            return {"ball_tracks": []}
 
+    def _stage_combine(self, ctx):
         # Combine tracks and cast class labels to strings
-        all_tracks = player_tracks + ball_tracks
+        all_tracks = ctx["player_tracks"] + (ctx.get("ball_tracks") or [])
         for t in all_tracks:
             t['cls'] = str(t.get('cls', '2'))
+        return {"tracks": all_tracks}
 
+    def _stage_teams(self, ctx):
         # Assign teams based on color or position
         try:
-            team_tracks = self.team_assigner.assign(frame, all_tracks)
+            return {"team_tracks": self.team_assigner.assign(ctx["frame"], ctx["tracks"])}
         except Exception as e:
-            print(f"Team assignment error: {e}")
-            team_tracks = all_tracks
+            logger.warning("Team assignment error: %s", e)
+            return {"team_tracks": ctx["tracks"]}
 
+    def _stage_possession(self, ctx):
         # Identify the ball and assign possession
+        team_tracks = ctx["team_tracks"]
         ball = next((t for t in team_tracks if t['cls'] == '0'), None)
-        if ball:
-            try:
-                player_with_ball = self.ball_assigner.assign_ball_to_player(team_tracks, ball['bbox'])
-            except Exception as e:
-                print(f"Ball-to-player assigner error: {e}")
-                player_with_ball = -1
+        if ball is None:
+            return {}
+        try:
+            player_with_ball = self.ball_assigner.assign_ball_to_player(team_tracks, ball['bbox'])
+        except Exception as e:
+            logger.warning("Ball-to-player assigner error: %s", e)
+            player_with_ball = -1
+        ball['possessed_by'] = int(player_with_ball)
+        return {"ball": ball}
 
-            ball['possessed_by'] = int(player_with_ball)
-            try:
-                kicked = self.kick_detector.update(
-                    ball,
-                    next((p for p in team_tracks if p['id'] == player_with_ball), None),
-                    self.frame_count
-                )
-                ball['kicked'] = bool(kicked)
-            except Exception as e:
-                print(f"Kick detection error: {e}")
-                ball['kicked'] = False
+    def _stage_kick(self, ctx):
+        ball = ctx["ball"]
+        try:
+            kicked = self.kick_detector.update(ball, ctx["team_tracks"], self.frame_count)
+            ball['kicked'] = bool(kicked)
+            if kicked:
+                # Contact frame and kicker, for the offside snapshot
+                ball['kick_frame'] = self.kick_detector.contact_frame
+                ball['kicked_by'] = self.kick_detector.kicker_id
+        except Exception as e:
+            logger.warning("Kick detection error: %s", e)
+            ball['kicked'] = False
+        return {"kick": ball['kicked']}
+
+    def _stage_pitch(self, ctx):
+        # Cheap unless the camera moved; replays carry no pixels, so there
+        # is no boundary and no out-of-play calls
+        self.pitch_boundary.update(ctx["frame"])
+        return {"pitch": self.pitch_boundary}
 
+    def _stage_events(self, ctx):
         # Event detection (goals, fouls, etc.)
         try:
             event, event_text = self.event_detector.detect(
                 self.frame_count,
-                team_tracks,
-                ball,
+                ctx["team_tracks"],
+                ctx["ball"],
                 direction=self.team_1_dir,
                 last_player_possession=self.last_player_possession
             )
         except Exception as e:
-            print(f"Event detection error: {e}")
+            logger.warning("Event detection error: %s", e)
             event, event_text = None, None
+        return {"event": (event, event_text)}
 
-        # Prepare tracks for JSON serialization
+    def process(self, frame):
+        """
+        Process a single frame and return:
+          • frame_id
+          • tracked objects
+          • detected events
+        Analysis runs through the session's stage graph, so stages the
+        profile does not need, or whose inputs are missing, cost nothing.
+        """
+        self.frame_count += 1
+        frame_id = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+        set_log_context(frame_id=frame_id)
 
-        #adding an example of the TTS
-        if self.frame_count == 15:
-            event = "System Started"
-            event_text = "System Started"
+        # Skip processing during half-time
+        if self.halftime_mode:
+            return {"frame_id": frame_id, "tracks": [], "event": None}
+
+        # Replays, close-ups and crowd shots: no detection or tracking
+        if self.replaying:
+            is_cut, in_play = bool(self.cap.flags & SCENE_CUT), bool(self.cap.flags & IN_PLAY)
+        else:
+            is_cut, in_play = self.scene_gate.update(frame)
+        if is_cut:
+            self.reset_tracking()
+            # New camera: the pitch boundary is rebuilt from the next play frame
+            self.pitch_boundary.invalidate()
+        if not in_play:
+            self._record_detections(frame_id, frame, is_cut, in_play)
+            return {"frame_id": frame_id, "tracks": [], "event": None, "event_text": None}
+
+        ctx = {"frame": frame, "detections": self.last_detections}
+        self.pipeline.run(ctx, changed={"frame"})
+        self._record_detections(frame_id, frame, is_cut, in_play, ctx.get("raw_detections"))
 
+        team_tracks = ctx.get("team_tracks", ctx.get("tracks")) or []
+        event, event_text = ctx.get("event") or (None, None)
+        if "event" not in ctx:
+            # Not run this frame (e.g. no ball): nothing was decided
+            self.event_detector.last_event = (None, None)
+            self.event_detector.involved_ids = []
+
+        # Prepare tracks for JSON serialization
+        sx, sy = self.coord_scale
+        # Output copies: tracker-owned dicts keep proxy coordinates
+        team_tracks = [dict(t) for t in team_tracks]
         for t in team_tracks:
             t['id'] = int(t.get('id', -1))
-            t['bbox'] = [float(x) for x in t.get('bbox', [0,0,0,0])]
-            t['velocity'] = [float(v) for v in t.get('velocity', [0.0,0.0])]
+            x1, y1, x2, y2 = t.get('bbox', [0,0,0,0])
+            t['bbox'] = [float(x1) * sx, float(y1) * sy, float(x2) * sx, float(y2) * sy]
+            vx, vy = t.get('velocity', [0.0,0.0])
+            t['velocity'] = [float(vx) * sx, float(vy) * sy]
             t['team'] = int(t['team']) if t.get('team') is not None else None
             t['color'] = [int(c) for c in t.get('color', (128,128,128))]
             if 'kicked' in t:
@@ -195,6 +460,17 @@ class LiveProcessor:
             if 'possessed_by' in t:
                 t['possessed_by'] = int(t['possessed_by'])
 
+        # Index detections on the session timeline
+        if event:
+            self.event_store.append(
+                event,
+                frame_id=frame_id,
+                timestamp=(frame_id - 1) / self.fps,
+                text=event_text,
+                track_ids=self.event_detector.involved_ids,
+                positions={t['id']: t['bbox'] for t in team_tracks}
+            )
+
         # Return structured output
         return {
             "frame_id": frame_id,
@@ -0,0 +1,111 @@
+import numpy as np  # matrix operations for the filter
+
+
+class BallKalmanFilter:
+    """
+    Constant-acceleration Kalman filter for the ball centre in pixels.
+    State is [x, y, vx, vy, ax, ay] with one time step per frame.
+    Provides prediction, measurement updates and a Mahalanobis gate
+    so detections far from the predicted position can be rejected.
+    """
+    # 99% chi-square quantile for 2 degrees of freedom
+    GATE_THRESHOLD = 9.21
+
+    def __init__(self, dt=1.0, process_noise=2.0, measurement_noise=3.0):
+        dt = float(dt)
+        # State transition: p' = p + v*dt + a*dt^2/2, v' = v + a*dt, a' = a
+        self.F = np.eye(6)
+        self.F[0, 2] = self.F[1, 3] = dt
+        self.F[0, 4] = self.F[1, 5] = 0.5 * dt * dt
+        self.F[2, 4] = self.F[3, 5] = dt
+
+        # Only the centre position is observed
+        self.H = np.zeros((2, 6))
+        self.H[0, 0] = self.H[1, 1] = 1.0
+
+        # Process noise driven by random jerk on each axis
+        g = np.array([dt ** 3 / 6.0, dt ** 2 / 2.0, dt])
+        q_axis = np.outer(g, g) * float(process_noise) ** 2
+        self.Q = np.zeros((6, 6))
+        for axis in range(2):
+            idx = [axis, axis + 2, axis + 4]
+            self.Q[np.ix_(idx, idx)] = q_axis
+
+        # Measurement noise (pixels^2)
+        self.R = np.eye(2) * float(measurement_noise) ** 2
+
+        self.x = None  # state vector
+        self.P = None  # state covariance
+
+    @property
+    def initialised(self):
+        return self.x is not None
+
+    def initiate(self, position, velocity=None):
+        """
+        Start a new track at `position` with unknown acceleration. The
+        velocity is unknown too unless given, e.g. from two measurements.
+        """
+        self.x = np.array([position[0], position[1], 0.0, 0.0, 0.0, 0.0])
+        self.P = np.diag([self.R[0, 0], self.R[1, 1], 400.0, 400.0, 25.0, 25.0])
+        if velocity is not None:
+            # Difference of two measured centres
+            self.x[2:4] = velocity
+            self.P[2, 2] = 2 * self.R[0, 0]
+            self.P[3, 3] = 2 * self.R[1, 1]
+
+    def reset(self):
+        self.x = None
+        self.P = None
+
+    def predict(self):
+        """
+        Advance the state by one frame and return the predicted (x, y).
+        """
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        return self.position
+
+    def inflate(self, factor):
+        """
+        Scale the state covariance by `factor`, widening the gate while
+        the track runs without measurements.
+        """
+        self.P = self.P * float(factor)
+
+    def _innovation_cov(self, noise_scale=1.0):
+        return self.H @ self.P @ self.H.T + self.R * noise_scale
+
+    def update(self, position, noise_scale=1.0):
+        """
+        Correct the state with a measured centre.
+        `noise_scale` inflates the measurement noise for less reliable
+        sources such as optical flow.
+        """
+        z = np.asarray(position, dtype=float)
+        S = self._innovation_cov(noise_scale)
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ (z - self.H @ self.x)
+        self.P = (np.eye(6) - K @ self.H) @ self.P
+
+    def gating_distance(self, position):
+        """
+        Squared Mahalanobis distance between a measurement and the prediction.
+        """
+        d = np.asarray(position, dtype=float) - self.H @ self.x
+        return float(d @ np.linalg.inv(self._innovation_cov()) @ d)
+
+    @property
+    def position(self):
+        return (float(self.x[0]), float(self.x[1]))
+
+    @property
+    def velocity(self):
+        return (float(self.x[2]), float(self.x[3]))
+
+    @property
+    def position_std(self):
+        """
+        One-sigma positional uncertainty (sx, sy) in pixels.
+        """
+        return (float(np.sqrt(self.P[0, 0])), float(np.sqrt(self.P[1, 1])))
@@ -1,99 +1,219 @@
 import numpy as np  # numerical operations on arrays
 import cv2  # OpenCV for image processing and optical flow
-from collections import deque  # efficient queue for fixed-length history
 from utils.bbox_utils import get_centre  # helper to compute bounding box center
+from .ball_motion import BallKalmanFilter  # constant-acceleration motion model
 
 class BallTracker:
     """
-    Tracks the ball across frames using detection or optical flow.
-    Maintains a short history of positions to estimate velocity.
+    Tracks the ball across frames using detection, a Kalman motion model
+    and optical flow on a small patch around the ball.
+      • Detections are gated against the predicted position
+      • When detection misses, LK flow runs only inside a local window
+      • If flow also fails, the track coasts on the prediction for a while,
+        with a gate that widens on every such frame
+      • Low-confidence detections outside the gate re-acquire the ball once
+        `reacquire_frames` consecutive ones agree on a path (e.g. a kick)
+    Exposes the predicted position and its uncertainty for other stages.
+
+    Pixel thresholds are tuned for full-resolution video; `pixel_scale`
+    (frame width / full width, e.g. for an analysis proxy) scales them.
     """
-    def __init__(self, max_history=5):
+    def __init__(self, max_coast_frames=15, flow_radius=48, reacquire_frames=2, max_step=60,
+                 miss_inflation=1.5, pixel_scale=1.0):
         # Last known ball state (dict with id, bbox, cls, velocity)
         self.last_ball = None
-        # Deque to hold recent centres for velocity estimation
-        self.ball_history = deque(maxlen=max_history)
-        # Last estimated velocity vector [dx, dy]
-        self.last_velocity = [0.0, 0.0]
         # Unique identifier for the ball track
         self.ball_id = 1
-        # Previous grayscale frame for optical flow
-        self.prev_gray = None
-        # Previous bounding box for optical flow lane
-        self.prev_bbox = None
+        self.pixel_scale = float(pixel_scale)
+        # Motion model used for prediction, gating and velocity
+        self.kf = BallKalmanFilter(process_noise=2.0 * self.pixel_scale,
+                                   measurement_noise=3.0 * self.pixel_scale)
+        # Frames since the last detection or flow measurement
+        self.frames_coasting = 0
+        self.max_coast_frames = int(max_coast_frames)
+        # Half-size of the square window used for optical flow
+        self.flow_radius = max(8, int(round(flow_radius * self.pixel_scale)))
+        # Grayscale patch from the previous frame, its window [x1, y1, x2, y2]
+        # and the ball centre it was taken around
+        self.prev_patch = None
+        self.prev_window = None
+        self.prev_centre = None
+        # Ball size carried through flow and coasting frames (w, h)
+        self.ball_size = None
+        # Out-of-gate detections from consecutive frames, oldest first
+        self.jump_chain = []
+        self.reacquire_frames = max(2, int(reacquire_frames))
+        # Largest plausible ball travel per frame (px)
+        self.max_step = float(max_step) * self.pixel_scale
+        # Covariance growth per coasting frame
+        self.miss_inflation = float(miss_inflation)
+
+    @property
+    def predicted_position(self):
+        """
+        Predicted ball centre (x, y) for the current frame, or None.
+        """
+        return self.kf.position if self.kf.initialised else None
+
+    @property
+    def position_uncertainty(self):
+        """
+        One-sigma positional uncertainty (sx, sy) in pixels, or None.
+        """
+        return self.kf.position_std if self.kf.initialised else None
+
+    def reset(self):
+        """
+        Drop the current track, e.g. after a scene cut or seek.
+        """
+        self.last_ball = None
+        self.kf.reset()
+        self.frames_coasting = 0
+        self.prev_patch = None
+        self.prev_window = None
+        self.ball_size = None
+        self.jump_chain = []
 
     def update(self, frame, detections):
         """
         Update ball position and velocity for the current frame.
-        If a detection is available, use it; otherwise, fallback to LK optical flow.
+        If a gated detection is available, use it; otherwise, fall back to
+        LK optical flow around the prediction, then to the prediction alone.
+        `frame` may be None, in which case only detections are used.
         Returns a list containing the current ball track or empty if not found.
+        A track that was just re-acquired carries `reacquired_path`: the
+        measured centres for the frames before this one that it coasted through.
         """
-        # Validate frame input
-        if frame is None or not isinstance(frame, np.ndarray):
+        if frame is not None and not isinstance(frame, np.ndarray):
             return []
 
-        # Convert current frame to grayscale once
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # Advance the motion model to this frame
+        if self.kf.initialised:
+            self.kf.predict()
+
         # Choose the best ball detection among provided detections
         best_ball = self._select_best_ball(detections)
+        chain = None
+        if best_ball is None and self.kf.initialised:
+            chain = self._follow_jump(detections)
+        else:
+            self.jump_chain = []
+
+        if chain:
+            # The ball left the gate and the detections agree on where it
+            # went: restart the motion model on them
+            best_ball = chain[-1]
+            centres = [get_centre(d['bbox']) for d in chain]
+            self.kf.initiate(centres[-1], velocity=np.subtract(centres[-1], centres[-2]))
+            self.frames_coasting = 0
+            x1, y1, x2, y2 = best_ball['bbox']
+            self.ball_size = (x2 - x1, y2 - y1)
+            self._store_patch(frame, centres[-1])
+
+        elif best_ball:
+            centre = get_centre(best_ball['bbox'])
+            if self.kf.initialised:
+                self.kf.update(centre)
+            else:
+                self.kf.initiate(centre)
+            self.frames_coasting = 0
+            x1, y1, x2, y2 = best_ball['bbox']
+            self.ball_size = (x2 - x1, y2 - y1)
+            # Keep a small patch around the ball for flow on the next miss
+            self._store_patch(frame, centre)
+
+        elif self.kf.initialised:
+            flow_centre = self._track_patch(frame)
+            if flow_centre is not None:
+                # Flow is noisier than a detection
+                self.kf.update(flow_centre, noise_scale=4.0)
+                self.frames_coasting = 0
+                self._store_patch(frame, flow_centre)
+            else:
+                self.frames_coasting += 1
+                # Less and less is known about the ball: widen the gate
+                self.kf.inflate(self.miss_inflation)
+                self.prev_patch = None
+                self.prev_window = None
+                if self.frames_coasting > self.max_coast_frames:
+                    # Lost for too long: stop reporting a stale ball
+                    self.reset()
+                    return []
+        else:
+            return []
 
-        if best_ball:
-            # If a reliable detection exists, reset optical flow reference
-            self.prev_bbox = best_ball['bbox']
-            self.prev_gray = gray.copy()
-
-            # Compute centre of detected bounding box
-            cx, cy = get_centre(best_ball['bbox'])
-            # Append new centre to history
-            self.ball_history.append((cx, cy))
-            # Estimate velocity from history
-            velocity = self._estimate_velocity(self.ball_history)
-
-            # Update last_ball with detection results
-            self.last_ball = {
-                'id': self.ball_id,
-                'bbox': [float(x) for x in best_ball['bbox']],
-                'cls': '0',
-                'velocity': [float(v) for v in velocity]
-            }
-
-        elif self.last_ball and self.prev_gray is not None and self.prev_bbox is not None:
-            # If no detection, attempt optical flow from last known position
-            prev_point = np.array([get_centre(self.prev_bbox)], dtype=np.float32).reshape(-1,1,2)
-            next_point, status, _ = cv2.calcOpticalFlowPyrLK(
-                self.prev_gray, gray, prev_point, None
-            )
-            # Check if flow found a valid new point
-            if status[0][0] == 1:
-                new_cx, new_cy = next_point[0][0]
-                # Keep bounding box size constant
-                w = self.prev_bbox[2] - self.prev_bbox[0]
-                h = self.prev_bbox[3] - self.prev_bbox[1]
-                new_bbox = [new_cx - w/2, new_cy - h/2, new_cx + w/2, new_cy + h/2]
-
-                # Update previous references for next frame
-                self.prev_bbox = new_bbox
-                self.prev_gray = gray.copy()
-
-                # Append new optical-flow centre to history
-                self.ball_history.append((new_cx, new_cy))
-                velocity = self._estimate_velocity(self.ball_history)
-
-                # Update last_ball with optical flow results
-                self.last_ball = {
-                    'id': self.ball_id,
-                    'bbox': [float(x) for x in new_bbox],
-                    'cls': '0',
-                    'velocity': [float(v) for v in velocity]
-                }
-
-        # Return the most recent ball track, if one exists
-        return [self.last_ball] if self.last_ball else []
+        cx, cy = self.kf.position
+        w, h = self.ball_size
+        self.last_ball = {
+            'id': self.ball_id,
+            'bbox': [float(cx - w / 2), float(cy - h / 2), float(cx + w / 2), float(cy + h / 2)],
+            'cls': '0',
+            'velocity': [float(v) for v in self.kf.velocity]
+        }
+        if chain:
+            self.last_ball['reacquired_path'] = [[float(x), float(y)] for x, y in centres[:-1]]
+        return [self.last_ball]
+
+    def _window(self, frame, centre):
+        # Square window around centre, clamped to the frame
+        h, w = frame.shape[:2]
+        r = self.flow_radius
+        x1 = int(max(0, min(w - 1, centre[0] - r)))
+        y1 = int(max(0, min(h - 1, centre[1] - r)))
+        x2 = int(max(x1 + 1, min(w, centre[0] + r)))
+        y2 = int(max(y1 + 1, min(h, centre[1] + r)))
+        return [x1, y1, x2, y2]
+
+    def _store_patch(self, frame, centre):
+        # Convert only the local window to gray; the slice is a view, so the
+        # full frame is never copied
+        if frame is None:
+            self.prev_patch = None
+            self.prev_window = None
+            return
+        x1, y1, x2, y2 = self._window(frame, centre)
+        self.prev_patch = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+        self.prev_window = [x1, y1, x2, y2]
+        self.prev_centre = (float(centre[0]), float(centre[1]))
+
+    def _track_patch(self, frame):
+        """
+        Run LK optical flow for the last ball centre within the stored window,
+        seeded with the Kalman prediction. Returns the new centre or None.
+        """
+        if frame is None or self.prev_patch is None:
+            return None
+        x1, y1, x2, y2 = self.prev_window
+        h, w = frame.shape[:2]
+        if x2 > w or y2 > h:
+            return None
+        # Same window in the current frame so both patches align
+        patch = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+
+        last_x, last_y = self.prev_centre
+        pred_x, pred_y = self.kf.position
+        prev_point = np.array([[[last_x - x1, last_y - y1]]], dtype=np.float32)
+        guess = np.array([[[pred_x - x1, pred_y - y1]]], dtype=np.float32)
+        next_point, status, _ = cv2.calcOpticalFlowPyrLK(
+            self.prev_patch, patch, prev_point, guess,
+            winSize=(15, 15), maxLevel=2,
+            flags=cv2.OPTFLOW_USE_INITIAL_FLOW
+        )
+        if status is None or status[0][0] != 1:
+            return None
+
+        nx, ny = next_point[0][0]
+        centre = (float(nx + x1), float(ny + y1))
+        # Flow result must still agree with the motion model
+        if self.kf.gating_distance(centre) > BallKalmanFilter.GATE_THRESHOLD:
+            return None
+        return centre
 
     def _select_best_ball(self, detections):
         """
         From multiple ball detections (cls '0'), choose the most likely.
-        Combines distance from last known position and detection confidence.
+        Combines distance from the predicted position and detection confidence,
+        rejecting detections outside the Kalman gate unless very confident.
         Returns the selected detection dict or None if no valid match.
         """
         # Filter detections to only those labeled as ball
@@ -103,48 +223,85 @@ class BallTracker:
 
         best_ball = None
         best_score = float('inf')
+        best_outside_gate = False
 
-        # Weights to balance spatial and confidence terms
-        dist_weight = 1.0
+        # Weights to balance spatial and confidence terms; distances count
+        # in full-resolution pixels so reject_threshold keeps its meaning
+        dist_weight = 1.0 / self.pixel_scale
         conf_weight = 100.0
-        max_dist = 100      # pixels considered reasonable
         reject_threshold = 150
+        confident_jump = 0.6
 
         for det in balls:
             conf = float(det.get('conf', 0))
             cx, cy = get_centre(det['bbox'])
 
-            # Compute distance from last ball location if available
-            if self.last_ball:
-                lx, ly = get_centre(self.last_ball['bbox'])
-                dist = np.linalg.norm([cx - lx, cy - ly])
+            outside_gate = False
+            if self.kf.initialised:
+                px, py = self.kf.position
+                dist = np.linalg.norm([cx - px, cy - py])
+                outside_gate = self.kf.gating_distance((cx, cy)) > BallKalmanFilter.GATE_THRESHOLD
+                # Only confident detections may jump outside the gate
+                if outside_gate and conf <= confident_jump:
+                    continue
             else:
                 dist = 0
 
-            # Combine into a scoring function
-            score = dist * dist_weight + (1 - conf) * conf_weight
-            # Allow confident large jumps to override
-            if self.last_ball and dist > max_dist and conf > 0.6:
-                score -= 50
+            # Combine into a scoring function; a confident jump is scored on
+            # confidence alone so it can re-acquire the ball
+            score = (0 if outside_gate else dist * dist_weight) + (1 - conf) * conf_weight
 
             # Keep the detection with lowest score
             if score < best_score:
                 best_score = score
                 best_ball = det
+                best_outside_gate = outside_gate
 
         # Reject match if score too large
-        if best_score > reject_threshold:
+        if best_ball is None or best_score > reject_threshold:
             return None
 
+        if best_outside_gate:
+            # The ball re-appeared far away: restart the motion model there
+            self.kf.reset()
+
         return best_ball
 
-    def _estimate_velocity(self, history):
+    def _follow_jump(self, detections):
         """
-        Simple velocity: difference between last two centre points.
-        Returns [dx, dy]; zero if insufficient history.
+        Chain low-confidence ball detections outside the gate across
+        consecutive frames. Returns the chain, oldest first, once
+        `reacquire_frames` of them move consistently, otherwise None.
         """
-        if len(history) < 2:
-            return [0.0, 0.0]
-        x_prev, y_prev = history[-2]
-        x_curr, y_curr = history[-1]
-        return [x_curr - x_prev, y_curr - y_prev]
+        jumps = [d for d in detections if d.get('cls') == '0'
+                 and self.kf.gating_distance(get_centre(d['bbox'])) > BallKalmanFilter.GATE_THRESHOLD]
+        if not jumps:
+            self.jump_chain = []
+            return None
+
+        if self.jump_chain:
+            # Where the chain's own motion puts the ball in this frame
+            centres = [np.array(get_centre(d['bbox'])) for d in self.jump_chain[-2:]]
+            last = centres[-1]
+            expected = 2 * last - centres[0] if len(centres) > 1 else last
+        else:
+            last = expected = np.array(self.kf.position)
+
+        det = min(jumps, key=lambda d: float(np.hypot(*(get_centre(d['bbox']) - expected))))
+        centre = np.array(get_centre(det['bbox']))
+        if self.jump_chain:
+            step_ok = np.hypot(*(centre - last)) <= self.max_step
+            path_ok = len(self.jump_chain) < 2 or np.hypot(*(centre - expected)) <= self.max_step / 2
+            if not (step_ok and path_ok):
+                # Does not continue the chain: start a new one from here
+                self.jump_chain = []
+                last = np.array(self.kf.position)
+        if not self.jump_chain and np.hypot(*(centre - last)) > self.max_step * (self.frames_coasting + 2):
+            # Too far from the track to be the same ball
+            return None
+
+        self.jump_chain.append(det)
+        if len(self.jump_chain) < self.reacquire_frames:
+            return None
+        chain, self.jump_chain = self.jump_chain, []
+        return chain
@@ -1,21 +1,38 @@
 import numpy as np  # array operations for numerical data
 import supervision as sv  # supervision library for ByteTrack
 from utils.bbox_utils import get_centre  # helper to compute bounding box center
+from .track_store import TrackStore  # bounded per-track histories
+from utils.logging_utils import get_logger  # pipeline logging
+
+logger = get_logger(__name__)
 
 class PlayerTracker:
     """
     Tracks player objects across video frames using ByteTrack,
     maintains history for velocity estimation, and ensures class stability.
+    Per-track state lives in a bounded TrackStore; tracks lost for longer
+    than `lost_horizon` frames are evicted and listeners notified.
     """
-    def __init__(self):
+    def __init__(self, history_len=5, lost_horizon=60):
         # ByteTrack tracker instance
         self.tracker = sv.ByteTrack()
-        # Dictionary mapping track ID -> list of past center coordinates
-        self.previous_positions = {}
-        # Dictionary mapping track ID -> last known object class
-        self.class_history = {}
-        # Dictionary mapping track ID -> previous team assignment (optional)
-        self.prev_assignments = {}
+        # Live track histories, stable classes and lifecycle
+        self.store = TrackStore(history_len=history_len, lost_horizon=lost_horizon)
+        # Number of update() calls, used as the store's clock
+        self.frame_index = 0
+        # Added to ByteTrack IDs so IDs stay unique across reset()
+        self.id_offset = 0
+        self.max_id = 0
+
+    def reset(self):
+        """
+        Drop every track, e.g. after a scene cut: identities cannot be
+        carried across shots. Listeners see each track evicted.
+        """
+        self.tracker = sv.ByteTrack()
+        self.store.clear(self.frame_index)
+        # The new tracker counts from 1 again; keep issuing fresh IDs
+        self.id_offset = self.max_id
 
     def update(self, detections, frame):
         """
@@ -23,6 +40,10 @@ class PlayerTracker:
         Filters out non-player classes, runs tracker, stabilizes class labels,
         estimates velocity, and returns formatted track output.
         """
+        self.frame_index += 1
+        # Drop tracks ByteTrack can no longer revive
+        self.store.evict_lost(self.frame_index)
+
         # Extract bounding boxes, class IDs, and confidences for players/referees
         xyxy, class_ids, confidences = [], [], []
         for det in detections:
@@ -58,7 +79,8 @@ class PlayerTracker:
         for r in results:
             x1, y1, x2, y2 = r[0]       # bounding box coordinates
             cls = int(r[3])             # class ID from tracker
-            tid = int(r[4])             # unique track ID
+            tid = int(r[4]) + self.id_offset  # unique track ID
+            self.max_id = max(self.max_id, tid)
 
             # Ignore duplicates from tracker output
             if tid in seen_ids:
@@ -66,27 +88,20 @@ class PlayerTracker:
             seen_ids.add(tid)
 
             # If class has changed, retain previous class to avoid jitter
-            if tid in self.class_history:
-                if self.class_history[tid] != cls:
-                    print(f"[SWITCH] Track {tid} class changed from {self.class_history[tid]} to {cls}, reverting.")
-                    cls = self.class_history[tid]
-                    # Remove previous team assignment to force reassign if needed
-                    self.prev_assignments.pop(tid, None)
-            # Store class if first time seeing this track
-            self.class_history[tid] = cls
-
-            # Compute center of the bounding box for velocity estimation
+            if not self.store.observe(tid, self.frame_index, cls):
+                stable_cls = self.store.get_class(tid)
+                if stable_cls != cls:
+                    logger.debug("[SWITCH] Track %s class changed from %s to %s, reverting.", tid, stable_cls, cls)
+                    cls = stable_cls
+                    # Let other stages (e.g. team assignment) re-evaluate this track
+                    self.store.class_changed(tid)
+
+            # Compute center of the bounding box and add it to the ring history
             cx, cy = get_centre([x1, y1, x2, y2])
-            # Initialize history if needed, then append new center
-            if tid not in self.previous_positions:
-                self.previous_positions[tid] = []
-            self.previous_positions[tid].append((cx, cy))
-            # Keep only the last 5 positions to limit memory
-            if len(self.previous_positions[tid]) > 5:
-                self.previous_positions[tid] = self.previous_positions[tid][-5:]
+            self.store.push_position(tid, (cx, cy))
 
             # Estimate velocity vector based on position history
-            velocity = self._estimate_velocity(self.previous_positions[tid])
+            velocity = self.store.velocity(tid)
 
             # Format track dictionary for output
             tracks_out.append({
@@ -97,15 +112,3 @@ class PlayerTracker:
             })
 
         return tracks_out
-
-    def _estimate_velocity(self, history):
-        """
-        Estimate simple frame-to-frame velocity from history of centers.
-        Returns zero velocity if insufficient data.
-        """
-        if len(history) < 2:
-            return [0.0, 0.0]
-        # Difference between the last two center positions
-        dx = history[-1][0] - history[-2][0]
-        dy = history[-1][1] - history[-2][1]
-        return [dx, dy]
@@ -0,0 +1,160 @@
+import numpy as np  # fixed-size per-track histories
+from collections import OrderedDict  # bounded, insertion-ordered tombstones
+from utils.logging_utils import get_logger  # pipeline logging
+
+logger = get_logger(__name__)
+
+class TrackStore:
+    """
+    Bounded lifecycle store for tracked objects.
+      • Each live track owns a slot in preallocated NumPy arrays holding a
+        fixed-size ring of recent centres, its class and last-seen frame
+      • Tracks not seen for `lost_horizon` frames are evicted and their slot
+        is reused, so memory follows the number of live tracks, not the
+        number of IDs ever issued
+      • Evicted IDs are kept as tombstones (bounded) and listeners are
+        notified so other stages can drop their per-track state
+    """
+    def __init__(self, history_len=5, lost_horizon=60, initial_capacity=64, max_tombstones=1024):
+        self.history_len = int(history_len)
+        self.lost_horizon = int(lost_horizon)
+        self.max_tombstones = int(max_tombstones)
+
+        # Slot arrays, grown by doubling only if more tracks are live at once
+        self._allocate(int(initial_capacity))
+
+        # Track ID -> slot index for live tracks
+        self.slot_of = {}
+        # Track ID -> frame it was evicted at, oldest first
+        self.tombstones = OrderedDict()
+        # Callbacks invoked as callback(track_id, reason)
+        self.listeners = []
+
+    def _allocate(self, capacity):
+        old = getattr(self, "positions", None)
+        positions = np.zeros((capacity, self.history_len, 2), dtype=np.float32)
+        counts = np.zeros(capacity, dtype=np.int64)
+        classes = np.zeros(capacity, dtype=np.int16)
+        last_seen = np.zeros(capacity, dtype=np.int64)
+        ids = np.full(capacity, -1, dtype=np.int64)
+        if old is not None:
+            n = len(old)
+            positions[:n] = self.positions
+            counts[:n] = self.counts
+            classes[:n] = self.classes
+            last_seen[:n] = self.last_seen
+            ids[:n] = self.ids
+            free = list(range(capacity - 1, n - 1, -1)) + self.free_slots
+        else:
+            free = list(range(capacity - 1, -1, -1))
+        self.positions = positions    # ring of recent centres per slot
+        self.counts = counts          # total centres written per slot
+        self.classes = classes        # stable class per slot
+        self.last_seen = last_seen    # frame index of last observation
+        self.ids = ids                # track ID per slot, -1 when free
+        self.free_slots = free
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def __contains__(self, track_id):
+        return track_id in self.slot_of
+
+    def add_listener(self, callback):
+        """
+        Register callback(track_id, reason) for "evicted" and
+        "class_changed" notifications.
+        """
+        self.listeners.append(callback)
+
+    def is_tombstoned(self, track_id):
+        return track_id in self.tombstones
+
+    def observe(self, track_id, frame_index, cls):
+        """
+        Mark a track as seen on this frame, creating it if needed.
+        Returns True if the track is new.
+        """
+        slot = self.slot_of.get(track_id)
+        is_new = slot is None
+        if is_new:
+            if not self.free_slots:
+                self._allocate(len(self.ids) * 2)
+            slot = self.free_slots.pop()
+            self.slot_of[track_id] = slot
+            self.ids[slot] = track_id
+            self.counts[slot] = 0
+            self.classes[slot] = cls
+            # A revived ID starts fresh
+            self.tombstones.pop(track_id, None)
+        self.last_seen[slot] = frame_index
+        return is_new
+
+    def get_class(self, track_id):
+        return int(self.classes[self.slot_of[track_id]])
+
+    def class_changed(self, track_id):
+        """
+        Notify listeners that a track's class label was unstable.
+        """
+        self._notify(track_id, "class_changed")
+
+    def push_position(self, track_id, centre):
+        """
+        Append a centre to the track's ring history.
+        """
+        slot = self.slot_of[track_id]
+        self.positions[slot, self.counts[slot] % self.history_len] = centre
+        self.counts[slot] += 1
+
+    def velocity(self, track_id):
+        """
+        Frame-to-frame velocity from the two most recent centres.
+        Returns zero velocity if insufficient data.
+        """
+        slot = self.slot_of[track_id]
+        n = self.counts[slot]
+        if n < 2:
+            return [0.0, 0.0]
+        curr = self.positions[slot, (n - 1) % self.history_len]
+        prev = self.positions[slot, (n - 2) % self.history_len]
+        return [float(curr[0] - prev[0]), float(curr[1] - prev[1])]
+
+    def evict_lost(self, frame_index):
+        """
+        Evict every live track unseen for more than `lost_horizon` frames.
+        Work is proportional to the slot count, which follows live tracks.
+        Returns the list of evicted IDs.
+        """
+        if not self.slot_of:
+            return []
+        stale = np.nonzero((self.ids >= 0) & (frame_index - self.last_seen > self.lost_horizon))[0]
+        evicted = []
+        for slot in stale:
+            track_id = int(self.ids[slot])
+            self._evict(track_id, slot, frame_index)
+            evicted.append(track_id)
+        return evicted
+
+    def clear(self, frame_index=0):
+        """
+        Evict every live track, e.g. after a scene cut.
+        """
+        for track_id, slot in list(self.slot_of.items()):
+            self._evict(track_id, slot, frame_index)
+
+    def _evict(self, track_id, slot, frame_index):
+        del self.slot_of[track_id]
+        self.ids[slot] = -1
+        self.free_slots.append(int(slot))
+        self.tombstones[track_id] = frame_index
+        while len(self.tombstones) > self.max_tombstones:
+            self.tombstones.popitem(last=False)
+        self._notify(track_id, "evicted")
+
+    def _notify(self, track_id, reason):
+        for callback in self.listeners:
+            try:
+                callback(track_id, reason)
+            except Exception as e:
+                logger.warning("Track listener error for %s: %s", track_id, e)
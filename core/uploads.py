@@ -0,0 +1,122 @@
+import hashlib  # running digest of uploaded bytes
+import os  # file system operations
+
+# Marker file present next to a video while its upload is still in progress
+PARTIAL_SUFFIX = ".partial"
+# Bytes kept from the start of the upload to identify the container
+HEAD_BYTES = 64 * 1024
+# Extra bytes to receive past the container header before starting analysis
+START_MARGIN_BYTES = 4 * 1024 * 1024
+
+
+def is_upload_in_progress(path):
+    """
+    Return True while `path` is still being written by a chunked upload.
+    """
+    return isinstance(path, str) and os.path.exists(path + PARTIAL_SUFFIX)
+
+
+def progressive_start_offset(head):
+    """
+    Inspect the first bytes of a video and decide whether it can be decoded
+    before the whole file has arrived.
+
+    Returns:
+      int or None: number of bytes that must be on disk before decoding can
+      start, or None if the container needs the complete file (e.g. MP4
+      with its index written at the end) or is not recognised.
+    """
+    # Matroska / WebM (EBML header): cluster-based, readable as it grows
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return START_MARGIN_BYTES
+    # MPEG transport stream: 188-byte packets starting with a sync byte
+    if len(head) >= 376 and head[0] == 0x47 and head[188] == 0x47:
+        return START_MARGIN_BYTES
+
+    # ISO base media (MP4/MOV): walk the top-level boxes
+    offset = 0
+    while offset + 8 <= len(head):
+        size = int.from_bytes(head[offset:offset + 4], "big")
+        box = head[offset + 4:offset + 8]
+        if size == 1:
+            # 64-bit box size follows the type
+            if offset + 16 > len(head):
+                return None
+            size = int.from_bytes(head[offset + 8:offset + 16], "big")
+        if box == b"moof":
+            # Fragmented MP4: every fragment carries its own index
+            return offset + START_MARGIN_BYTES
+        if box == b"moov":
+            # Index before the media data ("faststart"): wait for the full index
+            return offset + size + START_MARGIN_BYTES
+        if box == b"mdat" or size < 8:
+            # Media data before the index: frames cannot be located yet
+            return None
+        offset += size
+    return None
+
+
+class ChunkedUploadWriter:
+    """
+    Writes an upload to disk one chunk at a time:
+      • Memory use is bounded by the chunk size
+      • A SHA-256 digest is computed as bytes arrive
+      • A ".partial" marker exists until finish() so readers can follow
+        the file while it grows
+    """
+    def __init__(self, path):
+        self.path = path
+        self.hasher = hashlib.sha256()
+        self.bytes_written = 0
+        # First bytes of the file, used for container detection
+        self.head = bytearray()
+        # Bytes needed before analysis may start; None means "after upload"
+        self.start_offset = None
+        self._head_checked = False
+
+        # Create the marker before the file so readers never see a "complete" stub
+        open(self.path + PARTIAL_SUFFIX, "wb").close()
+        self.file = open(self.path, "wb")
+
+    def write(self, chunk):
+        """
+        Append a chunk, update the digest and flush it to disk.
+        """
+        if not chunk:
+            return
+        self.file.write(chunk)
+        # Make the bytes visible to decoders reading the growing file
+        self.file.flush()
+        self.hasher.update(chunk)
+        self.bytes_written += len(chunk)
+
+        if len(self.head) < HEAD_BYTES:
+            self.head += chunk[:HEAD_BYTES - len(self.head)]
+        if not self._head_checked and len(self.head) >= HEAD_BYTES:
+            self._head_checked = True
+            self.start_offset = progressive_start_offset(bytes(self.head))
+
+    @property
+    def ready_for_analysis(self):
+        """
+        True once enough of a progressive container is on disk to start decoding.
+        """
+        return self.start_offset is not None and self.bytes_written >= self.start_offset
+
+    def finish(self):
+        """
+        Close the file, remove the in-progress marker and return the hex digest.
+        """
+        self.file.close()
+        if os.path.exists(self.path + PARTIAL_SUFFIX):
+            os.remove(self.path + PARTIAL_SUFFIX)
+        return self.hasher.hexdigest()
+
+    def abort(self):
+        """
+        Discard a failed upload and its marker.
+        """
+        self.file.close()
+        for p in (self.path, self.path + PARTIAL_SUFFIX):
+            if os.path.exists(p):
+                os.remove(p)
@@ -0,0 +1,428 @@
+"""
+Worker processes that run queued analysis jobs.
+
+    python -m core.worker --workers 2 --threads-per-worker 4 --sessions-per-worker 3
+
+Each worker claims jobs from the JobQueue, runs them through LiveProcessor
+(or MultiCameraProcessor) and appends results incrementally, so a job keeps
+going without any client connected and a restarted worker resumes where
+the previous one stopped.
+
+A worker can run several sessions at once, one thread each, sharing one
+detector and the worker's CPU budget (see core.scheduler); it only takes
+another job while its running sessions keep up.
+
+Jobs with params["kind"] == "proxy" transcode an upload into an analysis
+proxy (see core.proxy) instead. Each worker runs one of them at a time on
+a thread of its own, outside the session budget, so analysis never waits
+for a transcode: it starts on the upload and moves onto the proxy at its
+first checkpoint after the proxy is complete.
+"""
+import argparse  # command-line interface
+import os  # paths and process ids
+import sys  # exit codes
+import threading  # concurrent sessions in one worker
+import multiprocessing as mp  # worker processes
+
+from .jobs import JobQueue, QUEUED, DONE, FAILED, CANCELLED, SUSPENDED, ANALYSIS, PROXY
+from .results import ResultWriter, recover
+from .checkpoint import Checkpointer, CHECKPOINT_SUFFIX
+from .proxy import build_proxy, proxy_ready
+from .profiling import FrameProfiler, profile_output_path
+from .pipeline import DEFAULT_PROFILE
+from .scheduler import AdmissionController, apply_thread_budget, plan_threads
+from utils.logging_utils import configure_logging, get_logger, set_log_context
+
+logger = get_logger(__name__)
+
+# Check for control commands every this many frames
+COMMAND_POLL_FRAMES = 10
+# Write progress to the queue every this many frames
+PROGRESS_EVERY = 25
+# Checkpoint the pipeline state every this many frames
+CHECKPOINT_EVERY = 250
+
+
+def result_prefix(results_dir, job_id):
+    return os.path.join(results_dir, job_id)
+
+
+def build_processor(job, detector=None):
+    """
+    Create the processor for a job from its stored parameters.
+    `detector` is the worker's shared detector, if any.
+    """
+    # Imported here so only worker processes load the model stack
+    from .stream import LiveProcessor
+    from .multicam import MultiCameraProcessor
+
+    params = job["params"]
+    source = params.get("source", job["video_path"])
+    if params.get("cameras"):
+        processor = MultiCameraProcessor(params["cameras"], detector=detector, session_id=job["id"],
+                                         profile=params.get("pipeline", DEFAULT_PROFILE))
+    else:
+        processor = LiveProcessor(
+            source=source,
+            attacking_dir=params.get("direction", "right"),
+            session_id=job["id"],
+            detector=detector,
+            profile=params.get("pipeline", DEFAULT_PROFILE)
+        )
+    if params.get("halftime"):
+        # Restore sides switched before a restart
+        processor.toggle_halftime()
+    return processor
+
+
+def _captures(processor):
+    feeds = getattr(processor, "feeds", None)
+    if feeds is not None:
+        return [feed.processor.cap for feed in feeds]
+    return [processor.cap]
+
+
+def start_profile(processor, results_dir, job_id, args):
+    """
+    Arm a FrameProfiler requested through the "profile" command.
+    Multi-camera jobs profile the first camera's pipeline.
+    """
+    feeds = getattr(processor, "feeds", None)
+    target = feeds[0].processor if feeds else processor
+    if "process" in target.__dict__:
+        logger.warning("Job %s: a profile is already running", job_id)
+        return
+    mode = args.get("mode", "cprofile")
+    path = profile_output_path(results_dir, job_id, args["profile_id"], mode)
+    FrameProfiler(target, args.get("frames", 100), mode, path).arm()
+
+
+def analysis_source(jobs, job):
+    """
+    The file an analysis job decodes: its proxy if one is complete at the
+    job's first start, else the upload (see switch_to_proxy). The choice
+    is stored so a resumed job (and its checkpoints) keep the same
+    coordinates.
+    """
+    params = job["params"]
+    if "source" not in params:
+        proxy = params.get("proxy")
+        params["source"] = proxy if proxy and proxy_ready(proxy) else job["video_path"]
+        jobs.update_params(job["id"], source=params["source"])
+    return params["source"]
+
+
+def switch_to_proxy(jobs, job, processor):
+    """
+    Move a job that is decoding its upload onto the proxy once the proxy
+    is complete. Called at checkpoints, so the next checkpoint saved is
+    already in proxy coordinates. Returns True if the source changed.
+    """
+    params = job["params"]
+    proxy = params.get("proxy")
+    if not proxy or params.get("source") == proxy or getattr(processor, "feeds", None):
+        return False
+    if not proxy_ready(proxy):
+        return False
+    try:
+        processor.switch_source(proxy)
+    except Exception as e:
+        logger.warning("Job %s: cannot switch to proxy %s: %s", job["id"], proxy, e)
+        return False
+    params["source"] = proxy
+    jobs.update_params(job["id"], source=proxy)
+    return True
+
+
+def run_proxy_job(jobs, job, stop_event=None):
+    """
+    Transcode a job's video into the proxy named by params["proxy"].
+    """
+    job_id = job["id"]
+    set_log_context(session_id=job_id)
+    cancelled = False
+
+    def should_stop():
+        nonlocal cancelled
+        cancelled = cancelled or any(command == "cancel" for command, _ in jobs.take_commands(job_id))
+        return cancelled or (stop_event is not None and stop_event.is_set())
+
+    try:
+        frames = build_proxy(job["video_path"], job["params"]["proxy"],
+                             progress=lambda done, total: jobs.update_progress(job_id, done, total),
+                             should_stop=should_stop)
+    except Exception as e:
+        logger.exception("Proxy job %s failed: %s", job_id, e)
+        jobs.finish(job_id, FAILED, error=str(e))
+        return FAILED
+    if frames is None:
+        # Stopped: a requeued proxy is rebuilt from the start
+        status = CANCELLED if cancelled else QUEUED
+    else:
+        jobs.update_progress(job_id, frames, frames)
+        status = DONE
+    jobs.finish(job_id, status)
+    return status
+
+
+def run_job(jobs, job, results_dir, stop_event=None, detector=None, admission=None):
+    """
+    Process one claimed job to its result files and record the outcome.
+    A set `stop_event` puts the job back in the queue to be resumed later;
+    a "suspend" command parks it as SUSPENDED until JobQueue.resume().
+    Processed frames are reported to `admission`, if given.
+
+    Single-camera jobs are checkpointed every CHECKPOINT_EVERY frames. A
+    resumed job restores the latest checkpoint and re-runs the frames
+    between it and the last stored result without writing them again, so
+    result files stay append-only for readers following them.
+    """
+    import cv2
+
+    if job["params"].get("kind") == PROXY:
+        return run_proxy_job(jobs, job, stop_event)
+    job_id = job["id"]
+    set_log_context(session_id=job_id)
+    prefix = result_prefix(results_dir, job_id)
+    start_frame = recover(prefix)
+    analysis_source(jobs, job)
+
+    try:
+        processor = build_processor(job, detector=detector)
+    except Exception as e:
+        logger.error("Job %s could not start: %s", job_id, e)
+        jobs.finish(job_id, FAILED, error=str(e))
+        return FAILED
+
+    total = int(_captures(processor)[0].get(cv2.CAP_PROP_FRAME_COUNT))
+    halftime = bool(job["params"].get("halftime"))
+    checkpoints = None
+    if not getattr(processor, "feeds", None):
+        checkpoints = Checkpointer(prefix + CHECKPOINT_SUFFIX, every=CHECKPOINT_EVERY)
+    restored = checkpoints.restore(processor) if checkpoints and start_frame else None
+    if restored is not None and restored <= start_frame:
+        logger.info("Job %s resuming from checkpoint at frame %d (results to %d)",
+                    job_id, restored, start_frame)
+        if processor.halftime_mode != halftime:
+            # Switched after the checkpoint; the stored parameter is current
+            processor.toggle_halftime()
+    elif start_frame:
+        logger.info("Job %s resuming after frame %d", job_id, start_frame)
+        processor.seek(start_frame + 1)
+
+    writer = ResultWriter(prefix)
+    # Frames up to start_frame are already stored, events included
+    processor.event_store.add_listener(
+        lambda event: writer.write_event(event) if event["frame_id"] > start_frame else None)
+    status, error, last_frame, frames = DONE, None, start_frame, 0
+    frames_iter = iter(processor)
+    try:
+        for payload in frames_iter:
+            frames += 1
+            if admission is not None:
+                admission.record(job_id)
+            if payload["frame_id"] > start_frame:
+                writer.write_frame(payload["frame_id"], payload.get("tracks", []))
+                last_frame = payload["frame_id"]
+                if checkpoints is not None and checkpoints.due(last_frame):
+                    # The checkpoint must not be ahead of the stored results
+                    writer.flush()
+                    switch_to_proxy(jobs, job, processor)
+                    _save_checkpoint(checkpoints, processor, last_frame)
+
+            if frames % COMMAND_POLL_FRAMES == 0:
+                for command, args in jobs.take_commands(job_id):
+                    if command == "cancel":
+                        status = CANCELLED
+                    elif command == "suspend" and status != CANCELLED:
+                        # Checkpoint below and free this worker until resumed
+                        status = SUSPENDED
+                    elif command == "halftime":
+                        processor.toggle_halftime()
+                        halftime = not halftime
+                        jobs.update_params(job_id, halftime=halftime)
+                    elif command == "profile":
+                        try:
+                            start_profile(processor, results_dir, job_id, args)
+                        except Exception as e:
+                            logger.warning("Job %s: cannot start profile: %s", job_id, e)
+                    else:
+                        logger.warning("Job %s: unknown command %r", job_id, command)
+                if status in (CANCELLED, SUSPENDED):
+                    logger.info("Job %s %s at frame %d", job_id, status, last_frame)
+                    break
+            if stop_event is not None and stop_event.is_set():
+                # Worker shutting down: leave the job for the next worker
+                status = QUEUED
+                break
+            if frames % PROGRESS_EVERY == 0:
+                jobs.update_progress(job_id, last_frame, total)
+    except Exception as e:
+        logger.exception("Job %s failed: %s", job_id, e)
+        status, error = FAILED, str(e)
+    finally:
+        frames_iter.close()
+        writer.close()
+        if checkpoints is not None:
+            if status in (DONE, CANCELLED):
+                checkpoints.remove()
+            elif status in (QUEUED, SUSPENDED) and last_frame > start_frame:
+                # Stopped between checkpoints: save the state reached
+                _save_checkpoint(checkpoints, processor, last_frame)
+        for cap in _captures(processor):
+            cap.release()
+
+    jobs.update_progress(job_id, last_frame, total)
+    jobs.finish(job_id, status, error=error)
+    logger.info("Job %s %s after %d frames", job_id, status, last_frame)
+    return status
+
+
+def _save_checkpoint(checkpoints, processor, frame_id):
+    # A failed checkpoint only costs reprocessing after a restart
+    try:
+        checkpoints.save(processor, frame_id)
+    except Exception as e:
+        logger.warning("Checkpoint at frame %d failed: %s", frame_id, e)
+
+
+def worker_loop(db_path, results_dir, poll_seconds=1.0, stop_event=None, threads=None, log_level=None,
+                sessions=1, min_fps=None):
+    """
+    Claim and run jobs until `stop_event` is set, up to `sessions` at a
+    time. With `min_fps`, another job is only taken while every running
+    one processes comfortably above that rate.
+    """
+    configure_logging(level=log_level)
+    if threads:
+        apply_thread_budget(threads)
+    os.makedirs(results_dir, exist_ok=True)
+    jobs = JobQueue(db_path)
+    jobs.requeue_orphans()
+    stop_event = stop_event or mp.Event()
+    admission = AdmissionController(max_sessions=sessions, min_fps=min_fps)
+
+    scheduler, detector = None, None
+    if admission.max_sessions > 1:
+        # One model per worker; concurrent sessions' frames are batched
+        from .detectors.factory import create_detector
+        from .detectors.batch_scheduler import InferenceScheduler, ScheduledDetector
+        scheduler = InferenceScheduler(create_detector(), max_batch=admission.max_sessions)
+        detector = ScheduledDetector(scheduler)
+
+    def run(job):
+        try:
+            run_job(jobs, job, results_dir, stop_event=stop_event, detector=detector, admission=admission)
+        finally:
+            admission.release(job["id"])
+
+    logger.info("Worker %d ready (%d session(s))", os.getpid(), admission.max_sessions)
+    running, transcoder = [], None
+    try:
+        while not stop_event.is_set():
+            running = [t for t in running if t.is_alive()]
+            if transcoder is None or not transcoder.is_alive():
+                # One proxy build at a time, beside the analysis sessions
+                proxy_job = jobs.claim(os.getpid(), kind=PROXY)
+                transcoder = None
+                if proxy_job is not None:
+                    transcoder = threading.Thread(target=run_proxy_job, args=(jobs, proxy_job, stop_event),
+                                                  name=f"proxy-{proxy_job['id']}", daemon=True)
+                    transcoder.start()
+            job = jobs.claim(os.getpid(), kind=ANALYSIS) if admission.can_admit() else None
+            if job is None:
+                stop_event.wait(poll_seconds)
+                continue
+            admission.register(job["id"])
+            # A thread even for a single session, so this loop keeps taking proxy jobs
+            thread = threading.Thread(target=run, args=(job,), name=f"session-{job['id']}", daemon=True)
+            thread.start()
+            running.append(thread)
+    finally:
+        # Running sessions see the stop event and requeue their jobs
+        for thread in running + ([transcoder] if transcoder is not None else []):
+            thread.join()
+        if scheduler is not None:
+            scheduler.stop()
+
+
+class WorkerPool:
+    """
+    A fixed number of worker processes sharing one job queue.
+    Stopping the pool returns in-progress jobs to the queue.
+    """
+    def __init__(self, db_path, results_dir, workers=1, threads_per_worker=None, log_level=None,
+                 sessions_per_worker=1, min_fps=None):
+        self.db_path = db_path
+        self.results_dir = results_dir
+        self.workers = max(0, int(workers))
+        self.threads_per_worker = threads_per_worker
+        self.log_level = log_level
+        self.sessions_per_worker = max(1, int(sessions_per_worker))
+        self.min_fps = min_fps
+        # Spawned workers: no inherited event loop, threads or model state
+        self.ctx = mp.get_context("spawn")
+        self.stop_event = self.ctx.Event()
+        self.processes = []
+
+    def start(self):
+        for i in range(self.workers):
+            process = self.ctx.Process(
+                target=worker_loop,
+                args=(self.db_path, self.results_dir),
+                kwargs={
+                    "stop_event": self.stop_event,
+                    "threads": self.threads_per_worker,
+                    "log_level": self.log_level,
+                    "sessions": self.sessions_per_worker,
+                    "min_fps": self.min_fps
+                },
+                name=f"analysis-worker-{i}",
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+        logger.info("Started %d analysis worker(s)", self.workers)
+
+    def stop(self, timeout=10.0):
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning("Worker %s did not stop in time; terminating", process.pid)
+                process.terminate()
+        self.processes.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run queued match analysis jobs.")
+    parser.add_argument("--db", default=os.environ.get("VAR_JOBS_DB", "jobs.db"), help="job queue database")
+    parser.add_argument("--results-dir", default="results", help="directory for result files")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("-t", "--threads-per-worker", type=int, default=None,
+                        help="CPU threads per worker (default: cores / workers)")
+    parser.add_argument("-s", "--sessions-per-worker", type=int, default=1,
+                        help="jobs a worker runs at once, sharing its detector and threads")
+    parser.add_argument("--min-fps", type=float, default=None,
+                        help="only start another session while each running one keeps this rate")
+    parser.add_argument("--log-level", default=None)
+    args = parser.parse_args(argv)
+
+    configure_logging(level=args.log_level)
+    threads = args.threads_per_worker or plan_threads(args.workers)
+    pool = WorkerPool(args.db, args.results_dir, workers=args.workers,
+                      threads_per_worker=threads, log_level=args.log_level,
+                      sessions_per_worker=args.sessions_per_worker, min_fps=args.min_fps)
+    pool.start()
+    try:
+        for process in pool.processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
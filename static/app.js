@@ -6,12 +6,25 @@ const directionSelect = document.getElementById("direction");
 const status          = document.getElementById("status");
 const errorDiv        = document.getElementById("error");
 const video           = document.getElementById("video");
-const canvas          = document.getElementById("canvas");
-const ctx             = canvas.getContext("2d");
 
 let es, paused = false, finished = false, matchPhase = "first";
-const dets = {};
-const FPS = 30;
+let sessionId = null;
+// Identifies this viewer, so the server paces our streams to our playback only
+const clientId = (window.crypto && crypto.randomUUID)
+  ? crypto.randomUUID()
+  : Math.random().toString(36).slice(2) + Date.now().toString(36);
+// Playback position: the id of the frame on screen, from the X-Frame-Id
+// header of each MJPEG part (the server paces and may stall the stream)
+let shownFrame = 1;
+let videoAbort = null, videoUrl = null;
+const MJPEG_HEADER_END = new Uint8Array([13, 10, 13, 10]);
+// Announcements received ahead of playback, by frame id. The server sends
+// at most a few seconds ahead of the position we report, and played
+// entries are evicted, so this stays small for any match length.
+const pendingEvents = new Map();
+const MAX_PENDING_EVENTS = 50;
+let playbackTimer = null, lastReport = 0;
+const TICK_MS = 100, REPORT_MS = 1000;
 
 /** Display an error message to the user and speak it via TTS */
 function showError(message) {
@@ -37,65 +50,78 @@ uploadBtn.addEventListener("click", async () => {
   }
   status.textContent = "Uploading…";
 
-  const fd = new FormData();
-  fd.append("file", fileInput.files[0]);
-  fd.append("direction", directionSelect.value);
+  // Send the raw file so the server can stream it to disk and start
+  // analysing before the upload has finished
+  const file = fileInput.files[0];
+  const params = new URLSearchParams({
+    filename: file.name,
+    direction: directionSelect.value
+  });
 
   try {
-    const resp = await fetch("/upload", { method: "POST", body: fd });
+    const resp = await fetch(`/upload/stream?${params}`, {
+      method: "POST",
+      headers: { "Content-Type": file.type || "video/mp4" },
+      body: file
+    });
     if (!resp.ok) {
       throw new Error(`Upload failed (${resp.status})`);
     }
-    const { filename } = await resp.json();
+    const { filename, session_id } = await resp.json();
     status.textContent = `Uploaded ${filename}.`;
-    video.src = `/uploads/${filename}`;
-
-    video.onloadedmetadata = () => {
-      canvas.width  = video.videoWidth;
-      canvas.height = video.videoHeight;
-      matchPhase = "first";
-      halftimeBtn.textContent = "Halftime";
-      halftimeBtn.disabled = false;
-      finished = false;
-      startStream();
-    };
+    sessionId = session_id;
+    matchPhase = "first";
+    halftimeBtn.textContent = "Halftime";
+    halftimeBtn.disabled = false;
+    finished = false;
+    paused = false;
+    pauseBtn.textContent = "Pause";
+    startStream(1);
   } catch (err) {
     showError(err.message);
   }
 });
 
-pauseBtn.addEventListener("click", () => {
+pauseBtn.addEventListener("click", async () => {
   clearError();
   paused = !paused;
   pauseBtn.textContent = paused ? "Resume" : "Pause";
-  if (paused && es) {
-    es.close();
-  } else if (!paused && !finished) {
-    startStream();
+  if (paused) {
+    stopStream();
+  }
+  if (!sessionId || finished) return;
+  // Suspending frees the worker; resuming continues from its checkpoint
+  try {
+    await fetch(`/jobs/${sessionId}/${paused ? "suspend" : "resume"}`, { method: "POST" });
+  } catch (err) {
+    showError(`Failed to ${paused ? "suspend" : "resume"} analysis: ` + err.message);
+  }
+  if (!paused) {
+    startStream(currentFrame());
   }
 });
 
 halftimeBtn.addEventListener("click", async () => {
   clearError();
   try {
-    await fetch("/halftime", { method: "POST" });
+    await fetch(`/halftime?session_id=${sessionId}`, { method: "POST" });
   } catch (err) {
     showError("Failed to toggle halftime: " + err.message);
     return;
   }
 
   if (matchPhase === "first") {
-    if (es) es.close();
+    stopStream();
     matchPhase = "halftime";
     halftimeBtn.textContent = "Start 2nd Half";
     status.textContent = "Halftime — detections paused.";
   } else if (matchPhase === "halftime") {
-    startStream();
+    startStream(currentFrame());
     matchPhase = "second";
     halftimeBtn.textContent = "Full Time";
     status.textContent = "Second half started — detections resumed.";
   } else if (matchPhase === "second") {
-    if (es) es.close();
+    stopStream();
     paused = true;
     finished = true;
     halftimeBtn.disabled = true;
@@ -103,78 +129,156 @@ halftimeBtn.addEventListener("click", async () => {
   }
 });
 
-function startStream() {
+/** Frame currently on screen (see shownFrame) */
+function currentFrame() {
+  return shownFrame;
+}
+
+/** Index of `pattern` in `bytes` at or after `from`, or -1 */
+function indexOf(bytes, pattern, from) {
+  outer: for (let i = from; i <= bytes.length - pattern.length; i++) {
+    for (let j = 0; j < pattern.length; j++) {
+      if (bytes[i + j] !== pattern[j]) continue outer;
+    }
+    return i;
+  }
+  return -1;
+}
+
+/** Show one JPEG part and remember its frame id */
+function showFrame(frameId, jpeg) {
+  const url = URL.createObjectURL(new Blob([jpeg], { type: "image/jpeg" }));
+  video.src = url;
+  if (videoUrl) URL.revokeObjectURL(videoUrl);
+  videoUrl = url;
+  shownFrame = frameId;
+}
+
+/**
+ * Read the annotated MJPEG stream part by part instead of handing it to
+ * the <img>, so the id of every frame shown is known exactly.
+ */
+async function playVideo(url) {
+  const controller = new AbortController();
+  videoAbort = controller;
+  try {
+    const resp = await fetch(url, { signal: controller.signal });
+    if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+    const reader = resp.body.getReader();
+    let buffer = new Uint8Array(0);
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      const joined = new Uint8Array(buffer.length + value.length);
+      joined.set(buffer);
+      joined.set(value, buffer.length);
+      buffer = joined;
+
+      // Parts: --frame CRLF headers CRLF CRLF jpeg CRLF
+      let start = 0;
+      while (true) {
+        const headerEnd = indexOf(buffer, MJPEG_HEADER_END, start);
+        if (headerEnd < 0) break;
+        const headers = new TextDecoder().decode(buffer.subarray(start, headerEnd));
+        const length = parseInt((headers.match(/Content-Length:\s*(\d+)/i) || [])[1], 10);
+        const frameId = parseInt((headers.match(/X-Frame-Id:\s*(\d+)/i) || [])[1], 10);
+        const bodyStart = headerEnd + MJPEG_HEADER_END.length;
+        if (isNaN(length) || buffer.length < bodyStart + length) break;
+        if (!isNaN(frameId)) showFrame(frameId, buffer.slice(bodyStart, bodyStart + length));
+        start = bodyStart + length;
+      }
+      buffer = buffer.slice(start);
+    }
+  } catch (err) {
+    if (err.name !== "AbortError" && !paused && !finished) {
+      showError("Video stream connection error.");
+    }
+  } finally {
+    if (videoAbort === controller) videoAbort = null;
+  }
+}
+
+/** Tell the server where playback is, so it keeps its streams just ahead */
+function reportPlayback() {
+  lastReport = performance.now();
+  fetch(`/playback?session_id=${sessionId}&client_id=${clientId}&frame_id=${currentFrame()}`, { method: "POST" })
+    .catch(err => console.warn("Playback report failed:", err));
+}
+
+/** Announce events that are now on screen and drop them from the window */
+function playbackTick() {
+  const now = currentFrame();
+  for (const [frameId, text] of pendingEvents) {
+    if (frameId > now) continue;
+    pendingEvents.delete(frameId);
+    const utterance = new SpeechSynthesisUtterance(text);
+    utterance.lang = 'en-GB';
+    speechSynthesis.cancel();
+    speechSynthesis.speak(utterance);
+  }
+  if (performance.now() - lastReport >= REPORT_MS) reportPlayback();
+}
+
+/** Stop the video and event streams, keeping the last frame on screen */
+function stopStream() {
+  if (videoAbort) videoAbort.abort();
+  if (es) es.close();
+  clearInterval(playbackTimer);
+  playbackTimer = null;
+  pendingEvents.clear();
+}
+
+function startStream(fromFrame) {
   clearError();
   if (es) es.close();
+  if (!sessionId) return;
 
-  status.textContent = "Streaming frames…";
-  es = new EventSource("/stream");
+  status.textContent = "Streaming…";
+  // The server draws the overlay and paces frames; the page just displays them
+  if (videoAbort) videoAbort.abort();
+  shownFrame = fromFrame;
+  pendingEvents.clear();
+  clearInterval(playbackTimer);
+  reportPlayback();
+  playbackTimer = setInterval(playbackTick, TICK_MS);
+  playVideo(`/video?session_id=${sessionId}&from_frame=${fromFrame}`);
+
+  // Decisions only, for the spoken announcements
+  es = new EventSource(`/events/stream?session_id=${sessionId}&client_id=${clientId}`);
 
   es.onmessage = e => {
     if (paused || finished) return;
-    let p;
+    let evt;
     try {
-      p = JSON.parse(e.data);
+      evt = JSON.parse(e.data);
     } catch (err) {
-      showError("Malformed stream data: " + err.message);
+      showError("Malformed event data: " + err.message);
       return;
     }
-    dets[p.frame_id] = p.tracks;
-    const t = (p.frame_id - 1) / FPS;
-    video.currentTime = t;
-
-    // Speak event text if available
-    if (p.event_text) {
-      const utterance = new SpeechSynthesisUtterance(p.event_text);
-      utterance.lang = 'en-GB';
-      speechSynthesis.cancel();
-      speechSynthesis.speak(utterance);
+    // Events already behind the playback position were announced before
+    if (!evt.text || evt.frame_id < fromFrame) return;
+    // Analysis runs ahead of playback: announce when the frame is on screen
+    pendingEvents.set(evt.frame_id, evt.text);
+    if (pendingEvents.size > MAX_PENDING_EVENTS) {
+      // Map order is arrival order, i.e. frame order: drop the oldest
+      pendingEvents.delete(pendingEvents.keys().next().value);
     }
   };
 
+  // Server signals the end of the analysis so we stop reconnecting
+  es.addEventListener("end", () => {
+    es.close();
+    status.textContent = "Analysis finished.";
+  });
+
   es.onerror = err => {
-    showError("Stream connection error.");
-    if (es) es.close();
+    // EventSource reconnects by itself, sending Last-Event-ID
+    if (es.readyState === EventSource.CLOSED) {
+      showError("Event stream connection error.");
+    }
   };
 }
 
-video.onseeked = () => {
-  clearError();
-  if (paused || finished) return;
-
-  ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
-  ctx.lineWidth = 2;
-  const frameId = Math.round(video.currentTime * FPS) + 1;
-  const tracks  = dets[frameId] || [];
-
-  if (matchPhase === "halftime") return;
-
-  let possessedPlayerId = -1;
-  const ball = tracks.find(t => t.cls === "0" && "possessed_by" in t);
-  if (ball) possessedPlayerId = ball.possessed_by;
-
-  tracks.forEach(t => {
-    const [x1, y1, x2, y2] = t.bbox;
-    const [r, g, b] = t.color || [128, 128, 128];
-    const col = `rgb(${r}, ${g}, ${b})`;
-
-    ctx.strokeStyle = col;
-    ctx.strokeRect(x1, y1, x2 - x1, y2 - y1);
-    ctx.fillStyle = col;
-    ctx.font = "14px Arial";
-    ctx.fillText(`ID:${t.id} T${t.team}`, x1, y2 + 15);
-
-    if (t.id === possessedPlayerId && t.cls === "2") {
-      const cx = (x1 + x2) / 2;
-      const cy = y1 - 10;
-      ctx.beginPath();
-      ctx.arc(cx, cy, 8, 0, 2 * Math.PI);
-      ctx.fillStyle = "red";
-      ctx.fill();
-    }
-  });
-};
-
 // Global JS error handler
 window.addEventListener("error", event => {
   showError("An unexpected error occurred: " + event.message);
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the app's top-level packages (core, utils, app)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
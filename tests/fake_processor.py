@@ -0,0 +1,92 @@
+"""
+A model-free stand-in for LiveProcessor: the attributes the worker and
+the checkpointer touch, and a frame loop whose output depends on state
+that must survive a checkpoint.
+"""
+import cv2
+
+from core.event_store import EventStore
+
+
+class Part:
+    """
+    Picklable component with arbitrary attributes.
+    """
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+    def invalidate(self):
+        self.invalidated = True
+
+
+class FakeCapture:
+    def __init__(self, frames):
+        self.frames = frames
+        self.pos = 0
+        self.released = False
+
+    def get(self, prop):
+        return self.frames if prop == cv2.CAP_PROP_FRAME_COUNT else self.pos
+
+    def set(self, prop, value):
+        self.pos = int(value)
+        return True
+
+    def release(self):
+        self.released = True
+
+
+class FakeProcessor:
+    """
+    Every frame increments player_tracker.seen and reports it as the id of
+    the only track, so a run restored from the right state stores
+    track id == frame id for every frame. An event is raised every
+    `event_every` frames; `on_frame(processor, frame_id)` runs before
+    each payload is yielded.
+    """
+    def __init__(self, frames=100, source="match.mp4", event_every=40, on_frame=None):
+        self.source = source
+        self.cap = FakeCapture(frames)
+        self.player_tracker = Part(store=Part(listeners=[]), seen=0)
+        self.ball_tracker = Part(last_ball=None)
+        self.team_assigner = Part(colour_lookup=None, colours={1: (255, 0, 0)})
+        self.kick_detector = Part(count=0)
+        self.event_detector = Part(pitch_boundary=None, offside=Part(kg=None, pending=[]),
+                                   throwin=None, corner=None)
+        self.scene_gate = Part(prev_hist=None)
+        self.pitch_boundary = Part()
+        self.event_store = EventStore()
+        self.frame_count = 0
+        self.halftime_mode = False
+        self.team_1_dir, self.team_2_dir = "right", "left"
+        self.last_player_possession = None
+        self.read_position = 0
+        self.pending_seek = None
+        self.event_every = event_every
+        self.on_frame = on_frame
+
+    def seek(self, frame_id):
+        self.pending_seek = frame_id
+
+    def toggle_halftime(self):
+        self.halftime_mode = not self.halftime_mode
+        self.team_1_dir, self.team_2_dir = self.team_2_dir, self.team_1_dir
+
+    def __iter__(self):
+        while self.cap.pos < self.cap.frames:
+            if self.pending_seek is not None:
+                # Like LiveProcessor: a seek drops all tracking state
+                self.cap.pos, self.pending_seek = self.pending_seek - 1, None
+                self.player_tracker.seen = self.cap.pos
+            self.cap.pos += 1
+            self.read_position = self.cap.pos
+            self.frame_count += 1
+            self.player_tracker.seen += 1
+            frame_id = self.cap.pos
+            if self.event_every and frame_id % self.event_every == 0:
+                self.event_store.append("Offside", frame_id=frame_id, timestamp=frame_id / 25.0,
+                                        text=f"Offside at {frame_id}")
+            if self.on_frame is not None:
+                self.on_frame(self, frame_id)
+            yield {"frame_id": frame_id,
+                   "tracks": [{"id": self.player_tracker.seen, "cls": 2, "bbox": (0, 0, 1, 1)}]}
@@ -0,0 +1,173 @@
+import asyncio
+import importlib
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from core.jobs import DONE, PROXY
+from core.results import ResultWriter
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def main(tmp_path_factory):
+    # The app creates its directories and database relative to the working directory
+    workdir = tmp_path_factory.mktemp("app")
+    os.symlink(os.path.join(REPO, "static"), workdir / "static")
+    cwd, env = os.getcwd(), dict(os.environ)
+    os.chdir(workdir)
+    os.environ.update(VAR_WORKERS="0", VAR_JOBS_DB=str(workdir / "jobs.db"))
+    try:
+        sys.modules.pop("app.main", None)
+        yield importlib.import_module("app.main")
+    finally:
+        sys.modules.pop("app.main", None)
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(env)
+
+
+def finished_job(main, frames=100):
+    session_id = main.jobs.submit("match.mp4")
+    writer = ResultWriter(main.result_prefix(main.RESULTS_DIR, session_id))
+    for frame_id in range(1, frames + 1):
+        writer.write_frame(frame_id, [])
+    writer.close()
+    main.jobs.finish(session_id, DONE)
+    return session_id
+
+
+class Reader:
+    """
+    Reads SSE messages from a response body without cancelling the
+    generator when it goes quiet.
+    """
+    def __init__(self, body):
+        self.body = body
+        self.pending = None
+
+    async def frame_ids(self, timeout=0.5):
+        # Frame ids sent until the stream ends or stays quiet for `timeout`
+        ids = []
+        while True:
+            if self.pending is None:
+                self.pending = asyncio.ensure_future(self.body.__anext__())
+            done, _ = await asyncio.wait({self.pending}, timeout=timeout)
+            if not done:
+                return ids
+            task, self.pending = self.pending, None
+            try:
+                message = task.result()
+            except StopAsyncIteration:
+                return ids
+            if message.startswith("id: "):
+                ids.append(int(message.split("\n", 1)[0][4:]))
+
+    async def close(self):
+        if self.pending is not None:
+            self.pending.cancel()
+            await asyncio.gather(self.pending, return_exceptions=True)
+        await self.body.aclose()
+
+
+def test_halftime_only_for_a_live_analysis(main):
+    analysis_id = main.jobs.submit("match.mp4", {"proxy": "match.proxy.bin"})
+    proxy_id = main.jobs.submit("match.mp4", {"kind": PROXY, "proxy": "match.proxy.bin"})
+
+    # Without a session id it goes to the analysis, not the proxy queued after it
+    main.halftime()
+    assert main.jobs.take_commands(analysis_id) == [("halftime", {})]
+    for session_id in (proxy_id, finished_job(main)):
+        with pytest.raises(main.HTTPException) as error:
+            main.halftime(session_id)
+        assert error.value.status_code == 409
+        assert main.jobs.take_commands(session_id) == []
+    main.jobs.finish(analysis_id, DONE)
+
+
+def test_stream_is_paced_per_client(main, monkeypatch):
+    monkeypatch.setattr(main, "STREAM_MAX_LEAD_FRAMES", 5)
+    monkeypatch.setattr(main, "STREAM_POLL_SECONDS", 0.01)
+    session_id = finished_job(main)
+
+    async def scenario():
+        main.report_playback("slow", 10, session_id)
+        main.report_playback("fast", 1000, session_id)
+        async def open_stream(client_id):
+            response = await main.stream(session_id=session_id, client_id=client_id, last_event_id=None)
+            return Reader(response.body_iterator)
+
+        slow, fast, unpaced = [await open_stream(c) for c in ("slow", "fast", None)]
+        assert await slow.frame_ids() == list(range(1, 16))
+        assert await fast.frame_ids() == list(range(1, 101))
+        assert await unpaced.frame_ids() == list(range(1, 101))
+        # The slow viewer moves on; its stream follows
+        main.report_playback("slow", 50, session_id)
+        assert await slow.frame_ids() == list(range(16, 56))
+        for reader in (slow, fast, unpaced):
+            await reader.close()
+
+    asyncio.run(scenario())
+
+
+def test_sessions_with_live_streams_stay_cached(main, monkeypatch):
+    monkeypatch.setattr(main, "MAX_SESSIONS", 2)
+    monkeypatch.setattr(main, "STREAM_MAX_LEAD_FRAMES", 5)
+    monkeypatch.setattr(main, "STREAM_POLL_SECONDS", 0.01)
+    streamed = finished_job(main)
+
+    async def scenario():
+        main.report_playback("viewer", 10, streamed)
+        response = await main.stream(session_id=streamed, client_id="viewer", last_event_id=None)
+        reader = Reader(response.body_iterator)
+        assert await reader.frame_ids() == list(range(1, 16))
+        # Other sessions come and go; the streamed one is never evicted
+        others = [finished_job(main) for _ in range(3)]
+        for session_id in others:
+            main.get_session(session_id)
+        assert streamed in main.sessions and len(main.sessions) == 2
+        assert others[0] not in main.sessions
+        # So the viewer's reports still reach its stream
+        main.report_playback("viewer", 50, streamed)
+        assert await reader.frame_ids() == list(range(16, 56))
+        await reader.close()
+
+    asyncio.run(scenario())
+    assert main.sessions[streamed].live_streams == 0
+
+
+def test_video_stream_stops_its_renderer_when_the_client_leaves(main, tmp_path):
+    path = str(tmp_path / "match.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25.0, (64, 48))
+    for _ in range(5):
+        writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+    writer.release()
+    # Queued, with no results: the renderer waits for analysis
+    session_id = main.jobs.submit(path)
+
+    class GoneRequest:
+        async def is_disconnected(self):
+            return True
+
+    def renderers():
+        return [t for t in threading.enumerate() if t.name == "renderer" and t.is_alive()]
+
+    async def scenario():
+        response = await main.annotated_video(GoneRequest(), session_id=session_id)
+        parts = [part async for part in response.body_iterator]
+        assert parts == []
+
+    before = len(renderers())
+    asyncio.run(scenario())
+    deadline = time.monotonic() + 5
+    while len(renderers()) > before and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert len(renderers()) == before
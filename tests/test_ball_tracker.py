@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from core.assigners.Ball_Kick_Detector import BallKickDetector
+from core.trackers.ball_motion import BallKalmanFilter
+from core.trackers.ball_tracker import BallTracker
+
+
+def det(x, y, conf=0.5, size=8):
+    return {"cls": "0", "conf": conf, "bbox": [x - size / 2, y - size / 2, x + size / 2, y + size / 2]}
+
+
+def centre(track):
+    x1, y1, x2, y2 = track["bbox"]
+    return (x1 + x2) / 2, (y1 + y2) / 2
+
+
+def kick_path(speed):
+    # Rolls right into the contact point (200, 300) at frame 9, then leaves upwards
+    path = [(200 - speed * (8 - i), 300) for i in range(9)]
+    path += [(200, 300 - speed * j) for j in range(1, 9)]
+    return path
+
+
+def test_reacquires_after_a_sharp_turn():
+    tracker = BallTracker()
+    tracks = [tracker.update(None, [det(x, y)]) for x, y in kick_path(25)]
+    # Two agreeing detections outside the gate restart the track on the new path
+    reacquired = tracks[10][0]
+    assert reacquired["reacquired_path"] == [[200.0, 275.0]]
+    assert centre(reacquired) == pytest.approx((200, 250))
+    for track, (x, y) in zip(tracks[11:], kick_path(25)[11:]):
+        assert centre(track[0]) == pytest.approx((x, y), abs=3)
+        assert "reacquired_path" not in track[0]
+
+
+def test_single_stray_detection_does_not_steal_the_track():
+    tracker = BallTracker()
+    for x in range(100, 200, 10):
+        tracker.update(None, [det(x, 300)])
+    track = tracker.update(None, [det(400, 100)])[0]
+    assert centre(track) == pytest.approx((200, 300), abs=3)
+    track = tracker.update(None, [det(210, 300)])[0]
+    assert centre(track) == pytest.approx((210, 300), abs=3)
+
+
+def test_gate_widens_while_coasting():
+    spreads = []
+    for miss_inflation in (1.0, 1.5):
+        tracker = BallTracker(miss_inflation=miss_inflation)
+        for x in range(100, 200, 10):
+            tracker.update(None, [det(x, 300)])
+        for _ in range(3):
+            tracker.update(None, [])
+        spreads.append(tracker.position_uncertainty[0])
+    # On top of the growth from the motion model alone
+    assert spreads[1] > 1.5 * spreads[0]
+
+
+@pytest.mark.parametrize("speed", [10, 20])
+def test_kick_through_tracker(speed):
+    tracker, detector = BallTracker(), BallKickDetector()
+    players = [{"id": 7, "cls": "1", "bbox": (200, 220, 230, 300)}]
+    kicks = []
+    for frame_id, (x, y) in enumerate(kick_path(speed), start=1):
+        tracks = tracker.update(None, [det(x, y)])
+        if tracks and detector.update(tracks[0], players, frame_id):
+            kicks.append((frame_id, detector.contact_frame, detector.kicker_id))
+    assert len(kicks) == 1
+    frame_id, contact_frame, kicker_id = kicks[0]
+    assert kicker_id == 7 and frame_id <= 11 and 9 <= contact_frame <= 10
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+pytest.importorskip("cv2")
+
+from core.checkpoint import Checkpointer, MANIFEST_NAME
+from fake_processor import FakeProcessor
+
+
+def run_to(processor, frame_id):
+    for payload in processor:
+        if payload["frame_id"] == frame_id:
+            return
+
+
+def test_round_trip_restores_state_and_position(tmp_path):
+    checkpoints = Checkpointer(str(tmp_path / "job.ckpt"), every=10)
+    processor = FakeProcessor()
+    run_to(processor, 30)
+    processor.toggle_halftime()
+    checkpoints.save(processor, 30)
+
+    restored = FakeProcessor()
+    assert Checkpointer(str(tmp_path / "job.ckpt")).restore(restored) == 30
+    assert restored.player_tracker.seen == 30
+    assert restored.team_assigner.colours == {1: (255, 0, 0)}
+    assert restored.halftime_mode and restored.team_1_dir == "left"
+    assert restored.frame_count == 30
+    # The capture continues after the checkpoint, without a seek
+    assert restored.cap.pos == 30 and restored.pending_seek is None
+    assert restored.pitch_boundary.invalidated
+    # Excluded attributes keep the new processor's objects
+    assert restored.player_tracker.store is not processor.player_tracker.store
+
+
+def test_unchanged_components_are_not_rewritten(tmp_path):
+    directory = tmp_path / "job.ckpt"
+    checkpoints = Checkpointer(str(directory), every=10)
+    processor = FakeProcessor()
+    run_to(processor, 10)
+    checkpoints.save(processor, 10)
+    first = dict((name, digest_file[1]) for name, digest_file in checkpoints.saved.items())
+    run_to(processor, 20)
+    checkpoints.save(processor, 20)
+
+    assert checkpoints.saved["team_assigner"][1] == first["team_assigner"]
+    assert checkpoints.saved["player_tracker"][1] != first["player_tracker"]
+    # Files of the previous checkpoint that are no longer referenced are removed
+    pickles = {f for f in os.listdir(directory) if f.endswith(".pkl")}
+    assert pickles == {filename for _, filename in checkpoints.saved.values()}
+
+
+def test_due(tmp_path):
+    checkpoints = Checkpointer(str(tmp_path / "job.ckpt"), every=10)
+    assert checkpoints.due(1)
+    checkpoints.save(FakeProcessor(), 5)
+    assert not checkpoints.due(14)
+    assert checkpoints.due(15)
+
+
+def test_missing_or_broken_checkpoint(tmp_path):
+    directory = tmp_path / "job.ckpt"
+    assert Checkpointer(str(directory)).restore(FakeProcessor()) is None
+
+    checkpoints = Checkpointer(str(directory))
+    checkpoints.save(FakeProcessor(), 5)
+    os.remove(os.path.join(directory, checkpoints.saved["player_tracker"][1]))
+    assert Checkpointer(str(directory)).restore(FakeProcessor()) is None
+
+
+def test_checkpoint_for_another_source_is_not_restored(tmp_path):
+    directory = str(tmp_path / "job.ckpt")
+    Checkpointer(directory).save(FakeProcessor(source="match.mp4"), 5)
+    assert Checkpointer(directory).restore(FakeProcessor(source="match.proxy.bin")) is None
+    assert Checkpointer(directory).restore(FakeProcessor(source="match.mp4")) == 5
+
+
+def test_manifest_is_replaced_atomically(tmp_path):
+    directory = tmp_path / "job.ckpt"
+    checkpoints = Checkpointer(str(directory))
+    checkpoints.save(FakeProcessor(), 5)
+    assert sorted(f for f in os.listdir(directory) if not f.endswith(".pkl")) == [MANIFEST_NAME]
+    checkpoints.remove()
+    assert not directory.exists()
@@ -0,0 +1,45 @@
+from core.event_store import EventStore
+
+
+def filled():
+    store = EventStore()
+    store.append("Offside", frame_id=100, timestamp=4.0, text="Offside", track_ids=[7, 9])
+    store.append("Throw-in", frame_id=250, timestamp=10.0)
+    store.append("Offside", frame_id=400, timestamp=16.0)
+    return store
+
+
+def test_sequence_numbers_and_since():
+    store = filled()
+    assert [e["seq"] for e in store.events] == [0, 1, 2]
+    # Last-Event-ID n: the client has seen seq n and wants the rest
+    assert [e["seq"] for e in store.since(0)] == [1, 2]
+    assert [e["seq"] for e in store.since(-1)] == [0, 1, 2]
+    assert store.since(2) == []
+
+
+def test_query_by_time_and_type():
+    store = filled()
+    assert [e["frame_id"] for e in store.query(start=4.0, end=10.0)] == [100, 250]
+    assert [e["frame_id"] for e in store.query(types=["Offside"])] == [100, 400]
+    assert [e["frame_id"] for e in store.query(types=["Offside"], start=5.0)] == [400]
+    assert [e["frame_id"] for e in store.query(limit=1)] == [100]
+    assert store.types == ["Offside", "Throw-in"]
+
+
+def test_out_of_order_timestamps_are_indexed_in_time_order():
+    store = filled()
+    store.append("Corner", frame_id=300, timestamp=12.0)
+    assert [e["frame_id"] for e in store.query(start=10.0)] == [250, 300, 400]
+
+
+def test_listeners_see_every_append_and_errors_are_contained():
+    store = EventStore()
+    seen = []
+    store.add_listener(lambda event: 1 / 0)
+    store.add_listener(seen.append)
+    event = store.append("Offside", frame_id=1, timestamp=0.0)
+    assert seen == [event]
+    store.remove_listener(seen.append)
+    store.append("Offside", frame_id=2, timestamp=0.1)
+    assert len(seen) == 1 and len(store) == 2
@@ -0,0 +1,80 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.frame_pool import FramePool
+
+
+class FakeCapture:
+    """
+    Returns frames of `shapes` in turn, decoding into the given buffer
+    when its shape matches, as cv2.VideoCapture.read(image) does.
+    """
+    def __init__(self, shapes):
+        self.shapes = list(shapes)
+        self.count = 0
+
+    def read(self, image=None):
+        if not self.shapes:
+            return False, None
+        shape = self.shapes.pop(0)
+        self.count += 1
+        if image is None or image.shape != shape:
+            image = np.empty(shape, dtype=np.uint8)
+        image[...] = self.count % 256
+        return True, image
+
+
+def test_buffers_are_recycled_after_the_last_release():
+    pool = FramePool(max_size=4)
+    cap = FakeCapture([(4, 6, 3)] * 3)
+    first = pool.read(cap)
+    buffer = first.array
+    first.retain()  # e.g. held by a replay history
+    first.release()
+    assert pool.free == []
+    first.release()
+    assert pool.free == [first]
+
+    second = pool.read(cap)
+    assert second.array is buffer
+    assert int(second.array[0, 0, 0]) == 2
+    assert pool.allocated == 1
+
+
+def test_over_release_is_an_error():
+    pool = FramePool()
+    frame = pool.read(FakeCapture([(2, 2, 3)]))
+    frame.release()
+    with pytest.raises(RuntimeError):
+        frame.release()
+
+
+def test_exhausted_pool_falls_back_to_temporary_buffers():
+    pool = FramePool(max_size=2)
+    cap = FakeCapture([(2, 2, 3)] * 3)
+    held = [pool.read(cap), pool.read(cap)]
+    extra = pool.read(cap)
+    assert extra is not None and pool.allocated == 2
+    extra.release()
+    # Temporary buffers never join the pool
+    assert pool.free == []
+    for frame in held:
+        frame.release()
+    assert len(pool.free) == 2
+
+
+def test_resolution_change_adopts_the_new_shape():
+    pool = FramePool(max_size=4)
+    cap = FakeCapture([(2, 2, 3), (2, 2, 3), (4, 4, 3), (4, 4, 3)])
+    old = pool.read(cap)
+    pool.read(cap).release()
+    resized = pool.read(cap)
+    assert resized.array.shape == (4, 4, 3) and pool.shape == (4, 4, 3)
+    # Buffers of the old size leave the pool as they come back
+    old.release()
+    resized.release()
+    assert [f.array.shape for f in pool.free] == [(4, 4, 3)]
+    assert pool.allocated == 1
+    assert pool.read(cap).array is resized.array
+    assert pool.read(cap) is None
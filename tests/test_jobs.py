@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from core.jobs import JobQueue, QUEUED, RUNNING, DONE, CANCELLED, PROXY, ANALYSIS
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"))
+
+
+def test_claim_takes_analysis_before_older_proxy_jobs(jobs):
+    proxy_id = jobs.submit("match.mp4", {"kind": PROXY, "proxy": "match.proxy.bin"})
+    analysis_id = jobs.submit("match.mp4", {"direction": "right"})
+
+    first = jobs.claim(os.getpid())
+    assert first["id"] == analysis_id
+    assert first["status"] == RUNNING
+    assert jobs.claim(os.getpid())["id"] == proxy_id
+    assert jobs.claim(os.getpid()) is None
+
+
+def test_claim_by_kind(jobs):
+    proxy_id = jobs.submit("match.mp4", {"kind": PROXY, "proxy": "match.proxy.bin"})
+    analysis_id = jobs.submit("match.mp4", {"direction": "right"})
+
+    assert jobs.claim(os.getpid(), kind=PROXY)["id"] == proxy_id
+    assert jobs.claim(os.getpid(), kind=PROXY) is None
+    assert jobs.claim(os.getpid(), kind=ANALYSIS)["id"] == analysis_id
+
+
+def test_claim_is_oldest_first_within_a_kind(jobs):
+    ids = [jobs.submit(f"match{i}.mp4") for i in range(3)]
+    assert [jobs.claim(os.getpid())["id"] for _ in ids] == ids
+
+
+def test_latest_is_the_analysis_not_its_proxy(jobs):
+    assert jobs.latest() is None
+    analysis_id = jobs.submit("match.mp4", {"proxy": "match.proxy.bin"})
+    proxy_id = jobs.submit("match.mp4", {"kind": PROXY, "proxy": "match.proxy.bin"})
+
+    assert jobs.latest()["id"] == analysis_id
+    assert jobs.latest(kind=PROXY)["id"] == proxy_id
+
+
+def test_commands_are_taken_once_in_order(jobs):
+    job_id = jobs.submit("match.mp4")
+    jobs.send_command(job_id, "halftime")
+    jobs.send_command(job_id, "profile", frames=10)
+
+    assert jobs.take_commands(job_id) == [("halftime", {}), ("profile", {"frames": 10})]
+    assert jobs.take_commands(job_id) == []
+
+
+def test_cancel_queued_and_running(jobs):
+    queued = jobs.submit("a.mp4")
+    assert jobs.cancel(queued) == CANCELLED
+    assert jobs.get(queued)["status"] == CANCELLED
+
+    running = jobs.submit("b.mp4")
+    jobs.claim(os.getpid())
+    # A running job is only asked to stop; its worker records the outcome
+    assert jobs.cancel(running) == RUNNING
+    assert jobs.take_commands(running) == [("cancel", {})]
+    jobs.finish(running, CANCELLED)
+    assert jobs.cancel(running) == CANCELLED
+
+
+def test_finish_and_progress(jobs):
+    job_id = jobs.submit("match.mp4")
+    jobs.claim(os.getpid())
+    jobs.update_progress(job_id, 50, 100)
+    jobs.finish(job_id, DONE)
+    job = jobs.get(job_id)
+    assert (job["status"], job["progress_frame"], job["total_frames"], job["worker_pid"]) == (DONE, 50, 100, None)
+
+
+def test_update_params_merges(jobs):
+    job_id = jobs.submit("match.mp4", {"direction": "left", "proxy": "match.proxy.bin"})
+    jobs.update_params(job_id, source="match.proxy.bin")
+    assert jobs.get(job_id)["params"] == {
+        "direction": "left", "proxy": "match.proxy.bin", "source": "match.proxy.bin"}
+
+
+def test_requeue_orphans(jobs):
+    job_id = jobs.submit("match.mp4")
+    # A pid that cannot be alive
+    jobs.claim(2 ** 22 + 1)
+    jobs.requeue_orphans()
+    assert jobs.get(job_id)["status"] == QUEUED
@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from core.assigners.Ball_Kick_Detector import BallKickDetector
+
+
+def ball(x, y, size=8):
+    return {"bbox": (x - size / 2, y - size / 2, x + size / 2, y + size / 2)}
+
+
+def player(pid, x, y, w=30, h=80):
+    return {"id": pid, "cls": "1", "bbox": (x - w / 2, y - h, x + w / 2, y)}
+
+
+def run(detector, scale=1.0):
+    # Ball rolls right to the player at x=200, then leaves fast upwards
+    path = [(140, 300), (160, 300), (180, 300), (200, 300), (200, 270), (200, 240)]
+    players = [player(7, 215 * scale, 320 * scale, 30 * scale, 80 * scale)]
+    kicks = []
+    for frame_id, (x, y) in enumerate(path, start=1):
+        if detector.update(ball(x * scale, y * scale, 8 * scale), players, frame_id):
+            kicks.append((detector.contact_frame, detector.kicker_id))
+    return kicks
+
+
+def test_kick_at_the_bend_with_nearest_player():
+    assert run(BallKickDetector()) == [(4, 7)]
+
+
+def test_thresholds_follow_pixel_scale():
+    # The same play in a half-size proxy
+    assert run(BallKickDetector(pixel_scale=0.5), scale=0.5) == [(4, 7)]
+    detector = BallKickDetector(pixel_scale=0.5)
+    assert detector.contact_distance == 6.0 and detector.min_speed == 2.0
+
+
+def test_gap_starts_a_new_trajectory():
+    detector = BallKickDetector()
+    players = [player(7, 215, 320)]
+    for frame_id, (x, y) in zip((1, 2, 3), ((140, 300), (160, 300), (180, 300))):
+        detector.update(ball(x, y), players, frame_id)
+    # Ball lost for longer than max_gap: no bend is measured across the gap
+    assert not detector.update(ball(200, 300), players, 20)
+    assert not detector.update(ball(200, 270), players, 21)
+
+
+def test_reacquired_path_replaces_coasted_positions():
+    detector = BallKickDetector()
+    players = [player(7, 215, 320)]
+    for frame_id, (x, y) in enumerate(((140, 300), (160, 300), (180, 300), (200, 300)), start=1):
+        detector.update(ball(x, y), players, frame_id)
+    # The tracker coasted on to the right through frame 5
+    assert not detector.update(ball(220, 300), players, 5)
+    # ... and re-acquired the ball going up at frame 6
+    reacquired = dict(ball(200, 240), reacquired_path=[[200.0, 270.0]])
+    assert detector.update(reacquired, players, 6)
+    assert (detector.contact_frame, detector.kicker_id) == (4, 7)
+
+
+@pytest.mark.parametrize("speed", [25, 40])
+@pytest.mark.parametrize("conf", [0.3, 0.6])
+def test_fast_kick_through_tracker(speed, conf):
+    pytest.importorskip("cv2")
+    from core.trackers.ball_tracker import BallTracker
+
+    tracker, detector = BallTracker(), BallKickDetector()
+    players = [player(7, 215, 300)]
+    # Rolls right into (200, 300) at frame 9, then leaves upwards
+    path = [(200 - speed * (8 - i), 300) for i in range(9)] + [(200, 300 - speed * j) for j in range(1, 9)]
+    kicks = []
+    for frame_id, (x, y) in enumerate(path, start=1):
+        det = dict(ball(x, y), cls="0", conf=conf)
+        tracks = tracker.update(None, [det])
+        if tracks and detector.update(tracks[0], players, frame_id):
+            kicks.append((frame_id, detector.contact_frame, detector.kicker_id))
+    # Reported once the tracker has re-acquired the ball, at the right contact
+    assert kicks == [(11, 9, 7)]
@@ -0,0 +1,70 @@
+import json
+import logging
+import sys
+
+import utils.logging_utils as logging_utils
+from utils.logging_utils import SampledDebugFilter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def record(level=logging.DEBUG, lineno=10, name="core.stream"):
+    return logging.LogRecord(name, level, "stream.py", lineno, "msg", None, None)
+
+
+def test_debug_records_are_rate_limited_per_call_site(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(logging_utils.time, "monotonic", clock)
+    sampler = SampledDebugFilter(rate=2.0, burst=3)
+
+    # The burst passes, then the call site is muted
+    assert [sampler.filter(record()) for _ in range(5)] == [True, True, True, False, False]
+    # Another call site has its own bucket
+    assert sampler.filter(record(lineno=11))
+
+    # Half a second refills one token at 2/s; the pass reports what was dropped
+    clock.now += 0.5
+    passed = record()
+    assert sampler.filter(passed)
+    assert passed.suppressed == 2
+    assert not sampler.filter(record())
+
+
+def test_bucket_never_exceeds_the_burst(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(logging_utils.time, "monotonic", clock)
+    sampler = SampledDebugFilter(rate=2.0, burst=2)
+    sampler.filter(record())
+    clock.now += 3600
+    assert [sampler.filter(record()) for _ in range(3)] == [True, True, False]
+
+
+def test_records_above_debug_always_pass(monkeypatch):
+    sampler = SampledDebugFilter(rate=0.0, burst=0)
+    assert all(sampler.filter(record(level=logging.INFO)) for _ in range(10))
+    assert not sampler.filter(record())
+
+
+def test_records_are_formatted_on_the_listener_thread():
+    handler = logging_utils.RecordQueueHandler(None)
+    args = {"tracks": [1]}
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        exc_info = sys.exc_info()
+    original = logging.LogRecord("core.stream", logging.ERROR, "stream.py", 10, "state %s", (args,), exc_info)
+    queued = handler.prepare(original)
+    args["tracks"].append(2)
+
+    # The message is fixed when logged; the traceback is left to the formatter
+    assert queued.msg == "state {'tracks': [1]}" and queued.args is None
+    entry = json.loads(logging_utils.StructuredFormatter().format(queued))
+    assert entry["msg"] == "state {'tracks': [1]}"
+    assert "ValueError: boom" in entry["exc"]
+    assert original.msg == "state %s"
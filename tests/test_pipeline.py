@@ -0,0 +1,62 @@
+import pytest
+
+from core.pipeline import Stage, StageGraph, PROFILES
+
+
+def stages(calls):
+    def stage(name, outputs):
+        def fn(ctx):
+            calls.append(name)
+            return outputs(ctx)
+        return fn
+
+    return [
+        Stage("detect", stage("detect", lambda ctx: {"detections": ctx["frame"]}),
+              optional=("frame",), outputs=("detections",)),
+        Stage("tracker", stage("tracker", lambda ctx: {"tracks": ctx["detections"] or None}),
+              inputs=("detections",), outputs=("tracks",)),
+        Stage("teams", stage("teams", lambda ctx: {"team_tracks": ctx["tracks"]}),
+              inputs=("tracks",), outputs=("team_tracks",)),
+        Stage("boundary", stage("boundary", lambda ctx: {"boundary": True}),
+              inputs=("frame",), outputs=("boundary",)),
+        Stage("event", stage("event", lambda ctx: {"event": "kick"}),
+              inputs=("tracks",), optional=("boundary",), outputs=("event",)),
+    ]
+
+
+def test_only_stages_the_targets_need_are_kept():
+    graph = StageGraph(stages([]), targets=("tracks",))
+    assert graph.names == ["detect", "tracker"]
+    assert graph.skipped == ["teams", "boundary", "event"]
+
+
+def test_disabled_stages_are_dropped():
+    graph = StageGraph(stages([]), targets=("team_tracks", "event"), disabled=("boundary",))
+    assert graph.names == ["detect", "tracker", "teams", "event"]
+    with pytest.raises(ValueError):
+        StageGraph(stages([]), targets=("event",), disabled=("nope",))
+
+
+def test_run_skips_stages_with_missing_or_unchanged_inputs():
+    calls = []
+    graph = StageGraph(stages(calls), targets=("team_tracks", "event"))
+    # No detections: tracks stay missing, so teams and event do not run
+    ctx = graph.run({"frame": []}, {"frame"})
+    assert calls == ["detect", "tracker", "boundary"]
+    assert "event" not in ctx
+
+    calls.clear()
+    ctx = graph.run({"frame": ["player"]}, {"frame"})
+    assert calls == ["detect", "tracker", "teams", "boundary", "event"]
+    assert ctx["team_tracks"] == ["player"] and ctx["event"] == "kick"
+
+    # Nothing written this frame: nothing runs
+    calls.clear()
+    graph.run({"frame": ["player"]}, set())
+    assert calls == []
+
+
+def test_profiles():
+    assert set(PROFILES) == {"full", "tracking", "offside"}
+    with pytest.raises(ValueError):
+        StageGraph.from_profile(stages([]), "nope")
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from core.proxy import build_proxy, proxy_path, proxy_ready, ProxyCapture, INDEX_SUFFIX
+from core.uploads import PARTIAL_SUFFIX
+
+
+def write_video(path, frames=12, size=(1280, 720)):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 25.0, size)
+    for i in range(frames):
+        writer.write(np.full((size[1], size[0], 3), (i * 20) % 256, dtype=np.uint8))
+    writer.release()
+
+
+def test_proxy_round_trip(tmp_path):
+    source = str(tmp_path / "match.avi")
+    write_video(source)
+    path = proxy_path(source)
+    assert build_proxy(source, path) == 12
+    assert proxy_ready(path)
+    assert os.path.exists(path + INDEX_SUFFIX)
+
+    cap = ProxyCapture(path)
+    assert cap.isOpened()
+    assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == 12
+    assert (cap.get(cv2.CAP_PROP_FRAME_WIDTH), cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (640, 360)
+    assert cap.coordinate_scale == (2.0, 2.0)
+
+    # Seeking is an index move; positions match the source's
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 5)
+    ok, frame = cap.read()
+    assert ok and frame.shape == (360, 640, 3)
+    assert cap.get(cv2.CAP_PROP_POS_FRAMES) == 6
+    assert abs(int(frame.mean()) - 100) <= 3
+
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 12)
+    assert cap.read() == (False, None)
+    cap.release()
+
+
+def test_proxy_without_index_walks_headers(tmp_path):
+    source = str(tmp_path / "match.avi")
+    write_video(source, frames=4)
+    path = proxy_path(source)
+    build_proxy(source, path)
+    os.remove(path + INDEX_SUFFIX)
+    cap = ProxyCapture(path)
+    assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == 4
+
+
+def test_stopped_build_leaves_nothing(tmp_path):
+    source = str(tmp_path / "match.avi")
+    write_video(source, frames=300, size=(64, 48))
+    path = proxy_path(source)
+    assert build_proxy(source, path, should_stop=lambda: True) is None
+    for leftover in (path, path + INDEX_SUFFIX, path + PARTIAL_SUFFIX):
+        assert not os.path.exists(leftover)
+    assert not proxy_ready(path)
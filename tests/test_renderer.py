@@ -0,0 +1,79 @@
+import queue
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from core.renderer import AnnotatedRenderer
+from core.results import ResultWriter
+
+
+def write_video(path, frames=10, fps=25.0, size=(64, 48)):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    for i in range(frames):
+        writer.write(np.full((size[1], size[0], 3), i * 10, dtype=np.uint8))
+    writer.release()
+
+
+def write_results(prefix, frames):
+    writer = ResultWriter(str(prefix))
+    for frame_id in range(1, frames + 1):
+        writer.write_frame(frame_id, [{"id": 1, "cls": 2, "team": 1, "bbox": (1, 1, 10, 10)}])
+    writer.close()
+
+
+def test_renders_every_frame_then_ends(tmp_path):
+    write_video(tmp_path / "match.avi", frames=10)
+    write_results(tmp_path / "match", frames=10)
+    renderer = AnnotatedRenderer(str(tmp_path / "match.avi"), str(tmp_path / "match"),
+                                 is_finished=lambda: True, poll_seconds=0.01)
+    renderer.start()
+    ids = []
+    while True:
+        item = renderer.get(timeout=5)
+        if item is None:
+            break
+        frame_id, jpeg = item
+        assert jpeg[:2] == b"\xff\xd8"
+        ids.append(frame_id)
+    assert ids == list(range(1, 11))
+    renderer.thread.join(timeout=5)
+    assert not renderer.thread.is_alive()
+
+
+def test_stop_wakes_a_blocked_get(tmp_path):
+    # Analysis has not written anything yet: the renderer waits for results
+    write_video(tmp_path / "match.avi", frames=10)
+    renderer = AnnotatedRenderer(str(tmp_path / "match.avi"), str(tmp_path / "match"),
+                                 is_finished=lambda: False, poll_seconds=0.01)
+    renderer.start()
+    with pytest.raises(queue.Empty):
+        renderer.get(timeout=0.2)
+
+    renderer.stop()
+    assert renderer.stopped
+    assert renderer.get(timeout=1) is None
+    renderer.thread.join(timeout=5)
+    assert not renderer.thread.is_alive()
+
+
+def test_stop_with_a_full_queue_still_ends_the_stream(tmp_path):
+    write_video(tmp_path / "match.avi", frames=10)
+    write_results(tmp_path / "match", frames=10)
+    renderer = AnnotatedRenderer(str(tmp_path / "match.avi"), str(tmp_path / "match"),
+                                 is_finished=lambda: True, poll_seconds=0.01, queue_frames=2)
+    renderer.start()
+    # Let the renderer fill its queue while nobody reads
+    first = renderer.get(timeout=5)
+    assert first is not None
+    renderer.stop()
+    renderer.thread.join(timeout=5)
+    assert not renderer.thread.is_alive()
+    items = []
+    while True:
+        item = renderer.get(timeout=1)
+        if item is None:
+            break
+        items.append(item)
+    assert len(items) <= 2
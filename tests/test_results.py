@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from core.results import ResultFollower, ResultWriter
+
+
+def event(frame_id, kind="Throw-In"):
+    return {"type": kind, "frame_id": frame_id, "timestamp": frame_id / 25.0, "text": f"{kind} at {frame_id}"}
+
+
+def test_follower_skips_events_of_skipped_frames(tmp_path):
+    prefix = str(tmp_path / "job")
+    writer = ResultWriter(prefix)
+    for frame_id in range(1, 21):
+        if frame_id % 5 == 0:
+            writer.write_event(event(frame_id))
+        writer.write_frame(frame_id, [])
+    writer.flush()
+
+    follower = ResultFollower(prefix, from_frame=12)
+    payloads = follower.poll()
+    assert [p["frame_id"] for p in payloads] == list(range(12, 21))
+    assert [p["frame_id"] for p in payloads if p["event"]] == [15, 20]
+    assert follower.pending_events == {}
+
+    # Later events still meet their frames
+    writer.write_event(event(21, "Corner"))
+    writer.write_frame(21, [])
+    writer.close()
+    assert [(p["frame_id"], p["event"]) for p in follower.poll()] == [(21, "Corner")]
+    assert follower.pending_events == {}
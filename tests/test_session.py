@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+import core.session as session_module
+from core.session import MatchSession
+
+
+@pytest.fixture
+def session(tmp_path):
+    return MatchSession("abc", str(tmp_path / "match.mp4"), str(tmp_path / "abc"))
+
+
+def test_no_limit_until_a_client_reports(session):
+    assert session.send_limit(None, 150) is None
+    assert session.send_limit("viewer-a", 150) is None
+
+
+def test_each_client_is_paced_to_its_own_playback(session):
+    session.report_playback("viewer-a", 1000)
+    session.report_playback("viewer-b", 10)
+    assert session.send_limit("viewer-a", 150) == 1150
+    assert session.send_limit("viewer-b", 150) == 160
+    assert session.send_limit("viewer-c", 150) is None
+
+
+def test_later_reports_win(session):
+    session.report_playback("viewer-a", 1000)
+    # Scrubbed back
+    assert session.report_playback("viewer-a", 200) == 200
+    assert session.send_limit("viewer-a", 0) == 200
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_module, "time", clock)
+    return clock
+
+
+def test_silent_clients_are_forgotten(session, clock):
+    session.report_playback("viewer-a", 100)
+    clock.now += session_module.PLAYBACK_TTL_SECONDS + 1
+    session.report_playback("viewer-b", 50)
+    assert "viewer-a" not in session.playback
+    assert session.playback_frame("viewer-b") == 50
+
+
+def test_silent_client_is_unpaced_without_other_reports(session, clock):
+    session.report_playback("viewer-a", 100)
+    clock.now += session_module.PLAYBACK_TTL_SECONDS - 1
+    assert session.send_limit("viewer-a", 150) == 250
+    clock.now += 2
+    assert session.playback_frame("viewer-a") is None
+    assert session.send_limit("viewer-a", 150) is None
+
+
+def test_live_streams_are_counted(session):
+    with session.streaming():
+        with session.streaming():
+            assert session.live_streams == 2
+        assert session.live_streams == 1
+    assert session.live_streams == 0
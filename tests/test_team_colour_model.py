@@ -0,0 +1,54 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.assigners.team_colour_model import OnlineTeamModel
+
+RED, BLUE, GREEN = np.array([200.0, 30, 30]), np.array([30.0, 30, 200]), np.array([30.0, 200, 30])
+
+
+def drifted_model():
+    model = OnlineTeamModel(warmup=10, retry_samples=20)
+    assert model.seed([RED, BLUE, RED + 5, BLUE + 5])
+    for i in range(10):
+        model.observe(RED + (i % 3))
+    # Floodlights: every shirt now looks green
+    for _ in range(200):
+        model.observe(GREEN)
+    assert model.drifted
+    return model
+
+
+def samples_until_drifted(model, colour=GREEN):
+    for n in range(1, 1000):
+        model.observe(colour)
+        if model.drifted:
+            return n
+    return None
+
+
+def test_failed_reseed_backs_off():
+    model = drifted_model()
+    centroids = dict(model.centroids)
+
+    # Identical kits cannot be split: the fit is kept and drift goes quiet
+    assert not model.seed([GREEN, GREEN, GREEN])
+    assert not model.drifted
+    assert model.centroids == centroids
+    assert samples_until_drifted(model) == 20
+    assert not model.seed([GREEN])
+    assert samples_until_drifted(model) == 40
+
+
+def test_successful_seed_resets_the_back_off():
+    model = drifted_model()
+    assert not model.seed([GREEN, GREEN])
+    assert not model.seed([GREEN, GREEN])
+    assert model.seed([GREEN, RED, GREEN + 5, RED + 5])
+    for _ in range(10):
+        model.observe(RED)
+    for _ in range(200):
+        model.observe(BLUE)
+    assert model.drifted
+    assert not model.seed([BLUE, BLUE])
+    assert samples_until_drifted(model, BLUE) == 20
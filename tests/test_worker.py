@@ -0,0 +1,187 @@
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("cv2")
+
+import core.worker as worker
+from core.jobs import JobQueue, RUNNING, QUEUED, DONE, CANCELLED, SUSPENDED
+from core.results import ResultReader
+from core.checkpoint import CHECKPOINT_SUFFIX
+from fake_processor import FakeProcessor
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    jobs = JobQueue(str(tmp_path / "jobs.db"))
+    results_dir = str(tmp_path / "results")
+    os.makedirs(results_dir)
+    monkeypatch.setattr(worker, "CHECKPOINT_EVERY", 20)
+    built = []
+
+    def use(**kwargs):
+        def build(job, detector=None):
+            processor = FakeProcessor(source=job["params"].get("source", job["video_path"]), **kwargs)
+            if job["params"].get("halftime"):
+                processor.toggle_halftime()
+            built.append(processor)
+            return processor
+        monkeypatch.setattr(worker, "build_processor", build)
+
+    use()
+    return jobs, results_dir, use, built
+
+
+def claim(jobs, job_id):
+    job = jobs.claim(os.getpid())
+    assert job["id"] == job_id and job["status"] == RUNNING
+    return job
+
+
+def stored_frames(results_dir, job_id):
+    return list(ResultReader(worker.result_prefix(results_dir, job_id)).read_new())
+
+
+def stored_events(results_dir, job_id):
+    return ResultReader(worker.result_prefix(results_dir, job_id)).read_events()
+
+
+def assert_continuous(frames, last):
+    # Every frame stored once, in order, from state carried across restarts
+    assert [frame_id for frame_id, _ in frames] == list(range(1, last + 1))
+    assert all(tracks[0]["id"] == frame_id for frame_id, tracks in frames)
+
+
+def test_job_runs_to_done(env):
+    jobs, results_dir, use, built = env
+    job_id = jobs.submit("match.mp4")
+    assert worker.run_job(jobs, claim(jobs, job_id), results_dir) == DONE
+
+    job = jobs.get(job_id)
+    assert (job["status"], job["progress_frame"], job["total_frames"]) == (DONE, 100, 100)
+    assert_continuous(stored_frames(results_dir, job_id), 100)
+    assert [e["frame_id"] for e in stored_events(results_dir, job_id)] == [40, 80]
+    assert not os.path.exists(worker.result_prefix(results_dir, job_id) + CHECKPOINT_SUFFIX)
+    assert built[0].cap.released
+    # The analysis source is fixed at the first start
+    assert job["params"]["source"] == "match.mp4"
+
+
+def test_stopped_job_resumes_from_its_checkpoint(env):
+    jobs, results_dir, use, built = env
+    job_id = jobs.submit("match.mp4")
+    stop = threading.Event()
+    use(on_frame=lambda p, frame_id: stop.set() if frame_id == 55 else None)
+    assert worker.run_job(jobs, claim(jobs, job_id), results_dir, stop_event=stop) == QUEUED
+    assert jobs.get(job_id)["status"] == QUEUED
+    assert stored_frames(results_dir, job_id)[-1][0] == 55
+
+    use()
+    assert worker.run_job(jobs, claim(jobs, job_id), results_dir) == DONE
+    # Restored rather than sought: the tracker state continued
+    assert built[1].player_tracker.seen == 100
+    assert_continuous(stored_frames(results_dir, job_id), 100)
+    # Events before the restart are not written twice
+    assert [e["frame_id"] for e in stored_events(results_dir, job_id)] == [40, 80]
+
+
+def test_suspend_frees_the_worker_and_resume_continues(env):
+    jobs, results_dir, use, built = env
+    job_id = jobs.submit("match.mp4")
+    use(on_frame=lambda p, frame_id: jobs.suspend(job_id) if frame_id == 33 else None)
+    assert worker.run_job(jobs, claim(jobs, job_id), results_dir) == SUSPENDED
+
+    job = jobs.get(job_id)
+    assert job["status"] == SUSPENDED and job["worker_pid"] is None
+    # Commands are polled every COMMAND_POLL_FRAMES frames
+    assert stored_frames(results_dir, job_id)[-1][0] == 40
+    assert built[0].cap.released
+    # Suspended jobs are not claimed
+    assert jobs.claim(os.getpid()) is None
+
+    assert jobs.resume(job_id) == QUEUED
+    use()
+    assert worker.run_job(jobs, claim(jobs, job_id), results_dir) == DONE
+    assert_continuous(stored_frames(results_dir, job_id), 100)
+
+
+def test_suspend_and_resume_transitions(env):
+    jobs, results_dir, use, built = env
+    queued = jobs.submit("a.mp4")
+    assert jobs.suspend(queued) == SUSPENDED
+    assert jobs.resume(queued) == QUEUED
+
+    running = claim(jobs, queued)["id"]
+    assert jobs.suspend(running) == RUNNING
+    # Resumed before the worker acted: the request is withdrawn
+    assert jobs.resume(running) == RUNNING
+    assert jobs.take_commands(running) == []
+
+    jobs.finish(running, SUSPENDED)
+    assert jobs.cancel(running) == CANCELLED
+    assert jobs.resume(running) == CANCELLED
+    assert jobs.suspend("missing") is None
+
+
+def test_cancel_keeps_results_and_drops_the_checkpoint(env):
+    jobs, results_dir, use, built = env
+    job_id = jobs.submit("match.mp4")
+    use(on_frame=lambda p, frame_id: jobs.cancel(job_id) if frame_id == 45 else None)
+    assert worker.run_job(jobs, claim(jobs, job_id), results_dir) == CANCELLED
+    assert jobs.get(job_id)["status"] == CANCELLED
+    assert_continuous(stored_frames(results_dir, job_id), 50)
+    assert not os.path.exists(worker.result_prefix(results_dir, job_id) + CHECKPOINT_SUFFIX)
+
+
+def test_halftime_command_is_applied_and_kept_for_restarts(env):
+    jobs, results_dir, use, built = env
+    job_id = jobs.submit("match.mp4")
+    stop = threading.Event()
+
+    def on_frame(processor, frame_id):
+        if frame_id == 25:
+            jobs.send_command(job_id, "halftime")
+        if frame_id == 35:
+            stop.set()
+
+    use(on_frame=on_frame)
+    worker.run_job(jobs, claim(jobs, job_id), results_dir, stop_event=stop)
+    assert built[0].halftime_mode
+    assert jobs.get(job_id)["params"]["halftime"] is True
+
+    use()
+    worker.run_job(jobs, claim(jobs, job_id), results_dir)
+    assert built[1].halftime_mode
+
+
+def test_failed_processor_marks_the_job_failed(env, monkeypatch):
+    jobs, results_dir, use, built = env
+    job_id = jobs.submit("missing.mp4")
+
+    def broken(job, detector=None):
+        raise RuntimeError("Cannot open video source: missing.mp4")
+
+    monkeypatch.setattr(worker, "build_processor", broken)
+    assert worker.run_job(jobs, claim(jobs, job_id), results_dir) == "failed"
+    assert "Cannot open" in jobs.get(job_id)["error"]
+
+
+def test_switch_to_proxy_once_ready(env, tmp_path):
+    jobs, results_dir, use, built = env
+    proxy = str(tmp_path / "match.proxy.bin")
+    job_id = jobs.submit("match.mp4", {"proxy": proxy})
+    job = claim(jobs, job_id)
+    worker.analysis_source(jobs, job)
+    processor = FakeProcessor()
+    switched = []
+    processor.switch_source = switched.append
+
+    # Not transcoded yet
+    assert not worker.switch_to_proxy(jobs, job, processor)
+    open(proxy, "wb").close()
+    assert worker.switch_to_proxy(jobs, job, processor)
+    assert switched == [proxy]
+    assert jobs.get(job_id)["params"]["source"] == proxy
+    # Already on the proxy
+    assert not worker.switch_to_proxy(jobs, job, processor)
@@ -0,0 +1,369 @@
+"""
+Offline load test for the API: concurrent uploads and SSE viewers.
+
+    python tools/load_test.py --sessions 4 --viewers 3 --seconds 20 --workers 2
+
+Generates synthetic match videos, launches the app locally with the stub
+detector (no model needed), uploads the videos concurrently through
+/upload/stream and attaches viewers to /stream. Reports upload and
+processing throughput, time to first frame, how far each viewer lags
+behind real-time playback, and memory per session. The headline capacity
+is the number of matches the node processes at real-time speed.
+"""
+import argparse  # command-line interface
+import asyncio  # concurrent clients
+import json  # SSE payloads and the JSON report
+import os  # paths and /proc
+import random  # synthetic motion
+import shutil  # temporary files
+import socket  # free port
+import subprocess  # the server under test
+import sys  # interpreter path
+import tempfile  # synthetic videos and job database
+import time  # timings
+import urllib.parse  # query strings
+
+import cv2  # synthetic video encoding
+import numpy as np  # synthetic frames
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPLOAD_CHUNK_BYTES = 256 * 1024
+
+
+def make_synthetic_video(path, seconds=20, fps=25, width=1280, height=720, seed=0):
+    """
+    Write a pitch-like clip: green background, two teams of moving
+    rectangles and a white ball. Works with the stub detector.
+    """
+    rng = random.Random(seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    players = [[rng.uniform(0, width - 20), rng.uniform(0, height - 40),
+                rng.uniform(-4, 4), rng.uniform(-3, 3), (0, 0, 200) if i < 11 else (200, 0, 0)]
+               for i in range(22)]
+    ball = [width / 2, height / 2, 9.0, 5.0]
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    for _ in range(int(seconds * fps)):
+        frame[:] = (40, 140, 40)
+        for p in players:
+            p[0] = min(max(p[0] + p[2], 0), width - 20)
+            p[1] = min(max(p[1] + p[3], 0), height - 40)
+            if p[0] in (0, width - 20):
+                p[2] = -p[2]
+            if p[1] in (0, height - 40):
+                p[3] = -p[3]
+            cv2.rectangle(frame, (int(p[0]), int(p[1])), (int(p[0]) + 20, int(p[1]) + 40), p[4], -1)
+        ball[0] += ball[2]
+        ball[1] += ball[3]
+        if not 6 < ball[0] < width - 6:
+            ball[2] = -ball[2]
+        if not 6 < ball[1] < height - 6:
+            ball[3] = -ball[3]
+        cv2.circle(frame, (int(ball[0]), int(ball[1])), 5, (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+# ---------------------------------------------------------------- memory
+
+def _children(pid):
+    kids = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                kids.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return kids
+
+
+def tree_rss_bytes(pid):
+    """
+    Resident memory of a process and all its descendants (Linux /proc).
+    """
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+        stack.extend(_children(current))
+    return total
+
+
+async def sample_memory(pid, samples, stop):
+    while not stop.is_set():
+        samples.append(tree_rss_bytes(pid))
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=0.5)
+        except asyncio.TimeoutError:
+            pass
+
+
+# ---------------------------------------------------------------- HTTP
+
+async def _open(host, port, method, path, headers=None, length=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    lines = [f"{method} {path} HTTP/1.0", f"Host: {host}:{port}", "Connection: close"]
+    for name, value in (headers or {}).items():
+        lines.append(f"{name}: {value}")
+    if length is not None:
+        lines.append(f"Content-Length: {length}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    return reader, writer
+
+
+async def _read_head(reader):
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+        pass
+    return status
+
+
+async def upload(host, port, video_path):
+    """
+    Stream a file to /upload/stream. Returns (session_id, seconds).
+    """
+    query = urllib.parse.urlencode({"filename": os.path.basename(video_path), "direction": "right"})
+    size = os.path.getsize(video_path)
+    started = time.monotonic()
+    reader, writer = await _open(host, port, "POST", f"/upload/stream?{query}",
+                                 {"Content-Type": "video/mp4"}, length=size)
+    with open(video_path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_BYTES):
+            writer.write(chunk)
+            await writer.drain()
+    status = await _read_head(reader)
+    body = await reader.read()
+    writer.close()
+    if status != 200:
+        raise RuntimeError(f"upload failed ({status}): {body[:200]!r}")
+    return json.loads(body)["session_id"], time.monotonic() - started
+
+
+async def view(host, port, session_id, fps, stats):
+    """
+    Follow /stream until the end event, recording arrival times.
+    """
+    reader, writer = await _open(host, port, "GET", f"/stream?session_id={session_id}&from_frame=1",
+                                 {"Accept": "text/event-stream"})
+    if await _read_head(reader) != 200:
+        stats["error"] = "stream refused"
+        return
+    first = None
+    event = None
+    try:
+        while line := await reader.readline():
+            line = line.rstrip(b"\r\n")
+            if line.startswith(b"event:"):
+                event = line[6:].strip()
+            elif line.startswith(b"data:"):
+                if event == b"end":
+                    break
+                now = time.monotonic()
+                frame_id = json.loads(line[5:])["frame_id"]
+                if first is None:
+                    first = (now, frame_id)
+                    stats["first_frame_at"] = now
+                # Positive: behind where real-time playback would be
+                stats["lags"].append(now - (first[0] + (frame_id - first[1]) / fps))
+                stats["frames"] += 1
+            elif not line:
+                event = None
+    finally:
+        stats["ended_at"] = time.monotonic()
+        writer.close()
+
+
+async def run_session(host, port, video_path, viewers, fps, upload_slots):
+    result = {"video": os.path.basename(video_path)}
+    async with upload_slots:
+        started = time.monotonic()
+        session_id, upload_seconds = await upload(host, port, video_path)
+    result.update(session_id=session_id, upload_seconds=upload_seconds,
+                  upload_mbps=os.path.getsize(video_path) * 8 / 1e6 / upload_seconds)
+    viewer_stats = [{"frames": 0, "lags": []} for _ in range(viewers)]
+    await asyncio.gather(*(view(host, port, session_id, fps, s) for s in viewer_stats))
+
+    ok = [s for s in viewer_stats if s.get("first_frame_at")]
+    if ok:
+        result["ttff_seconds"] = min(s["first_frame_at"] for s in ok) - started
+        finished = max(s["ended_at"] for s in ok)
+        frames = max(s["frames"] for s in ok)
+        result["frames"] = frames
+        result["processing_fps"] = frames / max(finished - min(s["first_frame_at"] for s in ok), 1e-6)
+        lags = [lag for s in ok for lag in s["lags"]]
+        result["lag_p50"] = percentile(lags, 50)
+        result["lag_p95"] = percentile(lags, 95)
+        result["lag_p99"] = percentile(lags, 99)
+    result["viewer_errors"] = sum(1 for s in viewer_stats if "error" in s or not s.get("first_frame_at"))
+    return result
+
+
+# ---------------------------------------------------------------- main
+
+def launch_server(port, workers, workdir, detector_ms):
+    env = dict(os.environ)
+    env.update({
+        "VAR_DETECTOR": "stub",
+        "VAR_STUB_DETECTOR_MS": str(detector_ms),
+        "VAR_WORKERS": str(workers),
+        "VAR_JOBS_DB": os.path.join(workdir, "jobs.db"),
+        "VAR_LOG_LEVEL": "WARNING",
+    })
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env
+    )
+
+
+async def wait_for_server(host, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await _open(host, port, "GET", "/jobs")
+            status = await _read_head(reader)
+            writer.close()
+            if status == 200:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("server did not start")
+
+
+async def run(args):
+    workdir = tempfile.mkdtemp(prefix="var-load-")
+    videos = []
+    for i in range(args.sessions):
+        path = os.path.join(workdir, f"synthetic_{i}.mp4")
+        make_synthetic_video(path, args.seconds, args.fps, args.width, args.height, seed=i)
+        videos.append(path)
+    print(f"Generated {len(videos)} synthetic videos ({args.seconds}s, {args.width}x{args.height})")
+
+    server = None
+    host, port = "127.0.0.1", args.port
+    if args.url:
+        parsed = urllib.parse.urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        port = port or free_port()
+        server = launch_server(port, args.workers, workdir, args.detector_ms)
+    try:
+        await wait_for_server(host, port)
+        stop = asyncio.Event()
+        memory = []
+        sampler = None
+        if server is not None:
+            baseline = tree_rss_bytes(server.pid)
+            sampler = asyncio.create_task(sample_memory(server.pid, memory, stop))
+        upload_slots = asyncio.Semaphore(args.concurrent_uploads or args.sessions)
+
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(run_session(host, port, v, args.viewers, args.fps, upload_slots) for v in videos),
+            return_exceptions=True
+        )
+        elapsed = time.monotonic() - started
+        stop.set()
+        if sampler is not None:
+            await sampler
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    sessions = [r for r in results if isinstance(r, dict)]
+    failures = [r for r in results if not isinstance(r, dict)]
+    total_frames = sum(r.get("frames", 0) for r in sessions)
+    report = {
+        "sessions": args.sessions,
+        "viewers_per_session": args.viewers,
+        "workers": args.workers,
+        "elapsed_seconds": elapsed,
+        "failed_sessions": len(failures),
+        "aggregate_fps": total_frames / elapsed if elapsed > 0 else 0.0,
+        "ttff_p50": percentile([r["ttff_seconds"] for r in sessions if "ttff_seconds" in r], 50),
+        "ttff_max": max((r["ttff_seconds"] for r in sessions if "ttff_seconds" in r), default=None),
+        "lag_p95_max": max((r["lag_p95"] for r in sessions if r.get("lag_p95") is not None), default=None),
+        "per_session": sessions,
+    }
+    # Matches the node can analyse at real-time speed
+    report["realtime_capacity"] = int(report["aggregate_fps"] // args.fps)
+    if memory:
+        report["peak_rss_mb"] = max(memory) / 2**20
+        report["rss_per_session_mb"] = (max(memory) - baseline) / 2**20 / max(1, args.sessions)
+
+    print_report(report, failures)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if not failures else 1
+
+
+def _fmt(value, unit="", digits=2):
+    return "n/a" if value is None else f"{value:.{digits}f}{unit}"
+
+
+def print_report(report, failures):
+    print()
+    print(f"{'session':<20}{'upload':>10}{'ttff':>9}{'fps':>9}{'lag p50':>10}{'lag p95':>10}{'lag p99':>10}")
+    for r in report["per_session"]:
+        print(f"{r['video']:<20}{_fmt(r.get('upload_seconds'), 's'):>10}{_fmt(r.get('ttff_seconds'), 's'):>9}"
+              f"{_fmt(r.get('processing_fps'), '', 1):>9}{_fmt(r.get('lag_p50'), 's'):>10}"
+              f"{_fmt(r.get('lag_p95'), 's'):>10}{_fmt(r.get('lag_p99'), 's'):>10}")
+    for f in failures:
+        print(f"FAILED: {f}")
+    print()
+    print(f"Aggregate throughput: {_fmt(report['aggregate_fps'], ' frames/s', 1)}")
+    print(f"Time to first frame:  p50 {_fmt(report['ttff_p50'], 's')}, max {_fmt(report['ttff_max'], 's')}")
+    if "peak_rss_mb" in report:
+        print(f"Memory:               peak {_fmt(report['peak_rss_mb'], ' MB', 0)}, "
+              f"{_fmt(report['rss_per_session_mb'], ' MB', 0)} per session")
+    print(f"Capacity:             {report['realtime_capacity']} real-time match(es) on this node")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test for the VAR API.")
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent uploaded matches")
+    parser.add_argument("--viewers", type=int, default=2, help="SSE viewers per match")
+    parser.add_argument("--seconds", type=float, default=20, help="length of each synthetic video")
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--workers", type=int, default=2, help="analysis worker processes")
+    parser.add_argument("--detector-ms", type=float, default=0,
+                        help="simulated inference time per frame for the stub detector")
+    parser.add_argument("--concurrent-uploads", type=int, default=0,
+                        help="limit simultaneous uploads (default: all at once)")
+    parser.add_argument("--port", type=int, default=0, help="port for the launched server")
+    parser.add_argument("--url", help="test an already running server instead of launching one")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
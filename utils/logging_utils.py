@@ -0,0 +1,200 @@
+# logging_utils.py: Low-overhead structured logging for the processing pipeline
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+# Session and frame the current thread/task is working on
+_session_id = contextvars.ContextVar("session_id", default=None)
+_frame_id = contextvars.ContextVar("frame_id", default=None)
+
+# Single background listener draining the log queue
+_listener = None
+_configure_lock = threading.Lock()
+
+
+def get_logger(name):
+    """
+    Return the logger for a module.
+
+    Parameters:
+      name (str): usually the module's __name__
+
+    Returns:
+      logging.Logger
+    """
+    return logging.getLogger(name)
+
+
+def set_log_context(session_id=None, frame_id=None):
+    """
+    Set the session and/or frame attached to records emitted from this
+    thread or task. Arguments left as None are not changed.
+
+    Parameters:
+      session_id (str): processing session identifier
+      frame_id (int): frame currently being processed
+    """
+    if session_id is not None:
+        _session_id.set(session_id)
+    if frame_id is not None:
+        _frame_id.set(frame_id)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Stamps every record with the current session_id and frame_id.
+    """
+    def filter(self, record):
+        record.session_id = _session_id.get()
+        record.frame_id = _frame_id.get()
+        return True
+
+
+class SampledDebugFilter(logging.Filter):
+    """
+    Rate-limits DEBUG records per call site with a token bucket, so a
+    message emitted every frame is written at most `rate` times a second
+    (with bursts up to `burst`). Suppressed counts are reported on the
+    next record that passes. Records above DEBUG always pass.
+    """
+    def __init__(self, rate=2.0, burst=5):
+        super().__init__()
+        self.rate = float(rate)
+        self.burst = float(burst)
+        # (logger name, line number) -> [tokens, last refill time, suppressed]
+        self.buckets = {}
+        # Records are filtered on every thread that logs
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.name, record.lineno)
+        with self._lock:
+            now = time.monotonic()
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = [self.burst, now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records with their message merged but not formatted, so the
+    listener's formatter (JSON, tracebacks) runs on the listener thread.
+    The stock QueueHandler formats on the emitting thread.
+    """
+    def prepare(self, record):
+        # Arguments may be mutated once the caller moves on (e.g. track
+        # dicts), so the message itself is merged now
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line.
+    """
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "session": getattr(record, "session_id", None),
+            "frame": getattr(record, "frame_id", None),
+            "msg": record.getMessage()
+        }
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _parse_levels(spec):
+    # "core.trackers=DEBUG,core.event_detector=INFO" -> {name: level}
+    levels = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level=None, module_levels=None, structured=True, stream=None):
+    """
+    Install the pipeline logging setup once per process:
+      • Records are enqueued by a QueueHandler and written by a background
+        QueueListener, so the processing thread never blocks on I/O
+      • Per-module levels, e.g. {"core.trackers": "DEBUG"}
+      • DEBUG output is rate-limited per call site
+      • Records carry session_id and frame_id
+
+    Parameters:
+      level (str): default level for the "core" and "app" loggers
+                   (env VAR_LOG_LEVEL, default INFO)
+      module_levels (dict[str, str]): per-module overrides
+                   (env VAR_LOG_LEVELS="core.trackers=DEBUG,...")
+      structured (bool): JSON lines if True, plain text otherwise
+      stream: output stream for the listener (default stderr)
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        level = (level or os.environ.get("VAR_LOG_LEVEL", "INFO")).upper()
+        levels = _parse_levels(os.environ.get("VAR_LOG_LEVELS"))
+        levels.update(module_levels or {})
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        if structured:
+            output.setFormatter(StructuredFormatter())
+        else:
+            output.setFormatter(logging.Formatter(
+                "%(asctime)s %(levelname)s %(name)s [%(session_id)s:%(frame_id)s] %(message)s"
+            ))
+
+        # Context, sampling and merging the message run on the emitting
+        # thread (cheap); formatting and writing happen on the listener thread
+        handler = RecordQueueHandler(queue.SimpleQueue())
+        handler.addFilter(ContextFilter())
+        handler.addFilter(SampledDebugFilter())
+        _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=False)
+        _listener.start()
+
+        for name in ("core", "app", "utils"):
+            logger = logging.getLogger(name)
+            logger.setLevel(level)
+            logger.addHandler(handler)
+            logger.propagate = False
+        for name, module_level in levels.items():
+            logging.getLogger(name).setLevel(module_level)
+
+
+def shutdown_logging():
+    """
+    Flush queued records and stop the background listener.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None